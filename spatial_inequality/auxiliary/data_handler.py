@@ -2,9 +2,25 @@
 Handler for all direct I/O with raw data files. Serves data parsing, filtering
 and standardization (for use with other modules).
 """
+import hashlib
+import os
+import tempfile
+
 import numpy as np
 import pandas as pd
 
+from auxiliary.school_adjacency import SchoolAdjacency
+
+# Version of all preprocessing steps in `load_data` (should be increased
+# whenever they change, to invalidate any previously cached data)
+PREPROCESSING_VERSION = 2
+
+# Length of standardized NCES IDs (by mode)
+NCESID_PADDING = {
+    "school": 12,
+    "district": 7
+}
+
 def fix_ncesid(ncesid, mode):
     """
     Applies standard formatting (zero padding and typecasting) to
@@ -18,11 +34,22 @@ def fix_ncesid(ncesid, mode):
         str: Standardized NCES ID (does not perform zero padding if
             unknown mode is porvided).
     """
-    padding = {
-        "school": 12,
-        "district": 7
-    }.get(mode, 0)
-    return str(ncesid).zfill(padding)
+    return str(ncesid).zfill(NCESID_PADDING.get(mode, 0))
+
+def fix_ncesids(ncesids, mode):
+    """
+    Vectorized counterpart of `fix_ncesid`, for NCES IDs already read as
+    strings.
+  
+    Args:
+        ncesids (pandas.Series): Target NCES IDs to fix (e.g. '100005').
+        mode (str): Should be either "school" or "district".
+    
+    Returns:
+        pandas.Series: Standardized NCES IDs (does not perform zero padding if
+            unknown mode is porvided).
+    """
+    return ncesids.str.zfill(NCESID_PADDING.get(mode, 0))
 
 def remove_cross_state_neighbors(aug_school_info, school_assignment):
     """
@@ -40,28 +67,85 @@ def remove_cross_state_neighbors(aug_school_info, school_assignment):
     """
     aug_school_info = aug_school_info.copy()
 
+    # One row per (school, neighbor) pair, alongside both schools' states
+    neighbor_pairs = aug_school_info["neighbour_ids"].str.split(",").explode().dropna()
+    neighbor_pairs = pd.DataFrame({
+        "school_id": neighbor_pairs.index,
+        "neighbor_id": neighbor_pairs.to_numpy()
+    }).drop_duplicates()
+    state_names = school_assignment["state_name"]
+    neighbor_pairs = neighbor_pairs.join(state_names.rename("school_state"), on="school_id")
+    neighbor_pairs = neighbor_pairs.join(state_names.rename("neighbor_state"), on="neighbor_id")
+
     # Filter out cross-state neighbors
-    get_state = lambda school_id: school_assignment.loc[school_id]["state_name"]
-    from_same_state = lambda id_l, id_r: get_state(id_l) == get_state(id_r)
-
-    def filter_cross_state_neighbors(row):
-        if len(row["neighbour_ids"]) == 0:
-            return row
-        neighbor_ids_set = set(row["neighbour_ids"].split(","))
-        valid_neighbor_ids_set = set(filter(
-            lambda neighbor_id: from_same_state(row.name, neighbor_id),
-            neighbor_ids_set
-        ))
-        row["neighbour_ids"] = ",".join(list(valid_neighbor_ids_set))
-        return row
-        
-    aug_school_info = aug_school_info.apply(
-        filter_cross_state_neighbors,
-        axis=1
+    neighbor_pairs = neighbor_pairs[neighbor_pairs["school_state"] == neighbor_pairs["neighbor_state"]]
+    valid_neighbor_ids = neighbor_pairs.groupby("school_id", sort=False)["neighbor_id"].agg(",".join)
+
+    # Schools without any neighbors are kept as they are
+    has_neighbors = aug_school_info["neighbour_ids"].str.len() > 0
+    aug_school_info.loc[has_neighbors, "neighbour_ids"] = valid_neighbor_ids.reindex(
+        aug_school_info.index[has_neighbors],
+        fill_value=""
     )
 
     return aug_school_info
 
+def remove_cross_state_neighbors_with_adjacency(aug_school_info, school_assignment, adjacency):
+    """
+    Counterpart of `remove_cross_state_neighbors` that filters already parsed
+    neighbouring edges directly (instead of re-parsing all neighbours'
+    strings).
+  
+    Args:
+        aug_school_info (pandas.DataFrame): Target school information
+            (containing neighbouring edges).
+        school_assignment (pandas.DataFrame): Target school assignment
+            (containing state assignment).
+        adjacency (auxiliary.school_adjacency.SchoolAdjacency): Already parsed
+            neighbouring edges.
+    
+    Returns:
+        tuple: Refined school information (`pandas.DataFrame`) and adjacency
+            (`auxiliary.school_adjacency.SchoolAdjacency`), with cross-state
+            neighbours removed.
+    """
+    aug_school_info = aug_school_info.copy()
+
+    # Filter out edges between schools with different states
+    adjacency = adjacency.subset(aug_school_info.index)
+    state_codes, _ = pd.factorize(school_assignment["state_name"].reindex(adjacency.get_school_ids()))
+    school_idxs, neighbor_idxs = adjacency.get_edges()
+    adjacency = adjacency.filter_edges(
+        (state_codes[school_idxs] == state_codes[neighbor_idxs]) & (state_codes[school_idxs] >= 0)
+    )
+    aug_school_info["neighbour_ids"] = adjacency.to_neighbour_ids()
+    return aug_school_info, adjacency
+
+def remove_schools_without_info(aug_school_info, school_assignment):
+    """
+    Removes any school entries (and their assignments) which do not contain
+    information regarding their total funding and/or number students, without
+    updating any neighbouring edges.
+  
+    Args:
+        aug_school_info (pandas.DataFrame): Target school information
+            (containing funding and students).
+        school_assignment (pandas.DataFrame): Target school assignment
+            (containing district and state assignments).
+    
+    Returns:
+        tuple: Refined school information (`pandas.DataFrame`) and school
+            assignment (`pandas.DataFrame`).
+    """
+    # Remove schools without funding or students
+    has_funding = aug_school_info["adjusted_total_revenue_per_student"].fillna(0) != 0
+    has_students = aug_school_info["total_students"].fillna(0) != 0
+    aug_school_info = aug_school_info[has_funding & has_students].copy()
+
+    # Filter out school assignments wo/ info
+    school_assignment = school_assignment[school_assignment.index.isin(aug_school_info.index)].copy()
+    return aug_school_info, school_assignment
+
 def remove_invalid_entries(aug_school_info, school_assignment):
     """
     Removes any school entries which do not contain information regarding their
@@ -77,17 +161,7 @@ def remove_invalid_entries(aug_school_info, school_assignment):
         tuple: Refined school information (`pandas.DataFrame`) and school
             assignment (`pandas.DataFrame`).
     """
-    aug_school_info = aug_school_info.copy()
-    school_assignment = school_assignment.copy()
-
-    # Remove schools without funding or students
-    replace_zero_with_nan = lambda x: x.replace(0, np.nan, inplace=True)
-    replace_zero_with_nan(aug_school_info["adjusted_total_revenue_per_student"])
-    replace_zero_with_nan(aug_school_info["total_students"])
-    aug_school_info = aug_school_info.dropna(subset=[
-        "adjusted_total_revenue_per_student",
-        "total_students"
-    ])
+    aug_school_info, school_assignment = remove_schools_without_info(aug_school_info, school_assignment)
 
     # Set of all schools w/ available info
     valid_school_ids_set = set(aug_school_info.index)
@@ -104,25 +178,109 @@ def remove_invalid_entries(aug_school_info, school_assignment):
         lambda neighbor_ids_str: filter_unavailable_neighbors(neighbor_ids_str, valid_school_ids_set)
     )
 
-    # Filter out school assignments wo/ info
-    school_assignment = school_assignment[school_assignment.index.isin(aug_school_info.index)]
-
     return aug_school_info, school_assignment
 
-def load_data():
+def remove_invalid_entries_with_adjacency(aug_school_info, school_assignment, adjacency):
+    """
+    Counterpart of `remove_invalid_entries` that filters already parsed
+    neighbouring edges directly (instead of re-parsing all neighbours'
+    strings).
+  
+    Args:
+        aug_school_info (pandas.DataFrame): Target school information
+            (containing funding and students).
+        school_assignment (pandas.DataFrame): Target school assignment
+            (containing district and state assignments).
+        adjacency (auxiliary.school_adjacency.SchoolAdjacency): Already parsed
+            neighbouring edges.
+    
+    Returns:
+        tuple: Refined school information (`pandas.DataFrame`), school
+            assignment (`pandas.DataFrame`) and adjacency
+            (`auxiliary.school_adjacency.SchoolAdjacency`).
+    """
+    aug_school_info, school_assignment = remove_schools_without_info(aug_school_info, school_assignment)
+
+    # Filter out neighbors wo/ info
+    adjacency = adjacency.subset(aug_school_info.index)
+    aug_school_info["neighbour_ids"] = adjacency.to_neighbour_ids()
+    return aug_school_info, school_assignment, adjacency
+
+def filter_states(aug_school_info, school_assignment, adjacency, states):
+    """
+    Restricts already refined data to a subset of states.
+  
+    Args:
+        aug_school_info (pandas.DataFrame): Refined school information.
+        school_assignment (pandas.DataFrame): Refined school assignment.
+        adjacency (auxiliary.school_adjacency.SchoolAdjacency): Refined school
+            adjacency (i.e., without cross-state neighbours).
+        states (list of str): Full names of all target states (e.g.
+            ['Alabama']).
+    
+    Returns:
+        tuple: Refined school information (`pandas.DataFrame`), school
+            assignment (`pandas.DataFrame`) and school adjacency
+            (`auxiliary.school_adjacency.SchoolAdjacency`), for the target
+            states only.
+    """
+    school_assignment = school_assignment[school_assignment["state_name"].isin(states)]
+    aug_school_info = aug_school_info[aug_school_info.index.isin(school_assignment.index)]
+    adjacency = adjacency.subset(aug_school_info.index)
+    return aug_school_info, school_assignment, adjacency
+
+def load_data(return_adjacency=False, use_cache=True, states=None):
     """
-    Loads all necessary data regarding school information and school assignment. 
+    Loads all necessary data regarding school information and school assignment.
+    All schools' neighbours are parsed only once (into a
+    `auxiliary.school_adjacency.SchoolAdjacency`), and then refined alongside
+    all other data.
+
+    Refined data is cached on disk (inside the data directory), keyed by the
+    contents of all input files and `PREPROCESSING_VERSION`. Whenever either of
+    them changes, the cache is ignored and rewritten.
+
+    If only some states are requested, they are taken from the cache whenever
+    it is valid. Otherwise, all input files are read in chunks and filtered
+    right away, so that only the requested states' schools are ever refined
+    (in which case the cache is left untouched).
   
+    Args:
+        return_adjacency (bool): Whether to also return the refined adjacency
+            between schools.
+        use_cache (bool): Whether to read (and write) cached data.
+        states (list of str): Full names of all target states (e.g.
+            ['Alabama', 'Rhode Island']), or None for all states.
+
     Returns:
         tuple: School information (`pandas.DataFrame`) and school assignment
-            (`pandas.DataFrame`).
+            (`pandas.DataFrame`). If `return_adjacency` is True, the adjacency
+            between schools (`auxiliary.school_adjacency.SchoolAdjacency`) is
+            also included.
     """
+    if states is not None:
+        states = [state.title() for state in states]
+
     dh = DataHandler()
-    aug_school_info = dh.get_augmented_school_info()
-    school_assignment = dh.get_school_assignment()
+    cache_key = dh.get_cache_key() if use_cache is True else None
+    cached_data = dh.read_preprocessed_data(cache_key) if use_cache is True else None
 
-    aug_school_info, school_assignment = remove_invalid_entries(aug_school_info, school_assignment)
-    aug_school_info = remove_cross_state_neighbors(aug_school_info, school_assignment)
+    if cached_data is not None:
+        aug_school_info, school_assignment, adjacency = cached_data
+        if states is not None:
+            aug_school_info, school_assignment, adjacency = filter_states(aug_school_info, school_assignment, adjacency, states)
+    else:
+        aug_school_info = dh.get_augmented_school_info(states=states)
+        school_assignment = dh.get_school_assignment(states=states)
+        adjacency = SchoolAdjacency.from_neighbour_ids(aug_school_info["neighbour_ids"])
+
+        aug_school_info, school_assignment, adjacency = remove_invalid_entries_with_adjacency(aug_school_info, school_assignment, adjacency)
+        aug_school_info, adjacency = remove_cross_state_neighbors_with_adjacency(aug_school_info, school_assignment, adjacency)
+        if use_cache is True and states is None:
+            dh.write_preprocessed_data(cache_key, aug_school_info, school_assignment, adjacency)
+
+    if return_adjacency is True:
+        return aug_school_info, school_assignment, adjacency
     return aug_school_info, school_assignment
 
 class DataHandler:
@@ -131,129 +289,317 @@ class DataHandler:
 
     Attributes:
         __data_path (str): Root directory from which to read data files.
+        __input_filenames (tuple of str): Names of all raw data files.
+        __cache_filename (str): Name of the preprocessed data's cache file.
+        __chunk_size (int): Number of rows per chunk, when reading filtered
+            data files.
     """
     __data_path = None
+    __input_filenames = ("school_info.csv", "district_info.csv", "school_assignment.csv")
+    __cache_filename = "preprocessed_data.npz"
+    __chunk_size = 10000
     
     def __init__(self, data_path="../data"):
         self.__data_path = data_path
         
-    def __read_file(self, filename, compression="gzip", encoding="utf-8"):
+    def __pack_df(self, df, prefix, exclude=()):
         """
-        Read raw CSV data file, located inside `DataHandler.__data_path`.
+        Converts a DataFrame into a flat mapping of (column) arrays, to be
+        stored in a numpy archive. String columns are stored as fixed-width
+        unicode arrays, so that no pickling is ever needed.
       
         Args:
-            filename (str): Name of file to read (w/ extension).
-            compression (str): Compression algorithm used in the CSV file.
-            encoding (str): Character encoding used in the CSV file.
+            df (pandas.DataFrame): Target DataFrame.
+            prefix (str): Prefix of all resulting keys.
+            exclude (tuple of str): Names of columns not to be stored.
+        
+        Returns:
+            dict: Mapping between each key and its array.
+        """
+        to_array = lambda x: x.astype(str) if x.dtype == object else x
+        arrays = {
+            f"{prefix}.columns": np.array(list(df.columns), dtype=str),
+            f"{prefix}.index_name": np.array([df.index.name], dtype=str),
+            f"{prefix}.index": to_array(df.index.to_numpy())
+        }
+        for col_name in df.columns:
+            if col_name in exclude:
+                continue
+            if isinstance(df[col_name].dtype, pd.CategoricalDtype):
+                # Categorical columns are stored as codes (and categories)
+                arrays[f"{prefix}.{col_name}"] = df[col_name].cat.codes.to_numpy()
+                arrays[f"{prefix}.{col_name}.categories"] = to_array(df[col_name].cat.categories.to_numpy())
+            else:
+                arrays[f"{prefix}.{col_name}"] = to_array(df[col_name].to_numpy())
+        return arrays
+
+    def __unpack_df(self, arrays, prefix, extra_cols={}):
+        """
+        Converts a flat mapping of (column) arrays back into a DataFrame (see
+        `DataHandler.__pack_df`).
+      
+        Args:
+            arrays (dict): Mapping between each key and its array.
+            prefix (str): Prefix of all target keys.
+            extra_cols (dict): Mapping between the names of any columns that
+                were not stored and their values.
         
         Returns:
             pandas.DataFrame: Resulting DataFrame.
         """
-        return pd.read_csv(
-            f"{self.__data_path}/{filename}",
-            compression=compression,
-            encoding=encoding
+        def get_col(col_name):
+            if col_name in extra_cols:
+                return extra_cols[col_name]
+            if f"{prefix}.{col_name}.categories" in arrays:
+                return pd.Categorical.from_codes(
+                    arrays[f"{prefix}.{col_name}"],
+                    arrays[f"{prefix}.{col_name}.categories"]
+                )
+            return arrays[f"{prefix}.{col_name}"]
+        index = pd.Index(arrays[f"{prefix}.index"], name=arrays[f"{prefix}.index_name"][0])
+        return pd.DataFrame({
+            col_name: get_col(col_name) for col_name in arrays[f"{prefix}.columns"].tolist()
+        }, index=index)
+
+    def get_cache_key(self):
+        """
+        Computes the key of all preprocessed data, based on the contents of all
+        raw data files and `PREPROCESSING_VERSION`.
+        
+        Returns:
+            str: SHA-256 hex digest.
+        """
+        sha = hashlib.sha256(f"preprocessing-v{PREPROCESSING_VERSION}".encode("utf-8"))
+        for filename in self.__input_filenames:
+            with open(f"{self.__data_path}/{filename}", "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha.update(chunk)
+        return sha.hexdigest()
+
+    def read_preprocessed_data(self, cache_key):
+        """
+        Reads preprocessed data from the cache file, if it exists and matches
+        the provided key.
+      
+        Args:
+            cache_key (str): Expected key (see `DataHandler.get_cache_key`).
+        
+        Returns:
+            tuple: Refined school information (`pandas.DataFrame`), school
+                assignment (`pandas.DataFrame`) and school adjacency
+                (`auxiliary.school_adjacency.SchoolAdjacency`), or None if
+                there is no valid cached data.
+        """
+        try:
+            with np.load(f"{self.__data_path}/{self.__cache_filename}", allow_pickle=False) as npz:
+                arrays = dict(npz.items())
+        except (OSError, ValueError):
+            return None
+        if arrays.get("cache_key", np.array([""]))[0] != cache_key:
+            return None
+        adjacency = SchoolAdjacency(
+            arrays["adjacency.school_ids"],
+            arrays["adjacency.offsets"],
+            arrays["adjacency.indices"]
         )
-    
-    def __format_cols(self, df, type_dict):
+        aug_school_info = self.__unpack_df(arrays, "aug_school_info", extra_cols={
+            "neighbour_ids": adjacency.to_neighbour_ids().to_numpy()
+        })
+        school_assignment = self.__unpack_df(arrays, "school_assignment")
+        return aug_school_info, school_assignment, adjacency
+
+    def write_preprocessed_data(self, cache_key, aug_school_info, school_assignment, adjacency):
         """
-        Formats all columns' values of a DataFrame with their desired
-        variable type.
+        Writes preprocessed data into the cache file (atomically, so that
+        concurrent readers never see a partially written file). Neighbours'
+        strings are not stored, since they can be rebuilt from the adjacency.
       
         Args:
-            df (pandas.DataFrame): Target DataFrame.
-            type_dict (dict): Type mapping for all named columns.
+            cache_key (str): Key of the data (see `DataHandler.get_cache_key`).
+            aug_school_info (pandas.DataFrame): Refined school information.
+            school_assignment (pandas.DataFrame): Refined school assignment.
+            adjacency (auxiliary.school_adjacency.SchoolAdjacency): Refined
+                school adjacency (over the same schools as `aug_school_info`).
+        """
+        offsets, indices = adjacency.get_csr()
+        arrays = {
+            "cache_key": np.array([cache_key], dtype=str),
+            "adjacency.school_ids": adjacency.get_school_ids().to_numpy().astype(str),
+            "adjacency.offsets": offsets,
+            "adjacency.indices": indices,
+            **self.__pack_df(aug_school_info, "aug_school_info", exclude=("neighbour_ids",)),
+            **self.__pack_df(school_assignment, "school_assignment")
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.__data_path, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, f"{self.__data_path}/{self.__cache_filename}")
+        except OSError:
+            # Caching is best-effort (e.g., read-only data directory)
+            pass
+        finally:
+            # Never leave a partially written file behind
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+    def __read_file(self, filename, type_dict, compression="gzip", encoding="utf-8", row_filter=None):
+        """
+        Read raw CSV data file, located inside `DataHandler.__data_path`, with
+        all columns typecasted at read time. If a row filter is provided, the
+        file is read in chunks and each chunk is filtered right away (so that
+        the whole file is never held in memory).
+      
+        Args:
+            filename (str): Name of file to read (w/ extension).
+            type_dict (dict): Type mapping for all named columns (NCES IDs
+                should be read as strings, so that they can be zero padded).
+            compression (str): Compression algorithm used in the CSV file.
+            encoding (str): Character encoding used in the CSV file.
+            row_filter (function): Function mapping a (raw) chunk to the
+                subset of its rows to keep, or None.
         
         Returns:
-            pandas.DataFrame: Copy of initial DataFrame with typecasted column
-                values.
+            pandas.DataFrame: Resulting DataFrame.
         """
-        formatted_df = df.copy()
-        for col_name, dtype in type_dict.items():
-            formatted_df[col_name] = formatted_df[col_name].astype(dtype)
-        return formatted_df
+        if row_filter is None:
+            return pd.read_csv(
+                f"{self.__data_path}/{filename}",
+                dtype=type_dict,
+                compression=compression,
+                encoding=encoding
+            )
+        chunks = pd.read_csv(
+            f"{self.__data_path}/{filename}",
+            dtype=type_dict,
+            compression=compression,
+            encoding=encoding,
+            chunksize=self.__chunk_size
+        )
+        return pd.concat([row_filter(chunk) for chunk in chunks])
     
-    def get_augmented_school_info(self):
+    def get_augmented_school_info(self, states=None):
         """
         Augments school information to also include estimated 'per-student
         revenue', alongside all other school attributes.
+
+        Args:
+            states (list of str): Full names of all target states (e.g.
+                ['Alabama']), or None for all states.
         
         Returns:
             pandas.DataFrame: Resulting DataFrame.
         """
-        school_info = self.get_school_info()
-        district_info = self.get_district_info()
-        school_assignment = self.get_school_assignment()
+        school_assignment = self.get_school_assignment(states=states)
+        if states is None:
+            school_info = self.get_school_info()
+            district_info = self.get_district_info()
+        else:
+            school_info = self.get_school_info(school_ids=set(school_assignment.index))
+            district_info = self.get_district_info(district_ids=set(school_assignment["district_id"]))
         # Add 'per student revenue' to each school's attributes
         school_info = pd.merge(school_info, school_assignment[["district_id"]], left_index=True, right_index=True)
         school_info = pd.merge(school_info, district_info, left_on="district_id", right_index=True)
         return school_info.drop(["district_id"], axis=1)
     
-    def get_school_info(self):
+    def get_school_info(self, school_ids=None):
         """
         Read school information from a CSV file into a DataFrame.
+
+        Args:
+            school_ids (set of str): Standardized NCES IDs of all target
+                schools, or None for all schools.
         
         Returns:
             pandas.DataFrame: Resulting DataFrame (indexed on "school_id").
         """
         filename = "school_info.csv"
-        df = self.__read_file(filename)
-        # Fix NCESID
-        df["school_id"] = df["school_id"].apply(lambda x: fix_ncesid(x, mode="school"))
-        # Remove invalid schools (schools that have NaN values and do
-        # not show up in 'https://nces.ed.gov/ccd/schoolsearch/').
-        df = df.dropna()
-        # Assign type to each column
-        df = self.__format_cols(df, type_dict={
+        row_filter = None
+        if school_ids is not None:
+            row_filter = lambda x: x[fix_ncesids(x["school_id"], mode="school").isin(school_ids)]
+        # Students are stored as floats (e.g. '863.0'), and may be missing
+        df = self.__read_file(filename, row_filter=row_filter, type_dict={
                 "school_id": str,
                 "neighbour_ids": str,
-                "total_students": int
+                "school_name": str,
+                "total_students": np.float32
             }
         )
+        # Fix NCESID
+        df["school_id"] = fix_ncesids(df["school_id"], mode="school")
+        # Remove invalid schools (schools that have NaN values and do
+        # not show up in 'https://nces.ed.gov/ccd/schoolsearch/').
+        df = df.dropna()
+        df["total_students"] = df["total_students"].astype(np.int32)
         # Return final dataframe
         return df.set_index("school_id", drop=True)
+
+    def get_school_adjacency(self):
+        """
+        Parse all schools' neighbours (from school information) into a
+        compressed sparse row adjacency.
+
+        Returns:
+            auxiliary.school_adjacency.SchoolAdjacency: Resulting adjacency.
+        """
+        return SchoolAdjacency.from_neighbour_ids(self.get_school_info()["neighbour_ids"])
     
-    def get_district_info(self):
+    def get_district_info(self, district_ids=None):
         """
         Read district information from a CSV file into a DataFrame.
+
+        Args:
+            district_ids (set of str): Standardized NCES IDs of all target
+                districts, or None for all districts.
         
         Returns:
             pandas.DataFrame: Resulting DataFrame (indexed on "district_id").
         """
         filename = "district_info.csv"
-        df = self.__read_file(filename)
-        # Fix NCESID
-        df["district_id"] = df["district_id"].apply(lambda x: fix_ncesid(x, mode="district"))
-        # Assign type to each column
-        df = self.__format_cols(df, type_dict={
+        row_filter = None
+        if district_ids is not None:
+            row_filter = lambda x: x[fix_ncesids(x["district_id"], mode="district").isin(district_ids)]
+        # Revenues are kept in double precision, since they feed every
+        # school's (and district's) total funding
+        df = self.__read_file(filename, row_filter=row_filter, type_dict={
                 "district_id": str,
-                "adjusted_local_revenue_per_student": float,
-                "adjusted_state_revenue_per_student": float,
-                "adjusted_federal_revenue_per_student": float,
-                "adjusted_total_revenue_per_student": float,
+                "adjusted_local_revenue_per_student": np.float64,
+                "adjusted_state_revenue_per_student": np.float64,
+                "adjusted_federal_revenue_per_student": np.float64,
+                "adjusted_total_revenue_per_student": np.float64
             }
         )
+        # Fix NCESID
+        df["district_id"] = fix_ncesids(df["district_id"], mode="district")
         # Return final dataframe
         return df.set_index("district_id", drop=True)
     
-    def get_school_assignment(self):
+    def get_school_assignment(self, states=None):
         """
         Read initial school assignment from a CSV file into a DataFrame.
+
+        Args:
+            states (list of str): Full names of all target states (e.g.
+                ['Alabama']), or None for all states.
         
         Returns:
             pandas.DataFrame: Resulting DataFrame (indexed on "school_id").
         """
         filename = "school_assignment.csv"
-        df = self.__read_file(filename)
-        # Fix NCESID
-        df["school_id"] = df["school_id"].apply(lambda x: fix_ncesid(x, mode="school"))
-        df["district_id"] = df["district_id"].apply(lambda x: fix_ncesid(x, mode="district"))
-        # Assign type to each column
-        df = self.__format_cols(df, type_dict={
+        row_filter = None
+        if states is not None:
+            row_filter = lambda x: x[x["state_name"].isin(states)]
+        df = self.__read_file(filename, row_filter=row_filter, type_dict={
                 "school_id": str,
                 "district_id": str,
-                "state_name": str
+                "state_name": "category"
             }
         )
+        # Fix NCESID
+        df["school_id"] = fix_ncesids(df["school_id"], mode="school")
+        df["district_id"] = fix_ncesids(df["district_id"], mode="district")
+        # Chunks' categories are merged back together
+        df["state_name"] = df["state_name"].astype("category")
         # Return final dataframe
         return df.set_index("school_id", drop=True)
\ No newline at end of file
@@ -234,6 +234,121 @@ def get_possible_school_transitions(district_id, school_info, school_assignment)
             school_transitions.append((neighbour_school_id, neighbour_district_id, district_id))
     return list(school_transitions)
 
+def get_state_graph_arrays(state_name, aug_school_info, school_assignment, adjacency=None):
+    """
+    Gets all information needed to build a state's school graph at once, from
+    a single pass over the provided DataFrames (as opposed to querying them
+    once per school or district). Schools and districts are indexed by their
+    order of appearance in the school assignment, and both the district
+    membership and the school adjacency are returned in compressed sparse row
+    format (i.e., the entries of the i-th row are given by
+    `indices[offsets[i]:offsets[i+1]]`). Neighbors outside the state are
+    ignored, and every row of the school adjacency is sorted, without any
+    duplicate (or self-referencing) neighbors, so that it never needs to be
+    normalized again (see `optimization.state_graph.StateGraph`). If an
+    already parsed adjacency is provided, neighbors are taken from it instead
+    of the neighbors' strings.
+
+    Args:
+        state_name (str): Full name of target state (e.g. 'Alabama').
+        aug_school_info (pandas.DataFrame): Target augmented school information
+            (as formatted by `auxiliary.data_handler.DataHandler`).
+        school_assignment (pandas.DataFrame): Target school assignment (as
+            formatted by `auxiliary.data_handler.DataHandler`).
+        adjacency (auxiliary.school_adjacency.SchoolAdjacency): Adjacency
+            between schools (as returned by `auxiliary.data_handler.load_data`),
+            or None.
+
+    Returns:
+        dict: Mapping containing (i) "school_ids", a list with the NCES IDs of
+            all schools, (ii) "total_students" and (iii) "total_funding", arrays
+            with each school's totals, (iv) "neighbor_offsets" and (v)
+            "neighbor_idxs", arrays with the school adjacency, (vi)
+            "district_ids", a list with the NCES IDs of all districts, and (vii)
+            "district_offsets" and (viii) "district_school_idxs", arrays with
+            each district's schools.
+    """
+    state_assignment = school_assignment[school_assignment["state_name"] == state_name.title()]
+    state_assignment = state_assignment[~state_assignment.index.duplicated()]
+    school_ids = state_assignment.index
+    state_school_info = aug_school_info.reindex(school_ids)
+
+    # School totals
+    total_students = state_school_info["total_students"].to_numpy()
+    total_funding = (state_school_info["adjusted_total_revenue_per_student"] * state_school_info["total_students"]).to_numpy(dtype=float)
+
+    # District membership (schools grouped by district, in order of appearance)
+    district_codes, district_ids = pd.factorize(state_assignment["district_id"])
+    district_school_idxs = np.argsort(district_codes, kind="stable")
+    district_offsets = np.concatenate([[0], np.cumsum(np.bincount(district_codes, minlength=len(district_ids)))])
+
+    # School adjacency (one row per school/neighbor pair)
+    if adjacency is not None:
+        neighbor_offsets, neighbor_idxs = adjacency.subset(school_ids).get_csr()
+    else:
+        neighbor_offsets, neighbor_idxs = _parse_neighbor_csr(state_school_info["neighbour_ids"])
+    neighbor_offsets, neighbor_idxs = _normalize_neighbor_csr(neighbor_offsets, neighbor_idxs)
+
+    return dict({
+        "school_ids": school_ids.tolist(),
+        "total_students": total_students.astype(np.int64),
+        "total_funding": total_funding,
+        "neighbor_offsets": neighbor_offsets.astype(np.int64),
+        "neighbor_idxs": neighbor_idxs.astype(np.int32),
+        "district_ids": district_ids.tolist(),
+        "district_offsets": district_offsets.astype(np.int64),
+        "district_school_idxs": district_school_idxs.astype(np.int32)
+    })
+
+def _parse_neighbor_csr(neighbour_ids):
+    """
+    Parses comma-separated neighbors into compressed sparse row format, keeping
+    their order and ignoring any neighbor outside the provided schools.
+
+    Args:
+        neighbour_ids (pandas.Series): Comma-separated NCES IDs of each school's
+            neighbors (indexed by school ID).
+
+    Returns:
+        tuple: Pair containing (i) the row offsets, and (ii) the neighbors'
+            positions.
+    """
+    school_ids = neighbour_ids.index
+    neighbor_pairs = neighbour_ids.str.split(",").explode()
+    school_idxs = school_ids.get_indexer(neighbor_pairs.index)
+    neighbor_idxs = school_ids.get_indexer(neighbor_pairs.to_numpy())
+    is_valid = neighbor_idxs >= 0
+    neighbor_idxs = neighbor_idxs[is_valid]
+    neighbor_offsets = np.concatenate([[0], np.cumsum(np.bincount(school_idxs[is_valid], minlength=len(school_ids)))])
+    return neighbor_offsets, neighbor_idxs
+
+def _normalize_neighbor_csr(neighbor_offsets, neighbor_idxs):
+    """
+    Sorts every row of an adjacency in compressed sparse row format, dropping
+    all duplicate (or self-referencing) neighbors.
+
+    Args:
+        neighbor_offsets (numpy.ndarray): Row offsets.
+        neighbor_idxs (numpy.ndarray): Neighbors' positions (row by row).
+
+    Returns:
+        tuple: Pair containing (i) the normalized row offsets, and (ii) the
+            normalized neighbors' positions.
+    """
+    neighbor_offsets = np.asarray(neighbor_offsets, dtype=np.int64)
+    neighbor_idxs = np.asarray(neighbor_idxs)
+    rows = np.repeat(np.arange(len(neighbor_offsets) - 1), np.diff(neighbor_offsets))
+    # Sort neighbors within each row and flag duplicated (or self) entries
+    order = np.lexsort((neighbor_idxs, rows))
+    rows, neighbor_idxs = rows[order], neighbor_idxs[order]
+    is_valid = rows != neighbor_idxs
+    is_valid[1:] &= (rows[1:] != rows[:-1]) | (neighbor_idxs[1:] != neighbor_idxs[:-1])
+    if is_valid.all():
+        return neighbor_offsets, neighbor_idxs
+    rows, neighbor_idxs = rows[is_valid], neighbor_idxs[is_valid]
+    neighbor_offsets = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(neighbor_offsets) - 1))])
+    return neighbor_offsets, neighbor_idxs
+
 if __name__ == "__main__":
     
     ###################
@@ -252,7 +367,8 @@ if __name__ == "__main__":
         "neighbour_ids": ["010000500890", "010000500889,010000500891", "010000500890"],
         "school_name": ["School A", "School B", "School C"],
         "total_students": [100, 200, 150],
-        "adjusted_local_revenue_per_student": [20.0, 30.0, 40.0]
+        "adjusted_local_revenue_per_student": [20.0, 30.0, 40.0],
+        "adjusted_total_revenue_per_student": [20.0, 30.0, 40.0]
     }).set_index("school_id")
     
     dummy_school_assignment = pd.DataFrame({
@@ -334,7 +450,7 @@ if __name__ == "__main__":
     
     # Test 'get_school_total_funding'
     actual_result = get_school_total_funding("010000500889", dummy_aug_school_info)
-    target_result = 20.0
+    target_result = 2000.0
     equal_floats(actual_result, target_result)
     print("\t'get_school_total_funding': OK")
     
@@ -367,6 +483,19 @@ if __name__ == "__main__":
     target_result = [("010000500890", "0100005", "0100006"), ("010000500891", "0100006", "0100005")]
     equal_lists(actual_result, target_result, equal_tuples)
     print("\t'get_possible_school_transitions': OK")
-    
+
+    # Test 'get_state_graph_arrays'
+    dummy_school_assignment["state_name"] = ["State A", "State A", "State A"]
+    actual_result = get_state_graph_arrays("State A", dummy_aug_school_info, dummy_school_assignment)
+    equal_lists(actual_result["school_ids"], ["010000500889", "010000500890", "010000500891"])
+    equal_lists(actual_result["total_students"].tolist(), [100, 200, 150])
+    equal_lists(actual_result["total_funding"].tolist(), [2000.0, 6000.0, 6000.0], equal_floats)
+    equal_lists(actual_result["neighbor_offsets"].tolist(), [0, 1, 3, 4])
+    equal_lists(actual_result["neighbor_idxs"].tolist(), [1, 0, 2, 1])
+    equal_lists(actual_result["district_ids"], ["0100005", "0100006"])
+    equal_lists(actual_result["district_offsets"].tolist(), [0, 2, 3])
+    equal_lists(actual_result["district_school_idxs"].tolist(), [0, 1, 2])
+    print("\t'get_state_graph_arrays': OK")
+
     # Final success print
     print("All tests passed!")
\ No newline at end of file
@@ -2,34 +2,61 @@
 Provides definitions (and implementations) for both the Gini Index and the
 Spatial Inequality Index.
 """
-from itertools import combinations
+import numpy as np
 
-def gini_index(benefit_vector):
+def gini_index(benefit_vector, weights=None):
     """
     Calculate the gini index for a benefit distribution with N elements,
-    according to the (latex) definition:
+    according to the (latex) definition (i.e., every pair is counted once):
     
     \\[
     \\frac{
-        \\sum_{j=1}^{N} \\sum_{i=1}^{N} \\left| y_i - y_j \\right|
+        \\sum_{j=1}^{N} \\sum_{i=1}^{j-1} \\left| y_i - y_j \\right|
     }{
         2 N \\sum_{i=1}^{N} y_i
     }
     \\]
 
+    If weights are provided, each element stands for w_i members of the
+    population (e.g., a school's students), all sharing the same benefit. Pairs
+    are then weighted by w_i w_j, N is replaced by the sum of all weights and
+    the overall benefit by the weighted sum of all benefits.
+
+    Rather than iterating over all pairs, benefits are sorted once, so that
+    (for the j-th smallest benefit) every difference is given by cumulative
+    sums over all smaller benefits. This takes O(N log N) time.
+
     Args:
-        benefit_vector (list): List of float values, containing a benefit (or
-            wealth) for multiple parties in a population.
+        benefit_vector (list or numpy.ndarray): Float values, containing a
+            benefit (or wealth) for multiple parties in a population.
+        weights (list or numpy.ndarray): Non-negative weight (e.g., number of
+            students) of each party, or None for unweighted parties.
         
     Returns:
         float: Gini index associated with a given benefit vector.
+
+    Example:
+        >>> gini_index([1.0, 2.0, 3.0])
+        0.1111111111111111
+        >>> gini_index([1.0, 3.0], weights=[1, 2])
+        0.09523809523809523
     """
-    assert(isinstance(benefit_vector, list))
-    N = len(benefit_vector)
-    abs_diff = lambda pair: abs(benefit_vector[pair[0]] - benefit_vector[pair[1]])
-    numerator = sum(map(abs_diff, combinations(range(N), r=2)))
-    denominator = 2 * N * sum(benefit_vector)
-    return numerator / denominator
+    benefit_vector = np.asarray(benefit_vector, dtype=np.float64)
+    if weights is None:
+        weights = np.ones(len(benefit_vector), dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    assert(benefit_vector.ndim == 1 and benefit_vector.shape == weights.shape)
+    # Sort by benefit
+    order = np.argsort(benefit_vector, kind="stable")
+    benefit_vector = benefit_vector[order]
+    weights = weights[order]
+    weighted_benefits = weights * benefit_vector
+    # Cumulative weights (and weighted benefits) of all smaller benefits
+    smaller_weights = np.cumsum(weights) - weights
+    smaller_weighted_benefits = np.cumsum(weighted_benefits) - weighted_benefits
+    numerator = np.sum(weighted_benefits * smaller_weights - weights * smaller_weighted_benefits)
+    denominator = 2 * np.sum(weights) * np.sum(weighted_benefits)
+    return float(numerator / denominator)
     
 def spatial_index(benefit_vector, get_neighbours):
     """
@@ -69,4 +96,69 @@ def spatial_index(benefit_vector, get_neighbours):
         individual_ineq = sum([abs_diff((i, j)) for j in neighbours]) / Ni
         individual_ineqs.append(individual_ineq)
     overall_ineq = sum(individual_ineqs) / sum(benefit_vector)
-    return overall_ineq, individual_ineqs
\ No newline at end of file
+    return overall_ineq, individual_ineqs
+
+def spatial_index_csr(benefits, offsets, indices, batch_size=None):
+    """
+    Array-native counterpart of `spatial_index`, where neighbours are given in
+    compressed sparse row (CSR) format (i.e., the neighbours of the i-th
+    element are `indices[offsets[i]:offsets[i+1]]`, as returned by
+    `auxiliary.school_adjacency.SchoolAdjacency.get_csr`). Benefits can either
+    be a single benefit vector or a matrix of K benefit vectors (one per row,
+    e.g. multiple funding scenarios over the same elements), all of which are
+    evaluated in a few numpy passes over all edges.
+
+    Each element's absolute differences to its neighbours are summed through
+    a single reduction over all edges (row by row), so elements without any
+    neighbours are not allowed (as in `spatial_index`). Benefit vectors are
+    processed `batch_size` at a time, so that at most `batch_size` times the
+    number of edges intermediate values are held in memory (by default, about
+    2M values, i.e. 16MB).
+
+    Args:
+        benefits (numpy.ndarray): Float values of shape (N,) or (K, N),
+            containing a benefit (or wealth) for multiple parties in a
+            population.
+        offsets (numpy.ndarray): Row offsets (of size N+1).
+        indices (numpy.ndarray): Indices of all elements' neighbours (row by
+            row, each from 0 to N-1).
+        batch_size (int): Maximum number of benefit vectors evaluated at once,
+            or None to pick it based on the number of edges.
+
+    Returns:
+        tuple: Pair containing (i) the spatial inequality of each benefit
+            vector (`float`, or `numpy.ndarray` of shape (K,)), and (ii) each
+            element's individual inequality (`numpy.ndarray` of shape (N,) or
+            (K, N)).
+
+    Example:
+        >>> spatial_index_csr(
+        ...     np.array([1.0, 2.0, 4.0]),
+        ...     offsets=np.array([0, 1, 3, 4]),
+        ...     indices=np.array([1, 0, 2, 1]))
+        (0.6428571428571429, array([1. , 1.5, 2. ]))
+    """
+    benefits = np.asarray(benefits, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    indices = np.asarray(indices, dtype=np.int64)
+    is_single = benefits.ndim == 1
+    benefits = np.atleast_2d(benefits)
+    N = benefits.shape[1]
+    degrees = np.diff(offsets)
+    assert(benefits.ndim == 2 and len(offsets) == N + 1 and np.all(degrees > 0))
+    if batch_size is None:
+        batch_size = max(1, (1 << 21) // max(1, len(indices)))
+    # Source element of each edge
+    row_idxs = np.repeat(np.arange(N), degrees)
+    individual_ineqs = np.empty_like(benefits)
+    for start in range(0, len(benefits), batch_size):
+        batch = benefits[start:start+batch_size]
+        abs_diffs = np.take(batch, row_idxs, axis=1)
+        np.subtract(abs_diffs, np.take(batch, indices, axis=1), out=abs_diffs)
+        np.abs(abs_diffs, out=abs_diffs)
+        row_sums = np.add.reduceat(abs_diffs, offsets[:-1], axis=1)
+        individual_ineqs[start:start+batch_size] = row_sums / degrees
+    overall_ineqs = individual_ineqs.sum(axis=1) / benefits.sum(axis=1)
+    if is_single:
+        return float(overall_ineqs[0]), individual_ineqs[0]
+    return overall_ineqs, individual_ineqs
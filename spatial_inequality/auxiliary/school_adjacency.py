@@ -0,0 +1,195 @@
+"""
+Compressed representation of the neighborhood graph between schools, parsed
+once from the comma-separated `neighbour_ids` strings of our raw data.
+"""
+import numpy as np
+import pandas as pd
+
+class SchoolAdjacency:
+    """
+    This class holds all neighboring edges between schools in compressed sparse
+    row (CSR) format. Every school is interned by its position in the list of
+    school IDs, and the neighbors of the i-th school are given by
+    `indices[offsets[i]:offsets[i+1]]` (both int32 arrays). Edges keep the order
+    in which they were first parsed, and duplicated edges are discarded.
+
+    Instances are treated as immutable: all filtering operations return a new
+    `SchoolAdjacency`.
+
+    Attributes:
+        __school_ids (pandas.Index): Standardized NCES IDs of all schools (by
+            position).
+        __offsets (numpy.ndarray): Row offsets (of size N+1).
+        __indices (numpy.ndarray): Positions of all schools' neighbors (row by
+            row).
+
+    Example:
+        >>> neighbour_ids = pd.Series(
+        ...     ["010000500890", "010000500889,010000500891", ""],
+        ...     index=["010000500889", "010000500890", "010000500891"])
+        >>> adjacency = SchoolAdjacency.from_neighbour_ids(neighbour_ids)
+        >>> print(adjacency.get_neighbor_ids("010000500890"))
+        ['010000500889', '010000500891']
+        >>> print(adjacency.get_csr())
+        (array([0, 1, 3, 3], dtype=int32), array([1, 0, 2], dtype=int32))
+    """
+    __school_ids = None
+    __offsets = None
+    __indices = None
+
+    def __init__(self, school_ids, offsets, indices):
+        self.__school_ids = pd.Index(school_ids)
+        self.__offsets = np.asarray(offsets, dtype=np.int32)
+        self.__indices = np.asarray(indices, dtype=np.int32)
+
+    @classmethod
+    def from_edges(cls, school_ids, school_idxs, neighbor_idxs):
+        """
+        Creates a new instance from a list of (directed) edges. Edges are
+        grouped by their source school, while keeping their relative order.
+
+        Args:
+            school_ids (list of str): Standardized NCES IDs of all schools.
+            school_idxs (numpy.ndarray): Position of each edge's source school.
+            neighbor_idxs (numpy.ndarray): Position of each edge's destination
+                school.
+
+        Returns:
+            auxiliary.school_adjacency.SchoolAdjacency: New instance.
+        """
+        school_idxs = np.asarray(school_idxs, dtype=np.int64)
+        neighbor_idxs = np.asarray(neighbor_idxs, dtype=np.int64)
+        order = np.argsort(school_idxs, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(school_idxs, minlength=len(school_ids)))])
+        return cls(school_ids, offsets, neighbor_idxs[order])
+
+    @classmethod
+    def from_neighbour_ids(cls, neighbour_ids):
+        """
+        Parses the comma-separated neighbors of all schools (as read by
+        `auxiliary.data_handler.DataHandler`) in a single pass. Neighbors that
+        are not part of the provided schools are discarded.
+
+        Args:
+            neighbour_ids (pandas.Series): Comma-separated NCES IDs of each
+                school's neighbors (indexed by school ID).
+
+        Returns:
+            auxiliary.school_adjacency.SchoolAdjacency: New instance.
+        """
+        school_ids = neighbour_ids.index
+        # One row per (school, neighbor) pair
+        neighbor_pairs = neighbour_ids.str.split(",").explode()
+        school_idxs = school_ids.get_indexer(neighbor_pairs.index)
+        neighbor_idxs = school_ids.get_indexer(neighbor_pairs.to_numpy())
+        # Discard unknown neighbors (and empty strings)
+        is_valid = neighbor_idxs >= 0
+        school_idxs = school_idxs[is_valid]
+        neighbor_idxs = neighbor_idxs[is_valid]
+        # Discard duplicated edges (keeping the first occurrence)
+        _, first_idxs = np.unique(school_idxs * len(school_ids) + neighbor_idxs, return_index=True)
+        first_idxs = np.sort(first_idxs)
+        return cls.from_edges(school_ids, school_idxs[first_idxs], neighbor_idxs[first_idxs])
+
+    def get_school_ids(self):
+        """
+        Getter method for all schools' standardized NCES IDs.
+
+        Returns:
+            pandas.Index: Standardized NCES IDs (by position).
+        """
+        return self.__school_ids
+
+    def get_csr(self):
+        """
+        Getter method for the underlying CSR arrays.
+
+        Returns:
+            tuple: Pair containing (i) the row offsets, and (ii) the neighbors'
+                positions.
+        """
+        return self.__offsets, self.__indices
+
+    def get_edges(self):
+        """
+        Gets all (directed) edges, one per school/neighbor pair.
+
+        Returns:
+            tuple: Pair containing (i) the position of each edge's source
+                school, and (ii) the position of each edge's destination school.
+        """
+        school_idxs = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.__offsets))
+        return school_idxs, self.__indices
+
+    def get_neighbor_ids(self, school_id):
+        """
+        Gets the NCES IDs of all neighbors of a school.
+
+        Args:
+            school_id (str): NCES ID of target school (e.g. '010000500889').
+
+        Returns:
+            list of str: Neighbors' NCES IDs (returns an empty list in case
+                there are none, or the school is unknown).
+        """
+        school_idx = self.__school_ids.get_indexer([school_id])[0]
+        if school_idx < 0:
+            return list([])
+        start, end = self.__offsets[school_idx], self.__offsets[school_idx+1]
+        return list(self.__school_ids[self.__indices[start:end]].tolist())
+
+    def filter_edges(self, is_valid):
+        """
+        Keeps only a subset of all edges.
+
+        Args:
+            is_valid (numpy.ndarray): Boolean mask over all edges (in the same
+                order as returned by `get_edges`).
+
+        Returns:
+            auxiliary.school_adjacency.SchoolAdjacency: New instance.
+        """
+        school_idxs, neighbor_idxs = self.get_edges()
+        return SchoolAdjacency.from_edges(self.__school_ids, school_idxs[is_valid], neighbor_idxs[is_valid])
+
+    def subset(self, school_ids):
+        """
+        Restricts the graph to a subset of schools, re-interning them by their
+        position in the provided list. Edges to or from any other school are
+        discarded.
+
+        Args:
+            school_ids (list of str): Standardized NCES IDs of all schools to
+                keep.
+
+        Returns:
+            auxiliary.school_adjacency.SchoolAdjacency: New instance.
+        """
+        school_ids = pd.Index(school_ids)
+        # Map each old position to its new one (or -1)
+        old_idxs = self.__school_ids.get_indexer(school_ids)
+        new_idx_by_old_idx = np.full(len(self), -1, dtype=np.int64)
+        new_idx_by_old_idx[old_idxs[old_idxs >= 0]] = np.flatnonzero(old_idxs >= 0)
+        school_idxs, neighbor_idxs = self.get_edges()
+        school_idxs = new_idx_by_old_idx[school_idxs]
+        neighbor_idxs = new_idx_by_old_idx[neighbor_idxs]
+        is_valid = (school_idxs >= 0) & (neighbor_idxs >= 0)
+        return SchoolAdjacency.from_edges(school_ids, school_idxs[is_valid], neighbor_idxs[is_valid])
+
+    def to_neighbour_ids(self):
+        """
+        Formats all neighbors back into comma-separated strings (as read by
+        `auxiliary.data_handler.DataHandler`).
+
+        Returns:
+            pandas.Series: Comma-separated NCES IDs of each school's neighbors
+                (indexed by school ID).
+        """
+        neighbor_ids = self.__school_ids[self.__indices].tolist()
+        offsets = self.__offsets.tolist()
+        return pd.Series([
+            ",".join(neighbor_ids[offsets[i]:offsets[i+1]]) for i in range(len(self))
+        ], index=self.__school_ids)
+
+    def __len__(self):
+        return len(self.__school_ids)
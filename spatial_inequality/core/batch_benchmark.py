@@ -0,0 +1,99 @@
+"""
+Benchmark (and parity check) of the batched scoring of candidate moves (see
+`core.greedy_algorithm.greedy_algo`'s `batch_threshold` argument) against
+scoring them one by one (i.e., the default).
+
+Running this script directly runs all provided states (defaults to all states)
+over a few seeds, with both engines and each batch threshold, checks that every
+run's moves are exactly those of the corresponding unbatched run, and prints,
+for each state, engine and batch threshold, the mean elapsed time per run.
+"""
+import sys
+import numpy as np
+
+from time import perf_counter
+
+from auxiliary.data_handler import load_data
+from core.greedy_algorithm import build_state_graph, run_greedy_algo
+
+def benchmark_batches(target_states, seeds, greedy_params, early_stopper_params, aug_school_info, school_assignment, batch_thresholds=(0, 128)):
+    """
+    Runs our algorithm with and without batched scoring of candidate moves over
+    multiple states, seeds and engines, checking that batches never change a
+    run.
+
+    Args:
+        target_states (list of str): Capitalized full state names (e.g.,
+            ['Alabama', 'Alaska']).
+        seeds (list of int): Seeds of all runs (per state, engine and batch
+            threshold).
+        greedy_params (kwargs): Keyword arguments for the greedy partitioning
+            algorithm's parameterization (see
+            `core.greedy_algorithm.get_expectable_run_for_state`), other than
+            `array_engine` and `batch_threshold`.
+        early_stopper_params (kwargs): Keyword arguments for the early
+            stopper's parameterization.
+        aug_school_info (pandas.DataFrame): Target augmented school information
+            (as formatted by `auxiliary.data_handler.DataHandler`).
+        school_assignment (pandas.DataFrame): Target school assignment (as
+            formatted by `auxiliary.data_handler.DataHandler`).
+        batch_thresholds (list of int): Batch thresholds to compare against
+            unbatched runs (0 scores every district's candidate moves in
+            batches).
+
+    Returns:
+        dict of str: dict: Mapping between each state and a mapping between
+            each (engine, batch threshold) pair and the mean elapsed time per
+            run (in seconds), where engines are either 'object' or 'array'
+            and unbatched runs have a batch threshold of None.
+
+    Raises:
+        AssertionError: Whenever a batched run's moves (or spatial inequality
+            trajectory) differ from those of the corresponding unbatched run.
+    """
+    results = {}
+    for target_state in target_states:
+        state_graph = build_state_graph(target_state, aug_school_info, school_assignment)
+        results[target_state] = {}
+        for engine, array_engine in [("object", False), ("array", True)]:
+            reference_runs = {}
+            for batch_threshold in [None, *batch_thresholds]:
+                elapsed = []
+                for seed in seeds:
+                    start = perf_counter()
+                    _, metrics = run_greedy_algo(
+                        target_state,
+                        aug_school_info,
+                        school_assignment,
+                        {**greedy_params, "array_engine": array_engine, "batch_threshold": batch_threshold},
+                        early_stopper_params,
+                        state_graph=state_graph,
+                        seed=seed
+                    )
+                    elapsed.append(perf_counter() - start)
+                    # Compare run against its unbatched counterpart
+                    run = metrics.as_dict()
+                    run = (run["move_history"], run["spatial_inequality"])
+                    if batch_threshold is None:
+                        reference_runs[seed] = run
+                    else:
+                        assert run == reference_runs[seed], f"Batched run differs ({target_state}, {engine} engine, seed {seed}, batch threshold {batch_threshold})"
+                results[target_state][(engine, batch_threshold)] = np.mean(elapsed).item()
+    return results
+
+if __name__ == "__main__":
+    aug_school_info, school_assignment = load_data()
+    target_states = sys.argv[1:] if len(sys.argv) > 1 else sorted(school_assignment["state_name"].unique().tolist())
+    results = benchmark_batches(
+        target_states,
+        seeds=[0, 1, 2],
+        greedy_params={"min_schools_per_district": 1, "max_schools_per_district": 500},
+        early_stopper_params={"early_stopper_it": 1000, "early_stopper_tol": 0.1},
+        aug_school_info=aug_school_info,
+        school_assignment=school_assignment
+    )
+    print(f"{'State':<22}{'Engine':<8}{'Threshold':>11}{'Time (s)':>10}")
+    for target_state, results_by_setting in results.items():
+        for (engine, batch_threshold), elapsed in results_by_setting.items():
+            print(f"{target_state:<22}{engine:<8}{str(batch_threshold):>11}{elapsed:>10.3f}")
+    print("Batched runs match unbatched runs.")
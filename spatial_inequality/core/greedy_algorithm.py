@@ -3,6 +3,9 @@ Greedy implementation of our school redistricting algorithm (i.e.,
 `Greedy Partitioning`).
 """
 import os
+import math
+import random
+import hashlib
 import logging
 import numpy as np
 
@@ -14,29 +17,216 @@ from auxiliary.functions import *
 from optimization.early_stopper import EarlyStopper
 from optimization.entity_nodes import District, School
 from optimization.holdout import HoldoutQueue
-from optimization.lazy_heap import LazyHeap
+from optimization.inequality_delta import InequalityDelta
+from optimization.inequality_tracker import InequalityTracker
+from optimization.lazy_heap import IndexedHeap, LazyHeap
 from optimization.lookup import Lookup
 from optimization.run_metrics import RunMetrics
+from optimization.sequential_stopper import SequentialStopper
+from optimization.state_graph import StateGraph
 
 # Initialize logger
 if not os.path.exists('../logs'):
     os.makedirs('../logs')
 logging.basicConfig(filename='../logs/debug.log', level=logging.INFO)
 
-def greedily_pick_redistricting_moves(district, lookup, min_schools_per_district, max_schools_per_district):
+def is_funding_gap_reduced(from_students, from_funding, to_students, to_funding, school_students, school_funding):
+    """
+    Checks whether redistricting a school from one district to another would
+    bring both districts' per-student funding closer.
+
+    Args:
+        from_students (int): Source district's total number of students.
+        from_funding (float): Source district's total funding.
+        to_students (int): Destination district's total number of students.
+        to_funding (float): Destination district's total funding.
+        school_students (int): School's total number of students.
+        school_funding (float): School's total funding.
+
+    Returns:
+        bool: 'true' if the absolute difference between both districts'
+            per-student funding is smaller after the move, 'false' otherwise.
+    """
+    abs_funding_diff_before = abs(from_funding / from_students - to_funding / to_students)
+    abs_funding_diff_after = abs(
+        (from_funding - school_funding) / (from_students - school_students)
+        - (to_funding + school_funding) / (to_students + school_students)
+    )
+    return abs_funding_diff_after < abs_funding_diff_before
+
+def estimate_funding_gap_reduction(from_students, from_funding, to_students, to_funding, school_students, school_funding):
+    """
+    Estimates by how much redistricting a school from one district to another
+    would reduce the absolute difference between both districts' per-student
+    funding (see `is_funding_gap_reduced`). All arguments can also be
+    (aligned) numpy arrays, in which case all reductions are estimated at once.
+
+    Args:
+        from_students (int): Source district's total number of students.
+        from_funding (float): Source district's total funding.
+        to_students (int): Destination district's total number of students.
+        to_funding (float): Destination district's total funding.
+        school_students (int): School's total number of students.
+        school_funding (float): School's total funding.
+
+    Returns:
+        float: Reduction of the absolute difference between both districts'
+            per-student funding (negative if it would increase instead).
+    """
+    abs_funding_diff_before = abs(from_funding / from_students - to_funding / to_students)
+    abs_funding_diff_after = abs(
+        (from_funding - school_funding) / (from_students - school_students)
+        - (to_funding + school_funding) / (to_students + school_students)
+    )
+    return abs_funding_diff_before - abs_funding_diff_after
+
+def order_candidate_moves_by_gain(school_ids, gains):
+    """
+    Orders candidate moves by decreasing (estimated) gain, while keeping all
+    candidate moves of the same school together. Schools are ordered by their
+    best candidate move's gain, and each school's candidate moves by their own
+    gain. Ties preserve the original order.
+
+    Args:
+        school_ids (numpy.ndarray): Interned ID of each candidate move's
+            school, where all candidate moves of the same school are
+            contiguous.
+        gains (numpy.ndarray): Estimated gain of each candidate move (see
+            `estimate_funding_gap_reduction`), where non-finite values are
+            treated as the lowest possible gain.
+
+    Returns:
+        numpy.ndarray: Indices that order all candidate moves.
+    """
+    gains = np.where(np.isfinite(gains), gains, -np.inf)
+    is_first = np.concatenate(([True], school_ids[1:] != school_ids[:-1]))
+    school_idxs = np.cumsum(is_first) - 1
+    best_gains = np.maximum.reduceat(gains, np.flatnonzero(is_first))[school_idxs]
+    return np.lexsort((-gains, school_idxs, -best_gains))
+
+def batch_pick_redistricting_moves(district_id, candidate_moves, acc_local_values, min_schools_per_district, max_schools_per_district, batch_size=64):
+    """
+    Batched counterpart of the (sequential) acceptance of candidate moves in
+    `greedily_pick_redistricting_moves`, which yields the exact same moves.
+
+    Accepting a move changes the accumulators of both districts involved, so
+    candidate moves cannot be scored all at once. However, all candidate moves
+    between two consecutive accepted moves are scored against the same
+    accumulators. As such, the next batch of candidate moves is scored at once
+    (i.e., their funding gaps before and after each move are computed in a
+    single vectorized pass) against the current accumulators, and the first
+    good one is exactly the next move to be accepted. Scoring then resumes
+    with the next school, against updated accumulators. Once the selected
+    district can no longer give up schools, all remaining candidate moves are
+    rejected at once.
+
+    NOTE: Each batch costs about as much as scoring a few dozen candidate moves
+    one by one, so this only pays off whenever far fewer moves are accepted
+    than there are candidate moves.
+
+    Args:
+        district_id (int): Interned ID of the district to redistrict schools
+            from.
+        candidate_moves (tuple of numpy.ndarray): Candidate moves, by order of
+            evaluation, as four aligned arrays of each move's school interned
+            ID, destination district interned ID, school's total number of
+            students and school's total funding. All candidate moves of the
+            same school must be contiguous.
+        acc_local_values (tuple of numpy.ndarray): Initial accumulators of the
+            selected district and all of its neighbors, as four aligned arrays
+            of each district's interned ID, number of schools, total number of
+            students and total funding.
+        min_schools_per_district (int): Minimum number of schools to preserve in
+            each district, upon redistricting. A number equal to (or lesser
+            than) zero will allow districts to merge.
+        max_schools_per_district (int): Maximum number of schools to be
+            preserved in each district, upon redistricting.
+        batch_size (int): Number of candidate moves scored at once.
+
+    Returns:
+        list of tuple: List of all greedy redistricting moves (see
+            `greedily_pick_redistricting_moves`).
+    """
+    school_ids, to_district_ids, school_students, school_funding = map(np.asarray, candidate_moves)
+    acc_district_ids, acc_n_schools, acc_students, acc_funding = (np.array(values) for values in acc_local_values)
+    # Index accumulators (by each candidate move's destination) locally
+    order = np.argsort(acc_district_ids)
+    to_idxs = order[np.searchsorted(acc_district_ids[order], to_district_ids)]
+    from_idx = order[np.searchsorted(acc_district_ids[order], district_id)]
+    from_n_schools, from_students, from_funding = acc_n_schools[from_idx].item(), acc_students[from_idx].item(), acc_funding[from_idx].item()
+    # Find where each school's candidate moves end
+    is_first = np.concatenate(([True], school_ids[1:] != school_ids[:-1]))
+    school_ends = np.append(np.flatnonzero(is_first[1:]) + 1, len(school_ids))[np.cumsum(is_first) - 1]
+    # Score candidate moves batch by batch
+    greedy_moves = []
+    start = 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        while start < len(school_ids) and from_n_schools > min_schools_per_district:
+            end = min(start + batch_size, len(school_ids))
+            batch_to_idxs = to_idxs[start:end]
+            # Check if number of schools is allowed
+            is_good = acc_n_schools[batch_to_idxs] < max_schools_per_district
+            # Compare funding gaps before/after move (unless no schools would remain)
+            if from_n_schools != 1:
+                to_students, to_funding = acc_students[batch_to_idxs], acc_funding[batch_to_idxs]
+                students, funding = school_students[start:end], school_funding[start:end]
+                abs_funding_diff_before = np.abs(from_funding / from_students - to_funding / to_students)
+                abs_funding_diff_after = np.abs(
+                    (from_funding - funding) / (from_students - students)
+                    - (to_funding + funding) / (to_students + students)
+                )
+                is_good &= abs_funding_diff_after < abs_funding_diff_before
+            i = is_good.argmax()
+            if not is_good[i]:
+                start = end
+                continue
+            # Register first good move in local accumulators
+            i += start
+            to_idx = to_idxs[i]
+            students, funding = school_students[i].item(), school_funding[i].item()
+            from_funding -= funding
+            from_students -= students
+            from_n_schools -= 1
+            acc_funding[to_idx] += funding
+            acc_students[to_idx] += students
+            acc_n_schools[to_idx] += 1
+            greedy_moves.append((school_ids[i].item(), district_id, acc_district_ids[to_idx].item()))
+            # Prevent school multiple assignment
+            start = school_ends[i]
+    return greedy_moves
+
+def greedily_pick_redistricting_moves(district, lookup, min_schools_per_district, max_schools_per_district, get_rank=None, get_neighbors=None, batch_threshold=None, gain_ordered=False, inequality_delta=None):
     """
     Greedily calculates all schools that should be redistricted from a selected
     district to one of its neighbors, such that the whole neighborhood's
     inequality is reduced.
 
-    To do this, this function arbitrarily iterates over all schools at the
-    selected district's border (with its neighboring districts) and evaluates
-    whether a given move would be a good (local) move or not. It does this by:
-    (i) 'virtually' redistricting the school to another potential district; and
-    (ii) comparing both districts' per-student funding after this move was made.
-    If funding is closer between the districts, the move is registered and the
-    overall iteration process proceeds. Otherwise, the move is reverted before
-    proceeding.
+    To do this, this function iterates over all schools at the selected
+    district's border (with its neighboring districts), by increasing rank (or
+    in arbitrary order, if no ranks are provided), and evaluates whether a
+    given move would be a good (local) move or not. It does this by comparing
+    both districts' per-student funding before and after the school would be
+    redistricted (see `is_funding_gap_reduced`). If funding would be closer
+    between the districts, the move is registered (i.e., the school is
+    'virtually' redistricted) and the overall iteration process proceeds.
+    Otherwise, the next neighboring district (if any) is evaluated. For
+    districts with many bordering schools, candidate moves can also be scored
+    in batches instead (see `batch_pick_redistricting_moves`).
+
+    Accepting a low-gain move early on may prevent better moves from being
+    accepted later (e.g., by closing the funding gap with another neighbor).
+    If `gain_ordered` is set, schools are instead visited by decreasing
+    (estimated) gain of their best candidate move, and each school's
+    neighboring districts by decreasing gain (see
+    `order_candidate_moves_by_gain`), where gains are estimated before any
+    move is registered (see `estimate_funding_gap_reduction`).
+
+    Comparing funding gaps is only a proxy for the spatial inequality of the
+    selected district's neighborhood. If an `inequality_delta` is provided,
+    a move is instead accepted whenever it would reduce the Spatial Inequality
+    Index itself (on top of all previously registered moves, see
+    `optimization.inequality_delta.InequalityDelta`). In that case, candidate
+    moves are never scored in batches.
 
     Args:
         district (optimization.entity_nodes.District): Target District to redistrict
@@ -48,15 +238,29 @@ def greedily_pick_redistricting_moves(district, lookup, min_schools_per_district
             zero will allow districts to merge.
         max_schools_per_district (int): Maximum number of schools to be preserved in
             each district, upon redistricting.
+        get_rank (function): Function to get a School's rank (i.e., the order
+            in which bordering schools are visited), or None.
+        get_neighbors (function): Function to get a School's neighboring
+            Schools (in the order they should be visited), or None to use
+            `optimization.entity_nodes.School.get_neighbors`.
+        batch_threshold (int): Number of bordering schools above which
+            candidate moves are scored in batches, or None to always score
+            them one by one.
+        gain_ordered (bool): Whether to visit candidate moves by decreasing
+            (estimated) gain, instead of by rank.
+        inequality_delta (optimization.inequality_delta.InequalityDelta):
+            InequalityDelta instance (over the current state) to accept moves
+            by their exact change of the Spatial Inequality Index, or None to
+            compare funding gaps.
 
     Returns:
         list of tuple: List of all greedy School redistricting moves that would
             reduce the selected District neighborhood's inequality (i.e., tuples
-            comprised of a redistricted school's standardized NCES ID, its source
-            district's standardized NCES ID and its destination district's
-            standardized NCES ID).
+            comprised of a redistricted school's interned ID, its source
+            district's interned ID and its destination district's interned
+            ID).
     """
-    # Auxiliary functions to make/revert virtual moves
+    # Auxiliary function to make virtual moves
     def make_move(school, from_district, to_district):
         from_district["total_funding"] -= school.get_total_funding()
         from_district["total_students"] -= school.get_total_students()
@@ -64,26 +268,38 @@ def greedily_pick_redistricting_moves(district, lookup, min_schools_per_district
         to_district["total_funding"] += school.get_total_funding()
         to_district["total_students"] += school.get_total_students()
         to_district["n_schools"] += 1
-    def revert_move(school, from_district, to_district):
-        make_move(school, to_district, from_district)
     # Auxiliary function to test if move is good
-    def is_good_greedy_move(school, from_district, to_district):
-        # Auxiliary functions
-        funding_per_student = lambda x: x["total_funding"] / x["total_students"]
-        funding_per_student_abs_diff = lambda x,y: abs(funding_per_student(x) - funding_per_student(y))
+    def is_good_greedy_move(school, from_district_id, to_district_id):
+        from_district = acc_local_values[from_district_id]
+        to_district = acc_local_values[to_district_id]
         # Check if number of schools is allowed
         if from_district["n_schools"] <= min_schools_per_district or to_district["n_schools"] >= max_schools_per_district:
             return False
+        # Evaluate the index's exact change (if requested)
+        if inequality_delta is not None:
+            return inequality_delta.evaluate(
+                school.get_id(),
+                from_district_id,
+                to_district_id,
+                school.get_total_students(),
+                school.get_total_funding()
+            ) < 0
         # Handle case where no schools would remain in district
         if from_district["n_schools"] == 1:
             return True
-        # Calculate stats before/after move
-        abs_funding_diff_before = funding_per_student_abs_diff(from_district, to_district)
-        make_move(school, from_district, to_district)
-        abs_funding_diff_after = funding_per_student_abs_diff(from_district, to_district)
-        revert_move(school, from_district, to_district)
-        # Return result
-        return abs_funding_diff_after < abs_funding_diff_before
+        # Compare funding gaps before/after move
+        return is_funding_gap_reduced(
+            from_district["total_students"],
+            from_district["total_funding"],
+            to_district["total_students"],
+            to_district["total_funding"],
+            school.get_total_students(),
+            school.get_total_funding()
+        )
+    if get_neighbors is None:
+        get_neighbors = lambda x: x.get_neighbors()
+    if inequality_delta is not None:
+        inequality_delta.reset()
 
     # Create auxiliary data structures for (fast) move simulation
     neighboring_districts = lookup.get_neighboor_districts_by_district_id(district.get_id())
@@ -97,15 +313,63 @@ def greedily_pick_redistricting_moves(district, lookup, min_schools_per_district
     # Calculate greedy moves
     greedy_moves = []
     bordering_schools = lookup.get_bordering_schools_by_district_id(district.get_id())
+    if get_rank is not None:
+        bordering_schools = sorted(bordering_schools, key=get_rank)
+    if gain_ordered is True:
+        # Estimate the gain of moving each school to each of its neighbors' districts
+        from_values = acc_local_values[district.get_id()]
+        def get_gain(school, neighbor):
+            connected_district = lookup.get_district_by_school_id(neighbor.get_id())
+            if connected_district.get_id() == district.get_id():
+                return -math.inf
+            to_values = acc_local_values[connected_district.get_id()]
+            try:
+                return estimate_funding_gap_reduction(
+                    from_values["total_students"],
+                    from_values["total_funding"],
+                    to_values["total_students"],
+                    to_values["total_funding"],
+                    school.get_total_students(),
+                    school.get_total_funding()
+                )
+            except ZeroDivisionError:
+                return -math.inf
+        # Order schools (and each school's neighbors) by decreasing gain
+        ordered_neighbors_by_school = {
+            school: sorted(((get_gain(school, neighbor), neighbor) for neighbor in get_neighbors(school)), key=lambda x: -x[0])
+            for school in bordering_schools
+        }
+        bordering_schools = sorted(
+            bordering_schools,
+            key=lambda x: -max((gain for gain, _ in ordered_neighbors_by_school[x]), default=-math.inf)
+        )
+        get_neighbors = lambda x: [neighbor for _, neighbor in ordered_neighbors_by_school[x]]
+    if inequality_delta is None and batch_threshold is not None and len(bordering_schools) > batch_threshold:
+        # Gather all candidate moves (school by school) and score them in batches
+        candidate_moves = [
+            (school.get_id(), connected_district_id, school.get_total_students(), school.get_total_funding())
+            for school in bordering_schools
+            for connected_district_id in map(lambda x: lookup.get_district_by_school_id(x.get_id()).get_id(), get_neighbors(school))
+            if connected_district_id != district.get_id()
+        ]
+        if len(candidate_moves) == 0:
+            return []
+        return batch_pick_redistricting_moves(
+            district.get_id(),
+            tuple(zip(*candidate_moves)),
+            tuple(zip(*(
+                (district_id, values["n_schools"], values["total_students"], values["total_funding"])
+                for district_id, values in acc_local_values.items()
+            ))),
+            min_schools_per_district,
+            max_schools_per_district
+        )
     for school in bordering_schools:
-        for neighbor in school.get_neighbors():
+        for neighbor in get_neighbors(school):
             connected_district = lookup.get_district_by_school_id(neighbor.get_id())
             if connected_district.get_id() == district.get_id():
                 continue
-            elif not is_good_greedy_move(
-                    school,
-                    acc_local_values[district.get_id()],
-                    acc_local_values[connected_district.get_id()]):
+            elif not is_good_greedy_move(school, district.get_id(), connected_district.get_id()):
                 continue
             else:
                 # Register move in local accumulators
@@ -114,6 +378,8 @@ def greedily_pick_redistricting_moves(district, lookup, min_schools_per_district
                     acc_local_values[district.get_id()],
                     acc_local_values[connected_district.get_id()]
                 )
+                if inequality_delta is not None:
+                    inequality_delta.commit()
                 # Add new move to move list
                 greedy_moves.append((
                     school.get_id(),
@@ -124,11 +390,165 @@ def greedily_pick_redistricting_moves(district, lookup, min_schools_per_district
                 break
     return greedy_moves
 
+def pick_redistricting_moves_from_arrays(district_id, array_state, min_schools_per_district, max_schools_per_district, school_ranks=None, neighbor_idxs=None, batch_threshold=None, gain_ordered=False, inequality_delta=None):
+    """
+    Array-based counterpart of `greedily_pick_redistricting_moves`, which
+    returns the exact same moves for the same state, ranks and neighbor order.
+
+    All candidate moves (i.e., pairs of a bordering school and a neighboring
+    district one of its neighbors is assigned to) are first gathered at once,
+    school by school, from the school adjacency. Only the (inherently
+    sequential) acceptance of each candidate move is then performed one by one,
+    over plain numbers rather than dictionaries or School/District instances
+    (or in batches, see `batch_pick_redistricting_moves`).
+
+    Args:
+        district_id (int): Interned ID of the target district to redistrict
+            schools from.
+        array_state (optimization.array_state.ArrayState): ArrayState instance.
+        min_schools_per_district (int): Minimum number of schools to preserve in
+            each district, upon redistricting. A number equal to (or lesser
+            than) zero will allow districts to merge.
+        max_schools_per_district (int): Maximum number of schools to be
+            preserved in each district, upon redistricting.
+        school_ranks (numpy.ndarray): Each school's rank (i.e., the order in
+            which bordering schools are visited), or None.
+        neighbor_idxs (numpy.ndarray): All schools' neighbors, row by row (in
+            the order they should be visited), or None to use the
+            ArrayState's own adjacency.
+        batch_threshold (int): Number of bordering schools above which
+            candidate moves are scored in batches, or None to always score
+            them one by one.
+        gain_ordered (bool): Whether to visit candidate moves by decreasing
+            (estimated) gain, instead of by rank (see
+            `greedily_pick_redistricting_moves`).
+        inequality_delta (optimization.inequality_delta.InequalityDelta):
+            InequalityDelta instance to accept moves by their exact change of
+            the Spatial Inequality Index (see
+            `greedily_pick_redistricting_moves`), or None.
+
+    Returns:
+        list of tuple: List of all greedy redistricting moves (see
+            `greedily_pick_redistricting_moves`).
+    """
+    school_students, school_funding, neighbor_offsets, default_neighbor_idxs = array_state.get_school_arrays()
+    if neighbor_idxs is None:
+        neighbor_idxs = default_neighbor_idxs
+    assignment = array_state.get_assignment()
+    bordering_school_ids = array_state.get_bordering_school_ids_by_district_id(district_id)
+    if len(bordering_school_ids) == 0:
+        return []
+
+    if inequality_delta is not None:
+        inequality_delta.reset()
+
+    # Gather all candidate moves (school by school, by increasing rank)
+    is_batched = inequality_delta is None and batch_threshold is not None and len(bordering_school_ids) > batch_threshold
+    if len(bordering_school_ids) <= 32 and not is_batched and not gain_ordered:
+        # Few schools, sort and gather them one by one (avoiding numpy's overhead)
+        if school_ranks is not None:
+            bordering_school_ids = sorted(bordering_school_ids, key=school_ranks.__getitem__)
+        candidate_school_ids = []
+        candidate_district_ids = []
+        for school_id in bordering_school_ids:
+            neighbor_district_ids = assignment[neighbor_idxs[neighbor_offsets[school_id]:neighbor_offsets[school_id+1]]].tolist()
+            for neighbor_district_id in neighbor_district_ids:
+                if neighbor_district_id != district_id:
+                    candidate_school_ids.append(school_id)
+                    candidate_district_ids.append(neighbor_district_id)
+    else:
+        # Many schools, gather them all at once
+        school_ids = np.fromiter(bordering_school_ids, dtype=np.int64, count=len(bordering_school_ids))
+        if school_ranks is not None:
+            school_ids = school_ids[np.argsort(school_ranks[school_ids])]
+        starts = neighbor_offsets[school_ids]
+        lengths = neighbor_offsets[school_ids + 1] - starts
+        edge_idxs = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        candidate_school_ids = np.repeat(school_ids, lengths)
+        candidate_district_ids = assignment[neighbor_idxs[edge_idxs]]
+        is_candidate = candidate_district_ids != district_id
+        candidate_school_ids = candidate_school_ids[is_candidate]
+        candidate_district_ids = candidate_district_ids[is_candidate]
+        if gain_ordered is True and len(candidate_school_ids) > 0:
+            # Order candidate moves by decreasing (estimated) gain
+            _, district_students, district_funding = array_state.get_district_arrays()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                gains = estimate_funding_gap_reduction(
+                    district_students[district_id],
+                    district_funding[district_id],
+                    district_students[candidate_district_ids],
+                    district_funding[candidate_district_ids],
+                    school_students[candidate_school_ids],
+                    school_funding[candidate_school_ids]
+                )
+            order = order_candidate_moves_by_gain(candidate_school_ids, gains)
+            candidate_school_ids = candidate_school_ids[order]
+            candidate_district_ids = candidate_district_ids[order]
+        if is_batched is False:
+            candidate_school_ids = candidate_school_ids.tolist()
+            candidate_district_ids = candidate_district_ids.tolist()
+    if len(candidate_school_ids) == 0:
+        return []
+
+    # Create auxiliary accumulators (i.e., number of schools, students and funding)
+    acc_district_ids = [*array_state.get_neighboor_district_ids_by_district_id(district_id), district_id]
+    if is_batched is True:
+        # Score candidate moves in batches
+        return batch_pick_redistricting_moves(
+            district_id,
+            (
+                candidate_school_ids,
+                candidate_district_ids,
+                school_students[candidate_school_ids],
+                school_funding[candidate_school_ids]
+            ),
+            (acc_district_ids, *(array[acc_district_ids] for array in array_state.get_district_arrays())),
+            min_schools_per_district,
+            max_schools_per_district
+        )
+    acc_local_values = dict(zip(acc_district_ids, map(list, zip(*(
+        array[acc_district_ids].tolist() for array in array_state.get_district_arrays()
+    )))))
+    from_values = acc_local_values[district_id]
+    # Accept candidate moves (at most one per school)
+    greedy_moves = []
+    moved_school_id = None
+    for school_id, to_district_id, students, funding in zip(
+            candidate_school_ids,
+            candidate_district_ids,
+            school_students[candidate_school_ids].tolist(),
+            school_funding[candidate_school_ids].tolist()):
+        if school_id == moved_school_id:
+            continue
+        to_values = acc_local_values[to_district_id]
+        # Check if number of schools is allowed
+        if from_values[0] <= min_schools_per_district or to_values[0] >= max_schools_per_district:
+            continue
+        if inequality_delta is not None:
+            # Evaluate the index's exact change
+            if inequality_delta.evaluate(school_id, district_id, to_district_id, students, funding) >= 0:
+                continue
+            inequality_delta.commit()
+        # Compare funding gaps before/after move (unless no schools would remain)
+        elif from_values[0] != 1 and not is_funding_gap_reduced(from_values[1], from_values[2], to_values[1], to_values[2], students, funding):
+            continue
+        # Register move in local accumulators
+        from_values[2] -= funding
+        from_values[1] -= students
+        from_values[0] -= 1
+        to_values[2] += funding
+        to_values[1] += students
+        to_values[0] += 1
+        greedy_moves.append((school_id, district_id, to_district_id))
+        moved_school_id = school_id
+    return greedy_moves
+
 def apply_redistricting_moves(moves, lookup, heap):
     """
     Performs all registered greedy moves and updates both
-    optimization.lookup.Lookup and otimization.lazy_heap.LazyHeap instances
-    according to the new school/district assignments.
+    optimization.lookup.Lookup and otimization.lazy_heap.LazyHeap (or
+    otimization.lazy_heap.IndexedHeap) instances according to the new
+    school/district assignments.
 
     NOTE: Since some of the districts involved in the registered moves may have
     been moved to the holdout queue, updating the lazy heap may raise a KeyError
@@ -139,7 +559,8 @@ def apply_redistricting_moves(moves, lookup, heap):
         moves (list of tuple): Greedy moves to apply.
         lookup (optimization.lookup.Lookup): Lookup instance for fast
             information querying.
-        heap (otimization.lazy_heap.LazyHeap): LazyHeap of districts to update.
+        heap (otimization.lazy_heap.LazyHeap): LazyHeap (or IndexedHeap) of
+            districts to update.
     """
     for move in moves:
         # Get all necessary instances
@@ -147,7 +568,7 @@ def apply_redistricting_moves(moves, lookup, heap):
         from_district = lookup.get_district_by_id(move[1])
         to_district = lookup.get_district_by_id(move[2])
         # Update "from" and "to" districts (& update lookup)
-        logging.debug(f"Moving school '{school.get_id()}': '{from_district.get_id()}' > '{to_district.get_id()}'")
+        logging.debug(f"Moving school '{school.get_nces_id()}': '{from_district.get_nces_id()}' > '{to_district.get_nces_id()}'")
         from_district.remove_school(school)
         to_district.add_school(school)
         lookup.assign_school_to_district_by_id(school.get_id(), to_district.get_id())
@@ -160,6 +581,26 @@ def apply_redistricting_moves(moves, lookup, heap):
         attempt_heap_update(from_district)
         attempt_heap_update(to_district)
 
+def apply_redistricting_moves_to_arrays(moves, array_state, heap):
+    """
+    Array-based counterpart of `apply_redistricting_moves`, where the heap
+    holds (interned) district IDs.
+
+    Args:
+        moves (list of tuple): Greedy moves to apply.
+        array_state (optimization.array_state.ArrayState): ArrayState instance.
+        heap (otimization.lazy_heap.LazyHeap): LazyHeap (or IndexedHeap) of
+            (interned) district IDs to update.
+    """
+    for school_id, from_district_id, to_district_id in moves:
+        array_state.move_school(school_id, to_district_id)
+        # Try to update heap (elements may be in holdout queue)
+        for district_id in (from_district_id, to_district_id):
+            try:
+                heap.update(district_id)
+            except KeyError:
+                pass
+
 def calculate_inequality(districts, lookup):
     """
     Calculate spatial inequality based on a school/district assignment and
@@ -197,39 +638,266 @@ def calculate_inequality(districts, lookup):
         normalization_factor += get_per_student_funding(district)
     return overall_inequality / normalization_factor
 
-def refill_heap(heap, holdout_queue):
+def refill_heap(heap, holdout_queue, verbose=True):
     """
     Refills `optimization.lazy_heap.LazyHeap` with any Districts successfully
-    dequeued from `optimization.holdout.HoldoutQueue`.
+    dequeued from `optimization.holdout.HoldoutQueue` (i.e., whose neighborhood
+    changed since they were held out). Only those districts are visited, rather
+    than every held district.
 
     Args:
         heap (optimization.lazy_heap.LazyHeap): LazyHeap instance to refill
             using Districts from the holdout queue.
         holdout_queue (optimization.holdout.HoldoutQueue): HoldoutQueue instance
             containing all districts previously exhausted greedy moves.
+        verbose (bool): Whether to log every pushed district.
     """
-    # Pop all elements from holdout queue
+    log_info = logging.info if verbose is True else lambda *args: None
+    log_debug = logging.debug if verbose is True else lambda *args: None
+    # Pop all notified elements from holdout queue
     is_running = True
     while is_running is True:
         holdout_district = holdout_queue.dequeue()
-        # Holdout queue is empty
+        # Holdout queue has no notified districts
         if holdout_district is None:
-            logging.info("No more districts in holdout queue.")
-            holdout_queue.recycle()
-            logging.info("Recycling holdout queue.")
+            log_info("No more districts in holdout queue.")
             is_running = False
         # Holdout queue had a valid district
         else:
-            logging.info("Pushing district into heap.")
+            log_info("Pushing district into heap.")
             heap.push(holdout_district)
-            logging.debug(f"Pushed district '{holdout_district.get_id()}' into heap.")  
+            log_debug("Pushed district '%s' into heap.", holdout_district)
+
+def build_state_graph(target_state, aug_school_info, school_assignment, adjacency=None):
+    """
+    Builds a reusable graph of a state's schools and districts (i.e., with all
+    information needed to initialize the greedy partitioning algorithm), so that
+    multiple runs over the same state need not query the DataFrames again. All
+    information is gathered in bulk (see
+    `auxiliary.functions.get_state_graph_arrays`), in time linear to the size
+    of the data.
+
+    Args:
+        target_state (str): Capitalized full state name (e.g., 'Alabama').
+        aug_school_info (pandas.DataFrame): Target augmented school information
+            (as formatted by `auxiliary.data_handler.DataHandler`).
+        school_assignment (pandas.DataFrame): Target school assignment (as
+            formatted by `auxiliary.data_handler.DataHandler`).
+        adjacency (auxiliary.school_adjacency.SchoolAdjacency): Adjacency
+            between schools (as returned by `auxiliary.data_handler.load_data`),
+            or None.
+
+    Returns:
+        optimization.state_graph.StateGraph: Prebuilt graph of the state.
+    """
+    return StateGraph(**get_state_graph_arrays(target_state, aug_school_info, school_assignment, adjacency=adjacency))
+
+def draw_seed():
+    """
+    Draws a fresh seed (from the OS' entropy source) for a run of the greedy
+    partitioning algorithm.
+
+    Returns:
+        int: Non-negative 63-bit seed.
+    """
+    return random.SystemRandom().getrandbits(63)
+
+def get_run_seed(seed, target_state, run_idx):
+    """
+    Derives the seed of a single run from a base seed, such that every
+    (state, run) pair gets its own seed regardless of the order (or process)
+    in which runs are performed.
+
+    Args:
+        seed (int): Base seed.
+        target_state (str): Capitalized full state name (e.g., 'Alabama').
+        run_idx (int): Run's index (within the state).
+
+    Returns:
+        int: Non-negative 63-bit seed.
+    """
+    digest = hashlib.sha256(f"{seed}:{target_state}:{run_idx}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little") >> 1
+
+def draw_run_order(seed, n_districts, neighbor_offsets, neighbor_idxs):
+    """
+    Draws all random choices of a single run of the greedy partitioning
+    algorithm from its seed, namely (i) each district's heap tiebreak, (ii) each
+    school's rank (i.e., the order in which bordering schools are visited), and
+    (iii) the order in which each school's neighbors are visited. Both engines
+    (see `greedy_algo`) draw the exact same choices for the same seed.
+
+    Args:
+        seed (int): Seed of the run.
+        n_districts (int): Number of districts.
+        neighbor_offsets (numpy.ndarray): Row offsets of the school adjacency.
+        neighbor_idxs (numpy.ndarray): Positions of all schools' neighboring
+            schools (row by row).
+
+    Returns:
+        tuple: Triplet containing (i) each district's tiebreak, (ii) each
+            school's rank, and (iii) all schools' neighbors, row by row (in
+            the order they should be visited).
+    """
+    rng = np.random.default_rng(seed)
+    n_schools = len(neighbor_offsets) - 1
+    district_tiebreaks = rng.random(n_districts)
+    school_ranks = rng.permutation(n_schools).astype(np.int32)
+    # Shuffle neighbors within each row
+    rows = np.repeat(np.arange(n_schools), np.diff(neighbor_offsets))
+    neighbor_order = np.lexsort((rng.random(len(rows)), rows))
+    return district_tiebreaks, school_ranks, np.asarray(neighbor_idxs)[neighbor_order]
+
+def iterate_greedy_algo(heap, holdout_queue, inequality_tracker, early_stopper, pick_moves, apply_moves, has_schools, dispose, callbacks, callback_kwargs, item_id=lambda x: x, verbose=True):
+    """
+    Executes the main loop of the greedy partitioning algorithm, which is
+    shared by both engines (see `greedy_algo` and `array_greedy_algo`). Every
+    engine-specific step (i.e., picking, applying and disposing of a
+    district's moves) is injected through the provided functions, while the
+    heap and the holdout queue hold whatever the engine represents districts
+    with (i.e., District instances or interned IDs).
+
+    At every iteration, a district is popped from the heap, and its greedy
+    moves are picked and applied. Districts without moves are moved to the holdout
+    queue, while all others are pushed back into the heap (or disposed of, if
+    they have no more schools). Whenever the heap is empty, it is refilled
+    once from the holdout queue (see `refill_heap`). The loop ends when the
+    heap is still empty after a refill, or when the early stopper detects no
+    inequality improvement.
+
+    Args:
+        heap (otimization.lazy_heap.LazyHeap): LazyHeap (or IndexedHeap) of
+            all districts.
+        holdout_queue (optimization.holdout.HoldoutQueue): HoldoutQueue
+            instance (notified upon neighborhood changes).
+        inequality_tracker
+            (optimization.inequality_tracker.InequalityTracker): Up-to-date
+            InequalityTracker instance.
+        early_stopper (optimization.early_stopper.EarlyStopper): EarlyStopper
+            instance.
+        pick_moves (function): Function to get all greedy moves of a district
+            (see `greedily_pick_redistricting_moves`).
+        apply_moves (function): Function to apply a list of greedy moves (and
+            update the heap accordingly, see `apply_redistricting_moves`).
+        has_schools (function): Function to check whether a district still
+            has any schools.
+        dispose (function): Function to dispose of a district without schools
+            (other than stopping its inequality tracking).
+        callbacks (dict): Dictionary of (optional) callback functions (see
+            `greedy_algo`).
+        callback_kwargs (dict): Keyword arguments passed to the 'on_init',
+            'on_update' and 'on_end' callbacks (i.e., schools, districts,
+            lookup and inequality tracker).
+        item_id (function): Function to get a district's (interned) ID.
+        verbose (bool): Whether to log every step of every iteration (which
+            may take as long as the steps themselves).
 
-def greedy_algo(target_state, aug_school_info, school_assignment, min_schools_per_district, max_schools_per_district, early_stopper_it, early_stopper_tol, callbacks):
+    Returns:
+        float: Minimal spatial inequality index achieved.
+    """
+    # Auxiliary functions to log every step (if requested)
+    log_info = logging.info if verbose is True else lambda *args: None
+    log_debug = logging.debug if verbose is True else lambda *args: None
+
+    # Auxiliary function to execute provided callbacks
+    def execute_callback(label, **kwargs):
+        callback = callbacks.get(label, None)
+        if callback is None:
+            pass
+        else:
+            callback(**kwargs)
+    
+    # Main algorithm
+    is_running = True
+    is_retrying = False
+    iteration_idx = 0
+    
+    # Execute on_init callback
+    execute_callback("on_init", **callback_kwargs)
+    
+    # Start greedy algorithm
+    logging.info("Starting greedy algorithm.")
+    while is_running is True:
+        # To always execute at start of iteration
+        log_info("-"*30)
+        iteration_idx += 1
+        
+        # Execute on_update callback
+        execute_callback("on_update", **callback_kwargs)
+        
+        try:
+            # Try to pop district from queue
+            log_info("Popping district from heap.")
+            district = heap.pop()
+            log_debug("District popped: '%s'", district)
+            # Reset retry flag
+            is_retrying = False
+            # Greedily select districts with which to equalize funding
+            log_info("Calculating greedy moves.")
+            greedy_moves = pick_moves(district)
+            log_debug("Number of possible moves: %d", len(greedy_moves))
+            log_debug("Possible moves' list: %s", greedy_moves)
+            # Handle all existing greedy moves
+            if len(greedy_moves) == 0:
+                log_info("No moves available.")
+                # No moves are available, add district to holdout queue
+                log_info("Moving district to holdout queue.")
+                holdout_queue.enqueue(district)
+                log_debug("Moved district '%s' to holdout queue.", district)
+            else:
+                log_info("At least one available move.")
+                # If some moves are available, perform all
+                log_info("Redistricting schools.")
+                apply_moves(greedy_moves)
+                execute_callback("on_move", iteration_idx=iteration_idx, moves=greedy_moves)
+                # Push district back into heap (or eliminate it if it has no more schools)
+                if has_schools(district):
+                    log_info("Pushing district back into heap.")
+                    heap.push(district)
+                    log_debug("Pushed district '%s' to heap.", district)
+                else:
+                    log_info("Disposing of district.")
+                    dispose(district)
+                    inequality_tracker.remove(item_id(district))
+                    log_debug("Disposed of district '%s'", district)
+                # Update inequality calculation (only for redistricted districts' neighborhoods)
+                inequality_tracker.update(set(map(lambda x: x[1], greedy_moves)).union(map(lambda x: x[2], greedy_moves)))
+                current_inequality = inequality_tracker.get_inequality()
+                log_info("Current inequality: %s", current_inequality)
+                early_stopper.update(current_inequality)
+        except IndexError:
+            log_info("Could not pop district from heap.")
+            # First time retrying, attempt to refill heap (and retry algorithm)
+            if is_retrying is False:
+                log_info("Flushing holdout queue into heap.")
+                refill_heap(heap, holdout_queue, verbose=verbose)
+                log_info("Retrying algorithm.")
+                is_retrying = True
+            # The heap has no elements even after refill, stop algorithm
+            else:
+                log_info("No available districts after retry... Terminating.")
+                is_running = False
+        except StopIteration:
+            # EarlyStopper has not detected any inequality improvement
+            log_info("No improvement detected for overall inequality.")
+            is_running = False
+    logging.info("Greedy algorithm done.") 
+    # Execute on_end callback
+    execute_callback("on_end", **callback_kwargs)
+    # retun final inequality value
+    return inequality_tracker.get_inequality()
+
+def greedy_algo(target_state, aug_school_info, school_assignment, min_schools_per_district, max_schools_per_district, early_stopper_it, early_stopper_tol, callbacks, indexed_heap=False, state_graph=None, seed=None, array_engine=False, batch_threshold=None, gain_ordered=False, delta_inequality=False):
     """
     Applies the greedy partitioning algorithm to a given school/district
     assignment - for a specific state - and attempts to minimize its spatial
     inequality by redistricting schools.
 
+    The algorithm can either be executed over School, District and Lookup
+    instances or, if `array_engine` is set, over a single (struct-of-arrays)
+    ArrayState instance (see `array_greedy_algo`). Both engines return the
+    exact same results for the same seed.
+
     Args:
         target_state (str): Capitalized full state name (e.g., 'Alabama').
         aug_school_info (pandas.DataFrame): Target augmented school information
@@ -258,58 +926,91 @@ def greedy_algo(target_state, aug_school_info, school_assignment, min_schools_pe
             specifically, 'on_init', 'on_update', and 'on_end' will have access
             to (i) the list of all `optimization.entity_nodes.School` instances,
             (ii) the list of all `optimization.entity_nodes.District` instances,
-            and (iii) an updated `optimization.lookup.Lookup` instance. On the
-            other hand, 'on_move' will only be passed (i) the current
-            iteration's index, and (ii) the list of all moves that were
+            (iii) an updated `optimization.lookup.Lookup` instance, and (iv) an
+            updated `optimization.inequality_tracker.InequalityTracker`
+            instance. On the other hand, 'on_move' will only be passed (i) the
+            current iteration's index, and (ii) the list of all moves that were
             performed.
+        indexed_heap (bool): Whether to use an
+            `optimization.lazy_heap.IndexedHeap` (i.e., with in-place node
+            updates) instead of an `optimization.lazy_heap.LazyHeap` to select
+            districts.
+        state_graph (optimization.state_graph.StateGraph): Prebuilt graph of
+            the target state (see `build_state_graph`), the path of a graph
+            file written by `optimization.state_graph.StateGraph.save` (which
+            is then memory-mapped), or None. If provided, both DataFrames are
+            ignored and the (costly) graph construction is skipped.
+        seed (int): Seed from which both the order in which candidate moves
+            are evaluated and the heap's tiebreaks are drawn (see
+            `draw_run_order`), or None to draw a fresh seed. Runs with the same
+            seed (and parameters) are identical, even across processes (see
+            `run_greedy_algo` to have the seed recorded).
+        array_engine (bool): Whether to use the array-based engine (see
+            `array_greedy_algo`) instead of School, District and Lookup
+            instances. If set, callbacks receive read-only views instead (see
+            `optimization.array_state.ArrayState`).
+        batch_threshold (int): Number of bordering schools (of the selected
+            district) above which candidate moves are scored in batches (see
+            `batch_pick_redistricting_moves`), or None to always score them one
+            by one. Either way, the exact same moves are selected.
+        gain_ordered (bool): Whether to visit each district's candidate moves
+            by decreasing (estimated) gain rather than in random order (see
+            `greedily_pick_redistricting_moves`).
+        delta_inequality (bool): Whether to accept moves by their exact change
+            of the Spatial Inequality Index (see
+            `optimization.inequality_delta.InequalityDelta`) rather than by
+            comparing both districts' funding gaps.
 
     Returns:
         float: Minimal spatial inequality index achieved for the specified
             state.
     """
-    # Instantiate all schools
-    school_ids_in_state = get_schools_in_state(target_state, school_assignment)
-    schools = [School(
-        school_id,
-        get_school_total_students(school_id, aug_school_info),
-        get_school_total_funding(school_id, aug_school_info)
-    ) for school_id in school_ids_in_state]
-
-    # Instantiate all districts
-    district_ids_in_state = get_districts_in_state(target_state, school_assignment)
-    districts = [District(
-        district_id
-    ) for district_id in district_ids_in_state]
-
-    # Instantiate lookup
-    lookup = Lookup(schools, districts)
-
-    # Populate schools' neighbors
-    for school in schools:
-        school_id = school.get_id()
-        neighbor_ids = get_neighbouring_schools(school_id, aug_school_info)
-        for neighbor_id in neighbor_ids:
-            neighbor = lookup.get_school_by_id(neighbor_id)
-            school.add_neighbor(neighbor)
-
-    # Populate school districts
-    for district in districts:
-        district_id = district.get_id()
-        school_ids = get_schools_in_district(district_id, school_assignment)
-        for school_id in school_ids:
-            school = lookup.get_school_by_id(school_id)
-            district.add_school(school)
-            lookup.assign_school_to_district_by_id(school_id, district_id)
+    if array_engine is True:
+        return array_greedy_algo(
+            target_state,
+            aug_school_info,
+            school_assignment,
+            min_schools_per_district,
+            max_schools_per_district,
+            early_stopper_it,
+            early_stopper_tol,
+            callbacks,
+            indexed_heap=indexed_heap,
+            state_graph=state_graph,
+            seed=seed,
+            batch_threshold=batch_threshold,
+            gain_ordered=gain_ordered,
+            delta_inequality=delta_inequality
+        )
+    # Instantiate all schools, districts and lookup (from a prebuilt graph)
+    if state_graph is None:
+        state_graph = build_state_graph(target_state, aug_school_info, school_assignment)
+    elif isinstance(state_graph, str):
+        state_graph = StateGraph.open(state_graph)
+    schools, districts, lookup = state_graph.instantiate()
+
+    # Draw all random choices of the run (i.e., heap tiebreaks and visiting order)
+    neighbor_offsets, neighbor_idxs = state_graph.get_neighbor_csr()
+    district_tiebreaks, school_ranks, neighbor_idxs = draw_run_order(
+        seed if seed is not None else draw_seed(),
+        len(districts),
+        neighbor_offsets,
+        neighbor_idxs
+    )
+    district_tiebreaks = district_tiebreaks.tolist()
+    school_ranks = school_ranks.tolist()
+    neighbor_offsets = neighbor_offsets.tolist()
+    neighbor_idxs = neighbor_idxs.tolist()
+    neighbors_by_school_id = [
+        [schools[neighbor_idx] for neighbor_idx in neighbor_idxs[neighbor_offsets[school_idx]:neighbor_offsets[school_idx+1]]]
+        for school_idx in range(len(schools))
+    ]
 
     # Calculate state-wide funding per student
     state_total_students = 0
     state_total_funding = 0
     for district in districts:
         state_total_students += district.get_total_students()
-        try:
-            int(district.get_total_funding())
-        except Exception as exception:
-            print(district)
         state_total_funding += district.get_total_funding()
     state_funding_per_student = state_total_funding / state_total_students
 
@@ -319,34 +1020,44 @@ def greedy_algo(target_state, aug_school_info, school_assignment, min_schools_pe
         return abs(district_funding_per_student - state_funding_per_student)
 
     # Initialize (max) heap to extract districts that deviate from state average
-    heap = LazyHeap(
+    # (populated with all districts at once, caching each district's priority)
+    heap_class = IndexedHeap if indexed_heap is True else LazyHeap
+    heap = heap_class.from_items(
+        districts,
         item_id=lambda x: x.get_id(),
-        gt=lambda x,y: abs_diff_from_state(x) > abs_diff_from_state(y),
+        key=abs_diff_from_state,
+        tiebreak=lambda x: district_tiebreaks[x.get_id()],
         max_elems=2*len(districts)
     )
 
-    # Populate heap with all districts
-    for district in districts:
-        heap.push(district)
-
-    # Initalize holdout queue
-    holdout_queue = HoldoutQueue(
-        get_item_tag=lambda x: lookup.get_neighboorhood_changes_by_district_id(x.get_id()),
-        is_valid=lambda x: lookup.get_neighboorhood_changes_by_district_id(x.get_data().get_id()) > x.get_tag()
+    # Initialize (incremental) inequality tracker
+    funding_per_student = lambda district: district.get_total_funding() / district.get_total_students()
+    inequality_tracker = InequalityTracker(
+        item_ids=map(lambda x: x.get_id(), districts),
+        get_benefit=lambda x: funding_per_student(lookup.get_district_by_id(x)),
+        get_neighbor_ids=lookup.get_neighboor_district_ids_by_district_id
     )
-    
-    # Auxiliary function to execute provided callbacks
-    def execute_callback(label, **kwargs):
-        callback = callbacks.get(label, None)
-        if callback is None:
-            pass
-        else:
-            callback(**kwargs)
-    
-    # Main algorithm
-    is_running = True
-    is_retrying = False
-    iteration_idx = 0
+
+    # Initialize (exact) move evaluator on top of the inequality tracker (if requested)
+    inequality_delta = None
+    if delta_inequality is True:
+        inequality_delta = InequalityDelta(
+            inequality_tracker,
+            get_district_id=lambda x: lookup.get_district_by_school_id(x).get_id(),
+            get_school_neighbor_ids=lambda x: [neighbor.get_id() for neighbor in neighbors_by_school_id[x]],
+            get_district_totals=lambda x: (
+                len(lookup.get_district_by_id(x).get_schools()),
+                lookup.get_district_by_id(x).get_total_students(),
+                lookup.get_district_by_id(x).get_total_funding()
+            ),
+            get_edge_count=lookup.get_edge_count_by_district_ids,
+            get_neighbor_ids=lookup.get_neighboor_district_ids_by_district_id,
+            get_n_neighbors=lookup.get_n_neighboor_districts_by_district_id
+        )
+
+    # Initalize holdout queue (held districts are notified upon neighborhood changes)
+    holdout_queue = HoldoutQueue(item_id=lambda x: x.get_id())
+    lookup.set_neighborhood_change_callback(holdout_queue.notify)
     
     # Initialize EarlyStopper
     early_stopper = EarlyStopper(
@@ -356,98 +1067,280 @@ def greedy_algo(target_state, aug_school_info, school_assignment, min_schools_pe
     # Initialize greedy parameters
     greedy_params = {
         "min_schools_per_district": min_schools_per_district,
-        "max_schools_per_district": max_schools_per_district
+        "max_schools_per_district": max_schools_per_district,
+        "get_rank": lambda x: school_ranks[x.get_id()],
+        "get_neighbors": lambda x: neighbors_by_school_id[x.get_id()],
+        "batch_threshold": batch_threshold,
+        "gain_ordered": gain_ordered,
+        "inequality_delta": inequality_delta
     }
     
-    # Execute on_init callback
-    execute_callback(
-        "on_init",
-        schools=schools,
-        districts=districts,
-        lookup=lookup
+    # Run main algorithm
+    return iterate_greedy_algo(
+        heap,
+        holdout_queue,
+        inequality_tracker,
+        early_stopper,
+        pick_moves=lambda x: greedily_pick_redistricting_moves(x, lookup, **greedy_params),
+        apply_moves=lambda x: apply_redistricting_moves(x, lookup, heap),
+        has_schools=lambda x: len(x.get_schools()) > 0,
+        dispose=districts.remove,
+        callbacks=callbacks,
+        callback_kwargs={
+            "schools": schools,
+            "districts": districts,
+            "lookup": lookup,
+            "inequality_tracker": inequality_tracker
+        },
+        item_id=lambda x: x.get_id()
     )
-    
-    # Start greedy algorithm
-    logging.info("Starting greedy algorithm.")
-    while is_running is True:
-        # To always execute at start of iteration
-        logging.info("-"*30)
-        iteration_idx += 1
-        
-        # Execute on_update callback
-        execute_callback(
-            "on_update",
-            schools=schools,
-            districts=districts,
-            lookup=lookup
+
+def array_greedy_algo(target_state, aug_school_info, school_assignment, min_schools_per_district, max_schools_per_district, early_stopper_it, early_stopper_tol, callbacks, indexed_heap=False, state_graph=None, seed=None, batch_threshold=None, gain_ordered=False, delta_inequality=False):
+    """
+    Array-based engine of the greedy partitioning algorithm (see
+    `greedy_algo`). It runs the exact same loop (see `iterate_greedy_algo`),
+    i.e., pop a district, pick its greedy moves, apply them and update all
+    affected districts' priorities, but keeps the whole school/district
+    assignment in a single `optimization.array_state.ArrayState` instance, and
+    both the heap and the holdout queue hold (interned) district IDs instead of
+    District instances.
+
+    Callbacks are passed read-only views instead of School and District
+    instances (which expose the same getters, except for their neighbors and
+    schools), and the ArrayState instance itself instead of a Lookup instance.
+    Individual steps of each iteration are not logged.
+
+    Args:
+        target_state (str): Capitalized full state name (e.g., 'Alabama').
+        aug_school_info (pandas.DataFrame): Target augmented school information
+            (as formatted by `auxiliary.data_handler.DataHandler`).
+        school_assignment (pandas.DataFrame): Target school assignment (as
+            formatted by `auxiliary.data_handler.DataHandler`).
+        min_schools_per_district (int): Minimum number of schools to preserve in
+            each district, upon redistricting.
+        max_schools_per_district (int): Maximum number of schools to be
+            preserved in each district, upon redistricting.
+        early_stopper_it (int): Number of allowed iterations without improvement
+            for early stopping.
+        early_stopper_tol (float): Tolerance for floating point inequality
+            improvement measurement.
+        callbacks (dict): Dictionary of (optional) callback functions (see
+            `greedy_algo`).
+        indexed_heap (bool): Whether to use an
+            `optimization.lazy_heap.IndexedHeap` instead of an
+            `optimization.lazy_heap.LazyHeap` to select districts.
+        state_graph (optimization.state_graph.StateGraph): Prebuilt graph of
+            the target state (or the path of its graph file), or None.
+        seed (int): Seed of the run (see `greedy_algo`), or None to draw a
+            fresh one.
+        batch_threshold (int): Number of bordering schools above which
+            candidate moves are scored in batches (see `greedy_algo`), or None.
+        gain_ordered (bool): Whether to visit candidate moves by decreasing
+            (estimated) gain (see `greedy_algo`).
+        delta_inequality (bool): Whether to accept moves by their exact change
+            of the Spatial Inequality Index (see `greedy_algo`).
+
+    Returns:
+        float: Minimal spatial inequality index achieved for the specified
+            state.
+    """
+    # Instantiate array state (from a prebuilt graph)
+    if state_graph is None:
+        state_graph = build_state_graph(target_state, aug_school_info, school_assignment)
+    elif isinstance(state_graph, str):
+        state_graph = StateGraph.open(state_graph)
+    array_state = state_graph.instantiate_arrays()
+    # Districts are interned by position (including any without schools)
+    n_districts = len(array_state.get_district_arrays()[0])
+
+    # Draw all random choices of the run (i.e., heap tiebreaks and visiting order)
+    _, _, neighbor_offsets, neighbor_idxs = array_state.get_school_arrays()
+    district_tiebreaks, school_ranks, neighbor_idxs = draw_run_order(
+        seed if seed is not None else draw_seed(),
+        n_districts,
+        neighbor_offsets,
+        neighbor_idxs
+    )
+    district_tiebreaks = district_tiebreaks.tolist()
+
+    # Calculate state-wide funding per student
+    state_total_students = 0
+    state_total_funding = 0
+    for district_id in range(n_districts):
+        _, total_students, total_funding = array_state.get_district_totals_by_id(district_id)
+        state_total_students += total_students
+        state_total_funding += total_funding
+    state_funding_per_student = state_total_funding / state_total_students
+
+    # Initialize (max) heap of district IDs (see `greedy_algo`)
+    heap_class = IndexedHeap if indexed_heap is True else LazyHeap
+    heap = heap_class.from_items(
+        range(n_districts),
+        key=lambda x: abs(array_state.get_funding_per_student_by_district_id(x) - state_funding_per_student),
+        tiebreak=district_tiebreaks.__getitem__,
+        max_elems=2*n_districts
+    )
+
+    # Initialize (incremental) inequality tracker
+    inequality_tracker = InequalityTracker(
+        item_ids=range(n_districts),
+        get_benefit=array_state.get_funding_per_student_by_district_id,
+        get_neighbor_ids=array_state.get_neighboor_district_ids_by_district_id
+    )
+
+    # Initialize (exact) move evaluator on top of the inequality tracker (if requested)
+    inequality_delta = None
+    if delta_inequality is True:
+        assignment = array_state.get_assignment()
+        _, _, default_neighbor_offsets, default_neighbor_idxs = array_state.get_school_arrays()
+        inequality_delta = InequalityDelta(
+            inequality_tracker,
+            get_district_id=lambda x: int(assignment[x]),
+            get_school_neighbor_ids=lambda x: default_neighbor_idxs[default_neighbor_offsets[x]:default_neighbor_offsets[x+1]].tolist(),
+            get_district_totals=array_state.get_district_totals_by_id,
+            get_edge_count=array_state.get_edge_count_by_district_ids,
+            get_neighbor_ids=array_state.get_neighboor_district_ids_by_district_id,
+            get_n_neighbors=array_state.get_n_neighboor_districts_by_district_id
         )
-        
-        try:
-            # Try to pop district from queue
-            logging.info("Popping district from heap.")
-            district = heap.pop()
-            logging.debug(f"District popped: '{district.get_id()}'")
-            # Reset retry flag
-            is_retrying = False
-            # Greedily select districts with which to equalize funding
-            logging.info("Calculating greedy moves.")
-            greedy_moves = greedily_pick_redistricting_moves(district, lookup, **greedy_params)
-            logging.debug(f"Number of possible moves: {len(greedy_moves)}")
-            logging.debug(f"Possible moves' list: {greedy_moves}")
-            # Handle all existing greedy moves
-            if len(greedy_moves) == 0:
-                logging.info("No moves available.")
-                # No moves are available, add district to holdout queue
-                logging.info("Moving district to holdout queue.")
-                holdout_queue.enqueue(district)
-                logging.debug(f"Moved district '{district.get_id()}' to holdout queue.")
-            else:
-                logging.info("At least one available move.")
-                # If some moves are available, perform all
-                logging.info("Redistricting schools.")
-                apply_redistricting_moves(greedy_moves, lookup, heap)
-                execute_callback("on_move", iteration_idx=iteration_idx, moves=greedy_moves)
-                # Push district back into heap (or eliminate it if it has no more schools)
-                if len(district.get_schools()) > 0:
-                    logging.info("Pushing district back into heap.")
-                    heap.push(district)
-                    logging.debug(f"Pushed district '{district.get_id()}' to heap.")
-                else:
-                    logging.info("Disposing of district.")
-                    districts.remove(district)
-                    logging.debug(f"Disposed of district '{district.get_id()}'")
-                # Update inequality calculation
-                current_inequality = calculate_inequality(districts, lookup)
-                logging.info(f"Current inequality: {current_inequality}")
-                early_stopper.update(current_inequality)
-        except IndexError:
-            logging.info("Could not pop district from heap.")
-            # First time retrying, attempt to refill heap (and retry algorithm)
-            if is_retrying is False:
-                logging.info("Flushing holdout queue into heap.")
-                refill_heap(heap, holdout_queue)
-                logging.info("Retrying algorithm.")
-                is_retrying = True
-            # The heap has no elements even after refill, stop algorithm
-            else:
-                logging.info("No available districts after retry... Terminating.")
-                is_running = False
-        except StopIteration:
-            # EarlyStopper has not detected any inequality improvement
-            logging.info("No improvement detected for overall inequality.")
-            is_running = False
-    logging.info("Greedy algorithm done.") 
-    # Execute on_end callback
-    execute_callback(
-        "on_end",
-        schools=schools,
-        districts=districts,
-        lookup=lookup
+
+    # Initalize holdout queue (held districts are notified upon neighborhood changes)
+    holdout_queue = HoldoutQueue()
+    array_state.set_neighborhood_change_callback(holdout_queue.notify)
+
+    early_stopper = EarlyStopper(
+        early_stopper_it,
+        tolerance=early_stopper_tol
     )
-    # retun final inequality value
-    return calculate_inequality(districts, lookup)
+    greedy_params = {
+        "min_schools_per_district": min_schools_per_district,
+        "max_schools_per_district": max_schools_per_district,
+        "school_ranks": school_ranks,
+        "neighbor_idxs": neighbor_idxs,
+        "batch_threshold": batch_threshold,
+        "gain_ordered": gain_ordered,
+        "inequality_delta": inequality_delta
+    }
+
+    # Run main algorithm (callbacks are passed read-only views)
+    return iterate_greedy_algo(
+        heap,
+        holdout_queue,
+        inequality_tracker,
+        early_stopper,
+        pick_moves=lambda x: pick_redistricting_moves_from_arrays(x, array_state, **greedy_params),
+        apply_moves=lambda x: apply_redistricting_moves_to_arrays(x, array_state, heap),
+        has_schools=lambda x: array_state.get_district_totals_by_id(x)[0] > 0,
+        dispose=lambda x: None,
+        callbacks=callbacks,
+        callback_kwargs={
+            "schools": array_state.get_schools(),
+            "districts": array_state.get_districts(),
+            "lookup": array_state,
+            "inequality_tracker": inequality_tracker
+        },
+        verbose=False
+    )
+
+def run_greedy_algo(target_state, aug_school_info, school_assignment, greedy_params, early_stopper_params, state_graph=None, extra_callbacks=None, seed=None):
+    """
+    Performs a single run of the greedy partitioning algorithm for a given
+    state, while tracking its metrics.
+
+    Args:
+        target_state (str): Capitalized full state name (e.g., 'Alabama').
+        aug_school_info (pandas.DataFrame): Target augmented school information
+            (as formatted by `auxiliary.data_handler.DataHandler`).
+        school_assignment (pandas.DataFrame): Target school assignment (as
+            formatted by `auxiliary.data_handler.DataHandler`).
+        greedy_params (kwargs): Keyword arguments for the greedy partitioning
+            algorithm's parameterization (see `get_expectable_run_for_state`).
+        early_stopper_params (kwargs): Keyword arguments for the early stopper's
+            parameterization (see `get_expectable_run_for_state`).
+        state_graph (optimization.state_graph.StateGraph): Prebuilt graph of
+            the target state (or the path of its graph file), or None.
+        extra_callbacks (dict): Dictionary of additional callback functions (see
+            `greedy_algo`), each called right after the corresponding metrics'
+            callback, or None.
+        seed (int): Seed of the run (see `greedy_algo`), or None to draw a
+            fresh one. Either way, it is recorded in the returned RunMetrics
+            instance, so that the run can be replayed.
+
+    Returns:
+        tuple: Pair containing (i) the run's final spatial inequality index, and
+            (ii) an `optimization.run_metrics.RunMetrics` instance with all
+            information on the run.
+    """
+    # Draw seed (if none was provided) and initialize metrics
+    if seed is None:
+        seed = draw_seed()
+    metrics = RunMetrics(seed=seed)
+    callbacks = {
+        "on_init": metrics.on_init,
+        "on_update": metrics.on_update,
+        "on_move": metrics.on_move,
+        "on_end": metrics.on_end
+    }
+    # Chain additional callbacks (if any)
+    def chain(callback, extra_callback):
+        def chained_callback(**kwargs):
+            callback(**kwargs)
+            extra_callback(**kwargs)
+        return chained_callback
+    for label, extra_callback in (extra_callbacks or {}).items():
+        callbacks[label] = chain(callbacks[label], extra_callback) if label in callbacks else extra_callback
+    # Single algorithm run
+    inequality = greedy_algo(
+        target_state,
+        aug_school_info,
+        school_assignment,
+        **greedy_params,
+        **early_stopper_params,
+        callbacks=callbacks,
+        state_graph=state_graph,
+        seed=seed
+    )
+    return inequality, metrics
+
+def select_expectable_run(inequalities, metrics):
+    """
+    Selects a single 'expectable' run out of multiple runs of the greedy
+    partitioning algorithm (i.e., the run whose spatial inequality index came
+    closest to - but not below - the average).
+
+    Runs without a RunMetrics instance (i.e., abandoned runs, see
+    `optimization.racing.RunAbandoned`) have no final spatial inequality index,
+    so they are left out of both mean and standard deviation, and are never
+    selected. If no completed run is at (or above) the average, the worst
+    completed run is selected instead.
+
+    Args:
+        inequalities (list of float): Final spatial inequality index of each
+            run (ignored for abandoned runs).
+        metrics (list of optimization.run_metrics.RunMetrics): RunMetrics
+            instance of each run (in the same order), or None for abandoned
+            runs.
+
+    Returns:
+        tuple: Triplet containing (i) the spatial inequality index's mean, (ii)
+            the spatial inequality index's standard deviation (both over
+            completed runs only), and (iii) the
+            `optimization.run_metrics.RunMetrics` instance of the expectable
+            run (or NaN, NaN and None, if no run completed).
+    """
+    # Keep completed runs only
+    completed = [(inequality, run_metrics) for inequality, run_metrics in zip(inequalities, metrics) if run_metrics is not None]
+    if len(completed) == 0:
+        return np.nan, np.nan, None
+    inequalities = np.array([inequality for inequality, _ in completed])
+    avg_inequality = np.mean(inequalities)
+    sorted_idxs = np.argsort(inequalities)
+    average_metric_idx = next(
+        (idx for idx in sorted_idxs if inequalities[idx] >= avg_inequality),
+        sorted_idxs[-1]
+    )
+    return avg_inequality, np.std(inequalities), completed[average_metric_idx][1]
 
-def get_expectable_run_for_state(target_state, aug_school_info, school_assignment, n_runs, greedy_params, early_stopper_params):
+def get_expectable_run_for_state(target_state, aug_school_info, school_assignment, n_runs, greedy_params, early_stopper_params, sequential_stopper_params=None, seed=None):
     """
     Performs multiple runs of the greedy partitioning algorithm for a given
     state, to get an 'expectation' of its performance and measure uncertainty
@@ -455,8 +1348,13 @@ def get_expectable_run_for_state(target_state, aug_school_info, school_assignmen
     extracts a single 'expectable' run (alongside benchmarking statistics) and
     returns them.
 
-    NOTE: Parallelizing iterations over the same state would be possible to
-    speedup this benchmarking process.
+    If sequential stopper parameters are provided, runs are performed until the
+    confidence interval on their mean spatial inequality index is narrow enough
+    (see `optimization.sequential_stopper.SequentialStopper`), in which case
+    `n_runs` is the maximum number of runs.
+
+    NOTE: To parallelize runs (over one or more states), see
+    `core.parallel_runs.get_expectable_runs_for_states`.
 
     Args:
         target_state (str): Capitalized full state name (e.g., 'Alabama').
@@ -467,11 +1365,12 @@ def get_expectable_run_for_state(target_state, aug_school_info, school_assignmen
         n_runs (int): Number of runs to perform for the greedy partitioning
             algorithm.
         greedy_params (kwargs): Keyword arguments for the greedy partitioning
-            algorithm's parameterization. Two values can be specified through
+            algorithm's parameterization. Two values must be specified through
             this parameter, namely (i) 'min_schools_per_district' and (ii)
             'max_schools_per_district'. These respectively refer to the minimum
             and maximum number of schools to preserve in each district, upon
-            redistricting.
+            redistricting. Any other optional argument of `greedy_algo` (e.g.,
+            'indexed_heap') can also be specified.
         early_stopper_params (kwargs): Keyword arguments for the early stopper's
             parameterization. Two values can be specified through this
             parameter, namely (i) 'early_stopper_it' and (ii)
@@ -479,10 +1378,18 @@ def get_expectable_run_for_state(target_state, aug_school_info, school_assignmen
             maximum iterations allowed without noticeable improvements to
             inequality and the tolerance for floating point comparisons on
             inequality.
+        sequential_stopper_params (kwargs): Keyword arguments for the
+            sequential stopper's parameterization, or None to always perform
+            `n_runs` runs. One value must be specified through this parameter,
+            namely 'tolerance' (i.e., the maximum allowed half-width of the
+            confidence interval). Optionally, 'min_runs', 'confidence' and
+            'relative' can also be specified.
+        seed (int): Base seed, from which each run's seed is derived (see
+            `get_run_seed`), or None to draw a fresh seed for every run.
 
     Returns:
-        tuple: Triplet containing (i) the spatial inequality index's standard
-            deviation, (ii) the spatial inequality index's mean, and (iii) an
+        tuple: Triplet containing (i) the spatial inequality index's mean, (ii)
+            the spatial inequality index's standard deviation, and (iii) an
             `optimization.run_metrics.RunMetrics` instance with all information
             on the algorithm's average run (i.e., the run whose spatial
             inequality index came closest to the average).
@@ -490,6 +1397,12 @@ def get_expectable_run_for_state(target_state, aug_school_info, school_assignmen
     # Initialize container variables
     inequalities = []
     metrics = []
+    # Initialize SequentialStopper (if any)
+    sequential_stopper = None
+    if sequential_stopper_params is not None:
+        sequential_stopper = SequentialStopper(**sequential_stopper_params, max_runs=n_runs)
+    # Build state graph once (for all runs)
+    state_graph = build_state_graph(target_state, aug_school_info, school_assignment)
     # Progress-related
     start_time = datetime.now()
     start_timestamp = time()
@@ -501,32 +1414,26 @@ def get_expectable_run_for_state(target_state, aug_school_info, school_assignmen
             print(f"State: {target_state}\nProgress: {i+1}/{n_runs}\nETA: {eta}")
         except Exception:
             print(f"State: {target_state}\nProgress: {i+1}/{n_runs}\nETA: ???")
-        # Initialize metrics
-        cur_metrics = RunMetrics()
-        callbacks = {
-            "on_init": cur_metrics.on_init,
-            "on_update": cur_metrics.on_update,
-            "on_move": cur_metrics.on_move,
-            "on_end": cur_metrics.on_end
-        }
         # Single algorithm run
-        cur_inequality = greedy_algo(
+        cur_inequality, cur_metrics = run_greedy_algo(
             target_state,
             aug_school_info,
             school_assignment,
-            **greedy_params,
-            **early_stopper_params,
-            callbacks=callbacks
+            greedy_params,
+            early_stopper_params,
+            state_graph=state_graph,
+            seed=get_run_seed(seed, target_state, i) if seed is not None else None
         )
         # Add to lists & clear screen
         metrics.append(cur_metrics)
         inequalities.append(cur_inequality)
+        # Stop once mean inequality is estimated precisely enough
+        if sequential_stopper is not None:
+            try:
+                sequential_stopper.update(cur_inequality)
+            except StopIteration:
+                break
     # Clear print with status
     print(f"State: {target_state}\nProgress: Done!")
-    # Select expectable run
-    avg_inequality = np.mean(inequalities)
-    average_metric_idx = next(
-        idx for idx in np.argsort(inequalities) if inequalities[idx] >= avg_inequality
-    )
     # Return mean, standard deviation and a representative metric
-    return np.mean(inequalities), np.std(inequalities), metrics[average_metric_idx]
\ No newline at end of file
+    return select_expectable_run(inequalities, metrics)
\ No newline at end of file
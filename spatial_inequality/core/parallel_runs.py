@@ -0,0 +1,341 @@
+"""
+Parallel execution of our greedy partitioning algorithm, farming multiple runs
+(over one or more states) out to a pool of worker processes.
+"""
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from multiprocessing import Manager, RawArray
+from time import time
+
+from auxiliary.data_handler import DataHandler, load_data
+from auxiliary.functions import get_schools_in_state
+from core.greedy_algorithm import build_state_graph, get_run_seed, run_greedy_algo, select_expectable_run
+from core.state_graphs import get_state_graph_filepath
+from optimization.racing import RaceCoordinator, Racer, RunAbandoned
+from optimization.sequential_stopper import SequentialStopper
+from optimization.state_graph import StateGraph
+
+# Data available to each worker process (set once, upon initialization)
+_worker_data = None
+# Directory with all state graph files (if any)
+_worker_state_graph_dir = None
+# State graphs built (or memory-mapped) by each worker process (reused across runs)
+_worker_state_graphs = {}
+# Racing information shared with the parent process (if any)
+_worker_race = None
+# Latest envelope fetched by each worker process (and its version), by state
+_worker_envelopes = {}
+
+def _init_worker(aug_school_info, school_assignment, state_graph_dir, target_states, race=None):
+    """
+    Initializes a worker process with all the data it needs to run the greedy
+    partitioning algorithm. Data is either inherited from the parent process or
+    (if not provided) loaded from scratch for the target states only, but
+    always only once per worker. If a directory with state graph files is
+    provided, no data is loaded at all.
+
+    Args:
+        aug_school_info (pandas.DataFrame): Target augmented school information
+            (as formatted by `auxiliary.data_handler.DataHandler`), or None.
+        school_assignment (pandas.DataFrame): Target school assignment (as
+            formatted by `auxiliary.data_handler.DataHandler`), or None.
+        state_graph_dir (str): Directory with all state graph files (see
+            `core.state_graphs.write_state_graphs`), or None.
+        target_states (list of str): Capitalized full state names (e.g.,
+            ['Alabama', 'Alaska']).
+        race (tuple): Triplet containing (i) the keyword arguments of each
+            run's `optimization.racing.Racer`, (ii) a shared array with the
+            version of each state's envelope (in the same order as the target
+            states), and (iii) a shared mapping between each state and its
+            envelope, or None.
+    """
+    global _worker_data, _worker_state_graph_dir, _worker_race
+    _worker_state_graph_dir = state_graph_dir
+    _worker_race = None
+    if race is not None:
+        _worker_race = (*race, {state: idx for idx, state in enumerate(target_states)})
+    adjacency = None
+    if state_graph_dir is None and (aug_school_info is None or school_assignment is None):
+        aug_school_info, school_assignment, adjacency = load_data(return_adjacency=True, states=target_states)
+    _worker_data = (aug_school_info, school_assignment, adjacency)
+
+def _get_envelope_in_worker(target_state):
+    """
+    Gets the latest envelope of a state's completed runs (see
+    `optimization.racing.RaceCoordinator`) inside a worker process. The envelope
+    is only fetched from the parent process whenever its version changes.
+
+    Args:
+        target_state (str): Capitalized full state name (e.g., 'Alabama').
+
+    Returns:
+        numpy.ndarray: Latest envelope.
+    """
+    _, envelope_versions, envelopes, state_idx_by_state = _worker_race
+    version = envelope_versions[state_idx_by_state[target_state]]
+    cached_version, envelope = _worker_envelopes.get(target_state, (0, np.array([])))
+    if version != cached_version:
+        envelope = np.asarray(envelopes[target_state])
+        _worker_envelopes[target_state] = (version, envelope)
+    return envelope
+
+def _run_in_worker(target_state, greedy_params, early_stopper_params, seed=None):
+    """
+    Performs a single run of the greedy partitioning algorithm inside a worker
+    process, using the worker's data. A state's graph is only built (or
+    memory-mapped from its file) the first time the worker runs it, and reused
+    for all following runs.
+
+    Args:
+        target_state (str): Capitalized full state name (e.g., 'Alabama').
+        greedy_params (kwargs): Keyword arguments for the greedy partitioning
+            algorithm's parameterization.
+        early_stopper_params (kwargs): Keyword arguments for the early stopper's
+            parameterization.
+        seed (int): Seed of the run, or None to draw a fresh one.
+
+    Returns:
+        tuple: Pair containing (i) the run's final spatial inequality index
+            (or None, if the run was abandoned), and (ii) an
+            `optimization.run_metrics.RunMetrics` instance with all information
+            on the run (or None, if the run was abandoned).
+    """
+    aug_school_info, school_assignment, adjacency = _worker_data
+    if target_state not in _worker_state_graphs:
+        if _worker_state_graph_dir is not None:
+            _worker_state_graphs[target_state] = StateGraph.open(
+                get_state_graph_filepath(_worker_state_graph_dir, target_state)
+            )
+        else:
+            _worker_state_graphs[target_state] = build_state_graph(
+                target_state,
+                aug_school_info,
+                school_assignment,
+                adjacency=adjacency
+            )
+    # Race against the state's completed runs (if racing)
+    extra_callbacks = None
+    if _worker_race is not None:
+        racer = Racer(lambda: _get_envelope_in_worker(target_state), **_worker_race[0])
+        extra_callbacks = {"on_update": racer.on_update}
+    try:
+        return run_greedy_algo(
+            target_state,
+            aug_school_info,
+            school_assignment,
+            greedy_params,
+            early_stopper_params,
+            state_graph=_worker_state_graphs[target_state],
+            extra_callbacks=extra_callbacks,
+            seed=seed
+        )
+    except RunAbandoned:
+        return None, None
+
+def get_expectable_runs_for_states(target_states, n_runs, greedy_params, early_stopper_params, aug_school_info=None, school_assignment=None, max_workers=None, state_graph_dir=None, sequential_stopper_params=None, racing_params=None, seed=None):
+    """
+    Parallel counterpart of `core.greedy_algorithm.get_expectable_run_for_state`
+    for multiple states. Every (state, run) pair is treated as an independent
+    job and submitted to a pool of worker processes. Jobs are scheduled
+    longest-first (i.e., by decreasing number of schools in their state), so
+    that the largest states do not end up running alone at the end.
+
+    If sequential stopper parameters are provided, only each state's minimum
+    number of runs is submitted upfront. Every time one of its runs finishes, a
+    state gets a new run submitted only while the confidence interval on its
+    mean spatial inequality index is still too wide (see
+    `optimization.sequential_stopper.SequentialStopper`). Most runs then go to
+    the states with the highest run-to-run variance, and `n_runs` is the
+    maximum number of runs per state. Runs are fed to the sequential stopper
+    by increasing index (rather than as they complete), and only the runs
+    before the point at which it stopped are kept (pending runs are cancelled,
+    and the results of runs still in progress are discarded).
+
+    If racing parameters are provided, the spatial inequality trajectory of
+    every completed run is gathered into its state's envelope (see
+    `optimization.racing.RaceCoordinator`), which is shared with all workers.
+    Ongoing runs that fall behind all of their state's completed runs are then
+    abandoned. This is a heuristic (see the note on
+    `optimization.racing.RaceCoordinator`): abandoned runs have no final
+    spatial inequality index, so they are left out of all statistics (and
+    never fed to the sequential stopper), but still count towards `n_runs`.
+    Their number is reported separately.
+
+    Every run's seed is recorded in its RunMetrics instance. If a base seed is
+    provided, each run's seed is derived from it and from the run's index
+    within its state (see `core.greedy_algorithm.get_run_seed`), so that the
+    outcome of every run does not depend on which worker performs it, nor
+    when. Without racing, the results are then fully reproducible (even with a
+    sequential stopper). With racing, which runs are abandoned (and thus which
+    runs make up the statistics) still depends on the order in which runs
+    complete.
+
+    Data is never sent along with each job. If a directory with state graph
+    files is provided, each worker memory-maps the graphs it needs (sharing a
+    single copy of them through the OS' page cache). Otherwise, if both
+    DataFrames are provided, each worker receives them once, upon
+    initialization. Otherwise, each worker loads them once through
+    `auxiliary.data_handler.load_data`, while jobs are scheduled by the
+    number of schools of each state in the raw school assignment (which is
+    far cheaper to read).
+
+    Args:
+        target_states (list of str): Capitalized full state names (e.g.,
+            ['Alabama', 'Alaska']).
+        n_runs (int): Number of runs to perform for each state (or maximum
+            number of runs, if sequential stopper parameters are provided).
+        greedy_params (kwargs): Keyword arguments for the greedy partitioning
+            algorithm's parameterization (see
+            `core.greedy_algorithm.get_expectable_run_for_state`).
+        early_stopper_params (kwargs): Keyword arguments for the early stopper's
+            parameterization (see
+            `core.greedy_algorithm.get_expectable_run_for_state`).
+        aug_school_info (pandas.DataFrame): Target augmented school information
+            (as formatted by `auxiliary.data_handler.DataHandler`), or None.
+        school_assignment (pandas.DataFrame): Target school assignment (as
+            formatted by `auxiliary.data_handler.DataHandler`), or None.
+        max_workers (int): Maximum number of worker processes (defaults to the
+            number of available processors).
+        state_graph_dir (str): Directory with all state graph files (see
+            `core.state_graphs.write_state_graphs`), or None.
+        sequential_stopper_params (kwargs): Keyword arguments for the
+            sequential stopper's parameterization (see
+            `core.greedy_algorithm.get_expectable_run_for_state`), or None to
+            always perform `n_runs` runs per state.
+        racing_params (kwargs): Keyword arguments for racing, or None to never
+            abandon runs. Any of 'margin', 'min_iterations' and 'check_every'
+            (see `optimization.racing.Racer`), as well as 'min_completed' (see
+            `optimization.racing.RaceCoordinator`) can be specified.
+        seed (int): Base seed, from which each run's seed is derived, or None
+            to draw a fresh seed for every run.
+
+    Returns:
+        dict of str: tuple: Mapping between each state and a quadruple
+            containing (i) the spatial inequality index's mean, (ii) the spatial
+            inequality index's standard deviation (both over completed runs
+            only), (iii) an `optimization.run_metrics.RunMetrics` instance with
+            all information on the algorithm's average run (i.e., the completed
+            run whose spatial inequality index came closest to the average),
+            and (iv) the number of abandoned runs among all runs accounted
+            for.
+    """
+    # Schedule all jobs longest-first
+    if state_graph_dir is not None:
+        n_schools_by_state = {
+            state: len(StateGraph.open(get_state_graph_filepath(state_graph_dir, state))) for state in target_states
+        }
+    elif school_assignment is None:
+        # Workers load their own data, so only count each state's schools (from the raw school assignment)
+        n_schools = DataHandler().get_school_assignment(states=target_states)["state_name"].value_counts()
+        n_schools_by_state = {state: int(n_schools.get(state, 0)) for state in target_states}
+    else:
+        n_schools_by_state = {
+            state: len(get_schools_in_state(state, school_assignment)) for state in target_states
+        }
+    # Initialize SequentialStoppers (if any)
+    sequential_stopper_by_state = {}
+    if sequential_stopper_params is not None:
+        sequential_stopper_by_state = {
+            state: SequentialStopper(**sequential_stopper_params, max_runs=n_runs) for state in target_states
+        }
+    n_submitted_by_state = {
+        state: sequential_stopper_by_state[state].get_min_runs() if state in sequential_stopper_by_state else n_runs
+        for state in target_states
+    }
+    jobs = sorted(
+        [(state, run_idx) for state in target_states for run_idx in range(n_submitted_by_state[state])],
+        key=lambda x: n_schools_by_state[x[0]],
+        reverse=True
+    )
+    # Initialize RaceCoordinators (if any), alongside all shared information
+    race_coordinator_by_state = {}
+    race = None
+    manager = None
+    if racing_params is not None:
+        racer_params = dict(racing_params)
+        min_completed = racer_params.pop("min_completed", 3)
+        race_coordinator_by_state = {
+            state: RaceCoordinator(min_completed=min_completed) for state in target_states
+        }
+        manager = Manager()
+        envelope_versions = RawArray("q", len(target_states))
+        envelopes = manager.dict()
+        race = (racer_params, envelope_versions, envelopes)
+    # Initialize container variables (results are kept by run index, and processed in that order)
+    results_by_state = {state: {} for state in target_states}
+    n_processed_by_state = {state: 0 for state in target_states}
+    n_cancelled = 0
+    is_done_by_state = {state: False for state in target_states}
+    # Progress-related
+    start_time = datetime.now()
+    start_timestamp = time()
+    try:
+        with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(aug_school_info, school_assignment, state_graph_dir, target_states, race)) as executor:
+            submit = lambda state, run_idx: executor.submit(
+                _run_in_worker,
+                state,
+                greedy_params,
+                early_stopper_params,
+                get_run_seed(seed, state, run_idx) if seed is not None else None
+            )
+            futures = {submit(state, run_idx): (state, run_idx) for state, run_idx in jobs}
+            n_done = 0
+            while len(futures) > 0:
+                future = next(as_completed(futures))
+                state, run_idx = futures.pop(future)
+                n_done += 1
+                if is_done_by_state[state] is True:
+                    continue
+                results_by_state[state][run_idx] = future.result()
+                # Share the state's updated envelope (if racing and the run completed)
+                if state in race_coordinator_by_state and results_by_state[state][run_idx][1] is not None:
+                    race_coordinator_by_state[state].add_trajectory(results_by_state[state][run_idx][1].as_dict()["spatial_inequality"])
+                    envelopes[state] = race_coordinator_by_state[state].get_envelope().tolist()
+                    envelope_versions[target_states.index(state)] += 1
+                # Process all finished runs by increasing index (abandoned runs are skipped)
+                while is_done_by_state[state] is False and n_processed_by_state[state] in results_by_state[state]:
+                    inequality, metrics = results_by_state[state][n_processed_by_state[state]]
+                    n_processed_by_state[state] += 1
+                    if state in sequential_stopper_by_state and metrics is not None:
+                        try:
+                            sequential_stopper_by_state[state].update(inequality)
+                        except StopIteration:
+                            is_done_by_state[state] = True
+                    if n_processed_by_state[state] == n_runs:
+                        is_done_by_state[state] = True
+                if is_done_by_state[state] is True:
+                    # Cancel all of the state's pending runs
+                    for pending_future, (pending_state, _) in list(futures.items()):
+                        if pending_state == state and pending_future.cancel():
+                            futures.pop(pending_future)
+                            n_cancelled += 1
+                elif state in sequential_stopper_by_state and n_submitted_by_state[state] < n_runs:
+                    # Submit another run (while the state's mean inequality is still imprecise)
+                    futures[submit(state, n_submitted_by_state[state])] = (state, n_submitted_by_state[state])
+                    n_submitted_by_state[state] += 1
+                # Print progress (cancelled runs are never performed)
+                n_jobs = sum(n_submitted_by_state.values()) - n_cancelled
+                n_abandoned = sum(metrics is None for _, metrics in results_by_state[state].values())
+                total_time_estimate = n_jobs * ((time() - start_timestamp) / n_done)
+                eta = (start_time + timedelta(seconds=total_time_estimate)).strftime("%Y-%m-%d %H:%M:%S")
+                print(f"State: {state} (run {len(results_by_state[state])}/{n_submitted_by_state[state]}, {n_abandoned} abandoned)\nProgress: {n_done}/{n_jobs}\nETA: {eta}")
+    finally:
+        if manager is not None:
+            manager.shutdown()
+    # Select expectable run for each state (over all processed runs)
+    expectable_runs = {}
+    for state, results in results_by_state.items():
+        results = [results[run_idx] for run_idx in range(n_processed_by_state[state])]
+        expectable_runs[state] = (
+            *select_expectable_run(
+                [inequality for inequality, _ in results],
+                [metrics for _, metrics in results]
+            ),
+            sum(metrics is None for _, metrics in results)
+        )
+    return expectable_runs
@@ -0,0 +1,63 @@
+"""
+Tooling to write every state's graph (see `optimization.state_graph.StateGraph`)
+into its own flat binary file, so that any number of worker processes can later
+memory-map it instead of rebuilding it from our data.
+
+Running this script directly writes the graphs of all states into the provided
+directory (defaults to '../data/state_graphs').
+"""
+import os
+import sys
+
+from auxiliary.data_handler import load_data
+from core.greedy_algorithm import build_state_graph
+
+def get_state_graph_filepath(state_graph_dir, target_state):
+    """
+    Gets the path of a state's graph file.
+
+    Args:
+        state_graph_dir (str): Directory containing all state graph files.
+        target_state (str): Capitalized full state name (e.g., 'New York').
+
+    Returns:
+        str: Path of the state's graph file (e.g., '<dir>/new_york.graph').
+    """
+    filename = target_state.lower().replace(" ", "_")
+    return os.path.join(state_graph_dir, f"{filename}.graph")
+
+def write_state_graphs(state_graph_dir, target_states, aug_school_info, school_assignment, adjacency=None):
+    """
+    Builds and writes the graphs of multiple states (one file per state).
+
+    Args:
+        state_graph_dir (str): Directory in which to write all files (created if
+            needed).
+        target_states (list of str): Capitalized full state names (e.g.,
+            ['Alabama', 'Alaska']).
+        aug_school_info (pandas.DataFrame): Target augmented school information
+            (as formatted by `auxiliary.data_handler.DataHandler`).
+        school_assignment (pandas.DataFrame): Target school assignment (as
+            formatted by `auxiliary.data_handler.DataHandler`).
+        adjacency (auxiliary.school_adjacency.SchoolAdjacency): Adjacency
+            between schools (as returned by `auxiliary.data_handler.load_data`),
+            or None.
+
+    Returns:
+        dict of str: str: Mapping between each state and its graph's file path.
+    """
+    os.makedirs(state_graph_dir, exist_ok=True)
+    filepath_by_state = {}
+    for target_state in target_states:
+        state_graph = build_state_graph(target_state, aug_school_info, school_assignment, adjacency=adjacency)
+        filepath_by_state[target_state] = get_state_graph_filepath(state_graph_dir, target_state)
+        state_graph.save(filepath_by_state[target_state])
+    return filepath_by_state
+
+if __name__ == "__main__":
+    state_graph_dir = sys.argv[1] if len(sys.argv) > 1 else "../data/state_graphs"
+    aug_school_info, school_assignment, adjacency = load_data(return_adjacency=True)
+    all_states = sorted(school_assignment["state_name"].unique().tolist())
+    filepath_by_state = write_state_graphs(state_graph_dir, all_states, aug_school_info, school_assignment, adjacency=adjacency)
+    for target_state, filepath in filepath_by_state.items():
+        print(f"{target_state}: {filepath}")
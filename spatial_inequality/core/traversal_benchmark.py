@@ -0,0 +1,114 @@
+"""
+Benchmark comparing how fast our algorithm converges when each district's
+candidate moves are visited in random order (i.e., the default) or by
+decreasing (estimated) gain (see `core.greedy_algorithm.greedy_algo`'s
+`gain_ordered` argument).
+
+Running this script directly benchmarks all provided states (defaults to all
+states) over a few seeds, and prints, for each state and traversal, the mean
+number of iterations (and seconds) until each run's plateau was reached, as
+well as the mean final spatial inequality.
+"""
+import sys
+import numpy as np
+
+from time import perf_counter
+
+from auxiliary.data_handler import load_data
+from core.greedy_algorithm import build_state_graph, run_greedy_algo
+
+def get_convergence(trajectory, timestamps, fraction=0.99):
+    """
+    Finds the point at which a run reached its plateau, i.e., the first
+    iteration by which it achieved a given fraction of its overall reduction of
+    spatial inequality.
+
+    Args:
+        trajectory (list of float): Spatial inequality at each of the run's
+            iterations.
+        timestamps (list of float): Time (in seconds) at the run's start,
+            followed by the time at each of the run's iterations (i.e., one
+            more entry than `trajectory`).
+        fraction (float): Fraction of the overall reduction of spatial
+            inequality that defines the plateau.
+
+    Returns:
+        tuple: Pair containing (i) the number of iterations until the plateau
+            was reached, and (ii) the corresponding elapsed time (in seconds).
+    """
+    trajectory = np.asarray(trajectory, dtype=np.float64)
+    reduction = trajectory[0] - trajectory
+    n_iterations = int(np.argmax(reduction >= fraction * reduction.max()))
+    return n_iterations, timestamps[n_iterations + 1] - timestamps[0]
+
+def benchmark_traversals(target_states, seeds, greedy_params, early_stopper_params, aug_school_info, school_assignment, fraction=0.99):
+    """
+    Runs our algorithm with both traversals (i.e., random and gain-ordered)
+    over multiple states and seeds.
+
+    Args:
+        target_states (list of str): Capitalized full state names (e.g.,
+            ['Alabama', 'Alaska']).
+        seeds (list of int): Seeds of all runs (per state and traversal).
+        greedy_params (kwargs): Keyword arguments for the greedy partitioning
+            algorithm's parameterization (see
+            `core.greedy_algorithm.get_expectable_run_for_state`), other than
+            `gain_ordered`.
+        early_stopper_params (kwargs): Keyword arguments for the early
+            stopper's parameterization.
+        aug_school_info (pandas.DataFrame): Target augmented school information
+            (as formatted by `auxiliary.data_handler.DataHandler`).
+        school_assignment (pandas.DataFrame): Target school assignment (as
+            formatted by `auxiliary.data_handler.DataHandler`).
+        fraction (float): Fraction of the overall reduction of spatial
+            inequality that defines each run's plateau (see
+            `get_convergence`).
+
+    Returns:
+        dict of str: dict: Mapping between each state and a mapping between
+            each traversal (i.e., 'random' or 'gain') and a tuple containing
+            the mean (i) number of iterations until the plateau, (ii) elapsed
+            time until the plateau (in seconds), (iii) total number of
+            iterations, and (iv) final spatial inequality over all runs.
+    """
+    results = {}
+    for target_state in target_states:
+        state_graph = build_state_graph(target_state, aug_school_info, school_assignment)
+        results[target_state] = {}
+        for label, gain_ordered in [("random", False), ("gain", True)]:
+            runs = []
+            for seed in seeds:
+                # Record the time of every iteration (alongside its metrics)
+                timestamps = []
+                record_time = lambda **kwargs: timestamps.append(perf_counter())
+                inequality, metrics = run_greedy_algo(
+                    target_state,
+                    aug_school_info,
+                    school_assignment,
+                    {**greedy_params, "gain_ordered": gain_ordered},
+                    early_stopper_params,
+                    state_graph=state_graph,
+                    extra_callbacks={"on_init": record_time, "on_update": record_time, "on_end": record_time},
+                    seed=seed
+                )
+                trajectory = metrics.as_dict()["spatial_inequality"]
+                n_iterations, elapsed = get_convergence(trajectory, timestamps, fraction=fraction)
+                runs.append((n_iterations, elapsed, len(trajectory), inequality))
+            results[target_state][label] = tuple(np.mean(runs, axis=0).tolist())
+    return results
+
+if __name__ == "__main__":
+    aug_school_info, school_assignment = load_data()
+    target_states = sys.argv[1:] if len(sys.argv) > 1 else sorted(school_assignment["state_name"].unique().tolist())
+    results = benchmark_traversals(
+        target_states,
+        seeds=[0, 1, 2],
+        greedy_params={"min_schools_per_district": 1, "max_schools_per_district": 500},
+        early_stopper_params={"early_stopper_it": 1000, "early_stopper_tol": 0.1},
+        aug_school_info=aug_school_info,
+        school_assignment=school_assignment
+    )
+    print(f"{'State':<22}{'Traversal':<11}{'Plateau (it)':>14}{'Plateau (s)':>13}{'Total (it)':>12}{'Inequality':>12}")
+    for target_state, results_by_traversal in results.items():
+        for label, (n_iterations, elapsed, n_total, inequality) in results_by_traversal.items():
+            print(f"{target_state:<22}{label:<11}{n_iterations:>14.1f}{elapsed:>13.3f}{n_total:>12.1f}{inequality:>12.4f}")
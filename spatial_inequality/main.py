@@ -15,6 +15,7 @@ import pandas as pd
 from pathlib import Path
 
 from core.greedy_algorithm import *
+from core.parallel_runs import get_expectable_runs_for_states
 from auxiliary.data_handler import load_data
 
 if __name__ == "__main__":
@@ -35,6 +36,15 @@ if __name__ == "__main__":
     # Checkpoint variables
     SAVE_METRICS = True
     N_RUNS_PER_STATE = 20
+    # Adaptive number of runs (e.g., {"tolerance": 0.01, "relative": True}),
+    # in which case N_RUNS_PER_STATE is the maximum number of runs per state
+    SEQUENTIAL_STOPPER_PARAMS = None
+    # Base seed for all runs (e.g., 42), or None to draw a fresh seed per run
+    # (every run's seed is recorded in its metrics either way)
+    SEED = None
+
+    # Number of worker processes (all available processors, by default)
+    N_WORKERS = os.cpu_count()
 
     # All existing states
     ALL_STATES = [
@@ -56,22 +66,27 @@ if __name__ == "__main__":
         with open("./metrics.json", "r") as file:
             overall_metrics = json.load(file)
     else:
-        # Run and save new metrics
+        # Run all states in parallel (and get average run for algorithm)
+        expectable_runs = get_expectable_runs_for_states(
+            ALL_STATES,
+            N_RUNS_PER_STATE,
+            GREEDY_PARAMS,
+            EARLY_STOPPER_PARAMS,
+            aug_school_info=aug_school_info,
+            school_assignment=school_assignment,
+            max_workers=N_WORKERS,
+            sequential_stopper_params=SEQUENTIAL_STOPPER_PARAMS,
+            seed=SEED
+        )
+        # Save new metrics
         for state in ALL_STATES:
-            # Get average run for algorithm
-            mean, std, metrics = get_expectable_run_for_state(
-                state,
-                aug_school_info,
-                school_assignment,
-                N_RUNS_PER_STATE,
-                GREEDY_PARAMS,
-                EARLY_STOPPER_PARAMS
-            )
+            mean, std, metrics, n_abandoned = expectable_runs[state]
             metrics = metrics.as_dict()
             # Store results
             overall_metrics[state] = {
                 "mean_inequality": mean,
                 "std_inequality": std,
+                "n_abandoned": n_abandoned,
                 "metrics": metrics
             }
 
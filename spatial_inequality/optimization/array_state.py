@@ -0,0 +1,617 @@
+"""
+Provides a struct-of-arrays representation of a state's (mutable)
+school/district assignment, as an alternative to School, District and Lookup
+instances for our algorithm's array-based engine.
+"""
+import numpy as np
+
+from collections import Counter
+
+class ArrayState:
+    """
+    This class holds the same information as a set of
+    `optimization.entity_nodes.School`, `optimization.entity_nodes.District`
+    and `optimization.lookup.Lookup` instances, but keeps it in flat (numpy)
+    arrays indexed by each school's (or district's) interned ID, instead of in
+    per-object attributes. School totals and adjacency (in compressed sparse
+    row format) are never modified, so they can be shared with (or
+    memory-mapped from) an `optimization.state_graph.StateGraph`. Only the
+    school/district assignment, districts' totals and each school's number of
+    neighbors in other districts are copied for every run.
+
+    Much like Lookup, bordering schools and district adjacency (i.e., edge
+    counts) are updated incrementally upon every redistricting move, and
+    registered neighborhood changes can be forwarded to a callback. Bordering
+    schools are derived from each school's number of neighbors in other
+    districts, so that moving a school only takes time linear to its degree.
+
+    NOTE: Bordering schools and edge counts are still kept in (per-district)
+    Python sets and dictionaries, rather than in flat arrays, since both are
+    resized upon every move. Together, they take about 100 to 200 bytes per
+    school (out of about 150 to 270 bytes per school copied for every run,
+    e.g., 185 bytes per school for California once the run's order is drawn),
+    which falls short of only copying a few dozen bytes per school.
+
+    For compatibility with code written against School, District and Lookup
+    instances (e.g., `optimization.run_metrics.RunMetrics`), read-only views
+    over schools and districts are provided (see `get_schools`,
+    `get_districts` and `get_district_by_school_id`).
+
+    Attributes:
+        __school_ids (numpy.ndarray): Standardized NCES IDs of all schools
+            (either as strings or as raw bytes).
+        __district_ids (numpy.ndarray): Standardized NCES IDs of all districts
+            (either as strings or as raw bytes).
+        __school_students (numpy.ndarray): Total number of students of each
+            school.
+        __school_funding (numpy.ndarray): Total funding of each school.
+        __neighbor_offsets (numpy.ndarray): Row offsets of the school
+            adjacency.
+        __neighbor_idxs (numpy.ndarray): (Interned) IDs of all schools'
+            neighboring schools (row by row).
+        __assignment (numpy.ndarray): (Interned) ID of each school's district.
+        __n_foreign_neighbors (numpy.ndarray): Number of each school's
+            neighbors assigned to other districts.
+        __district_students (numpy.ndarray): Total number of students of each
+            district.
+        __district_funding (numpy.ndarray): Total funding of each district.
+        __district_n_schools (numpy.ndarray): Number of schools assigned to
+            each district.
+        __n_districts (int): Number of districts with at least one school.
+        __bordering_list (list of set): (Interned) IDs of all schools at each
+            district's border, by (interned) district ID.
+        __edge_tracker_list (list of dict): Sparse (symmetric) mapping between
+            each district's neighboring districts' (interned) IDs and the amount
+            of existing edges to them, by (interned) district ID.
+        __on_neighborhood_change (function): Function called with a district's
+            (interned) ID whenever its neighborhood changes, or None.
+
+    Example:
+        >>> array_state = ArrayState(
+        ...     school_ids=["010000500889", "010000500890"],
+        ...     total_students=[100, 200],
+        ...     total_funding=[1000.0, 3000.0],
+        ...     neighbor_offsets=[0, 1, 2],
+        ...     neighbor_idxs=[1, 0],
+        ...     district_ids=["0100005", "0100006"],
+        ...     district_offsets=[0, 1, 2],
+        ...     district_school_idxs=[0, 1])
+        >>> array_state.move_school(1, 0)
+        >>> print(array_state.get_district_by_id(0).get_total_funding())
+        4000.0
+    """
+    __school_ids = None
+    __district_ids = None
+    __school_students = None
+    __school_funding = None
+    __neighbor_offsets = None
+    __neighbor_idxs = None
+
+    __assignment = None
+    __n_foreign_neighbors = None
+    __district_students = None
+    __district_funding = None
+    __district_n_schools = None
+    __n_districts = None
+    __bordering_list = None
+    __edge_tracker_list = None
+    __on_neighborhood_change = None
+
+    def __init__(self, school_ids, total_students, total_funding, neighbor_offsets, neighbor_idxs, district_ids, district_offsets, district_school_idxs):
+        self.__school_ids = np.asarray(school_ids)
+        self.__district_ids = np.asarray(district_ids)
+        self.__school_students = np.asarray(total_students, dtype=np.int64)
+        self.__school_funding = np.asarray(total_funding, dtype=np.float64)
+        self.__neighbor_offsets = np.asarray(neighbor_offsets, dtype=np.int64)
+        self.__neighbor_idxs = np.asarray(neighbor_idxs, dtype=np.int32)
+        n_schools, n_districts = len(self.__school_ids), len(self.__district_ids)
+
+        # School/district assignment (from district membership)
+        district_offsets = np.asarray(district_offsets, dtype=np.int64)
+        district_school_idxs = np.asarray(district_school_idxs, dtype=np.int64)
+        member_district_idxs = np.repeat(np.arange(n_districts), np.diff(district_offsets))
+        self.__assignment = np.full(n_schools, -1, dtype=np.int32)
+        self.__assignment[district_school_idxs] = member_district_idxs
+        assert((self.__assignment >= 0).all())
+
+        # District totals (accumulated in membership order, like District)
+        self.__district_students = np.zeros(n_districts, dtype=np.int64)
+        self.__district_funding = np.zeros(n_districts, dtype=np.float64)
+        np.add.at(self.__district_students, member_district_idxs, self.__school_students[district_school_idxs])
+        np.add.at(self.__district_funding, member_district_idxs, self.__school_funding[district_school_idxs])
+        self.__district_n_schools = np.bincount(member_district_idxs, minlength=n_districts).astype(np.int32)
+        self.__n_districts = int(np.count_nonzero(self.__district_n_schools))
+
+        # Number of neighbors in other districts (by school)
+        rows = np.repeat(np.arange(n_schools), np.diff(self.__neighbor_offsets))
+        row_districts = self.__assignment[rows].astype(np.int64)
+        neighbor_districts = self.__assignment[self.__neighbor_idxs].astype(np.int64)
+        is_foreign = row_districts != neighbor_districts
+        self.__n_foreign_neighbors = np.bincount(rows[is_foreign], minlength=n_schools).astype(np.int32)
+
+        # Bordering schools (by district)
+        self.__bordering_list = [set([]) for _ in range(n_districts)]
+        for school_id in np.flatnonzero(self.__n_foreign_neighbors).tolist():
+            self.__bordering_list[self.__assignment[school_id]].add(school_id)
+
+        # Number of edges between districts (by district)
+        self.__edge_tracker_list = [{} for _ in range(n_districts)]
+        district_pairs, edge_counts = np.unique(
+            row_districts[is_foreign] * n_districts + neighbor_districts[is_foreign],
+            return_counts=True
+        )
+        for district_pair, edge_count in zip(district_pairs.tolist(), edge_counts.tolist()):
+            district_id, other_district_id = divmod(district_pair, n_districts)
+            self.__edge_tracker_list[district_id][other_district_id] = edge_count
+
+    def get_n_schools(self):
+        """
+        Getter method for the total number of schools.
+
+        Returns:
+            int: Number of schools.
+        """
+        return len(self.__school_ids)
+
+    def get_n_districts(self):
+        """
+        Getter method for the number of districts with at least one school.
+
+        Returns:
+            int: Number of (non-empty) districts.
+        """
+        return self.__n_districts
+
+    def get_school_arrays(self):
+        """
+        Getter method for all schools' (static) arrays.
+
+        Returns:
+            tuple: Quadruplet containing (i) each school's total number of
+                students, (ii) each school's total funding, (iii) the school
+                adjacency's row offsets, and (iv) all schools' neighbors (row
+                by row).
+        """
+        return self.__school_students, self.__school_funding, self.__neighbor_offsets, self.__neighbor_idxs
+
+    def get_assignment(self):
+        """
+        Getter method for the current school/district assignment.
+
+        NOTE: The returned array is updated in place (and should not be
+        modified).
+
+        Returns:
+            numpy.ndarray: (Interned) ID of each school's district.
+        """
+        return self.__assignment
+
+    def get_district_arrays(self):
+        """
+        Getter method for all districts' (current) totals.
+
+        NOTE: The returned arrays are updated in place (and should not be
+        modified).
+
+        Returns:
+            tuple: Triplet containing (i) each district's number of schools,
+                (ii) each district's total number of students, and (iii) each
+                district's total funding.
+        """
+        return self.__district_n_schools, self.__district_students, self.__district_funding
+
+    def get_district_totals_by_id(self, district_id):
+        """
+        Gets a district's current totals, through its (interned) ID.
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            tuple: Triplet containing (i) the district's number of schools,
+                (ii) its total number of students, and (iii) its total funding.
+        """
+        return (
+            int(self.__district_n_schools[district_id]),
+            int(self.__district_students[district_id]),
+            float(self.__district_funding[district_id])
+        )
+
+    def get_funding_per_student_by_district_id(self, district_id):
+        """
+        Gets a district's current per-student funding, through its (interned)
+        ID.
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            float: Per-student funding.
+        """
+        return float(self.__district_funding[district_id]) / int(self.__district_students[district_id])
+
+    def get_bordering_school_ids_by_district_id(self, district_id):
+        """
+        Gets the (interned) IDs of all schools at a district's border (i.e.,
+        that neighbor other districts), through its (interned) ID.
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            set of int: Interned IDs of all schools at the district's border.
+        """
+        return self.__bordering_list[district_id]
+
+    def get_neighboor_district_ids_by_district_id(self, district_id):
+        """
+        Gets the (interned) IDs of all districts that neighbor a specified
+        district, through its (interned) ID.
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            list of int: Interned IDs of all neighboring districts.
+        """
+        return list(self.__edge_tracker_list[district_id].keys())
+
+    def get_n_neighboor_districts_by_district_id(self, district_id):
+        """
+        Gets the number of districts that neighbor a specified district,
+        through its (interned) ID.
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            int: Number of neighboring districts.
+        """
+        return len(self.__edge_tracker_list[district_id])
+
+    def get_edge_count_by_district_ids(self, district_id, other_district_id):
+        """
+        Gets the number of existing edges (i.e., pairs of neighboring schools)
+        between two districts, through their (interned) IDs.
+
+        Args:
+            district_id (int): Interned district ID.
+            other_district_id (int): Interned (other) district ID.
+
+        Returns:
+            int: Number of edges between both districts.
+        """
+        return self.__edge_tracker_list[district_id].get(other_district_id, 0)
+
+    def get_school_by_id(self, school_id):
+        """
+        Gets a read-only view over a school, through its (interned) ID.
+
+        Args:
+            school_id (int): Interned school ID.
+
+        Returns:
+            optimization.array_state.SchoolView: View over the school.
+        """
+        return SchoolView(self, school_id)
+
+    def get_district_by_id(self, district_id):
+        """
+        Gets a read-only view over a district, through its (interned) ID.
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            optimization.array_state.DistrictView: View over the district.
+        """
+        return DistrictView(self, district_id)
+
+    def get_district_by_school_id(self, school_id):
+        """
+        Gets a read-only view over the district a school is assigned to,
+        through the school's (interned) ID.
+
+        Args:
+            school_id (int): Interned school ID.
+
+        Returns:
+            optimization.array_state.DistrictView: View over the district.
+        """
+        return DistrictView(self, int(self.__assignment[school_id]))
+
+    def get_schools(self):
+        """
+        Gets read-only views over all schools.
+
+        Returns:
+            optimization.array_state.ViewSequence: Views over all schools (by
+                interned ID).
+        """
+        return ViewSequence(
+            get_ids=lambda: range(len(self.__school_ids)),
+            get_len=lambda: len(self.__school_ids),
+            get_view=self.get_school_by_id
+        )
+
+    def get_districts(self):
+        """
+        Gets read-only views over all districts with at least one school.
+
+        Returns:
+            optimization.array_state.ViewSequence: Views over all (non-empty)
+                districts (by interned ID).
+        """
+        return ViewSequence(
+            get_ids=lambda: np.flatnonzero(self.__district_n_schools).tolist(),
+            get_len=self.get_n_districts,
+            get_view=self.get_district_by_id
+        )
+
+    def get_school_nces_id(self, school_id):
+        """
+        Gets a school's standardized NCES ID, through its (interned) ID.
+
+        Args:
+            school_id (int): Interned school ID.
+
+        Returns:
+            str: Standardized NCES ID.
+        """
+        return self.__to_str(self.__school_ids[school_id])
+
+    def get_district_nces_id(self, district_id):
+        """
+        Gets a district's standardized NCES ID, through its (interned) ID.
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            str: Standardized NCES ID.
+        """
+        return self.__to_str(self.__district_ids[district_id])
+
+    def set_neighborhood_change_callback(self, on_neighborhood_change):
+        """
+        Registers a function to be called whenever a district's neighborhood
+        changes (see `optimization.lookup.Lookup`).
+
+        Args:
+            on_neighborhood_change (function): Function receiving the
+                (interned) ID of the affected district, or None.
+        """
+        self.__on_neighborhood_change = on_neighborhood_change
+
+    def move_school(self, school_id, to_district_id):
+        """
+        Redistricts a school, through its (interned) ID, and updates all
+        districts' totals, bordering schools and edge counts accordingly.
+        Every district in the (updated) immediate neighborhood of both involved
+        districts is then notified of the change (if a callback was registered).
+
+        Args:
+            school_id (int): Interned target school ID.
+            to_district_id (int): Interned destination district ID.
+        """
+        from_district_id = int(self.__assignment[school_id])
+        start, end = self.__neighbor_offsets[school_id], self.__neighbor_offsets[school_id+1]
+        neighbor_ids = self.__neighbor_idxs[start:end].tolist()
+        neighbor_district_ids = self.__assignment[neighbor_ids].tolist()
+
+        # Change district assignment (and totals, in the same order as District)
+        self.__assignment[school_id] = to_district_id
+        self.__district_students[from_district_id] -= self.__school_students[school_id]
+        self.__district_funding[from_district_id] -= self.__school_funding[school_id]
+        self.__district_n_schools[from_district_id] -= 1
+        self.__district_students[to_district_id] += self.__school_students[school_id]
+        self.__district_funding[to_district_id] += self.__school_funding[school_id]
+        self.__district_n_schools[to_district_id] += 1
+        if self.__district_n_schools[from_district_id] == 0:
+            self.__n_districts -= 1
+
+        # Update number of foreign neighbors and bordering schools (of both districts)
+        n_foreign_neighbors = self.__n_foreign_neighbors
+        from_bordering_school_ids = self.__bordering_list[from_district_id]
+        to_bordering_school_ids = self.__bordering_list[to_district_id]
+        n_school_foreign_neighbors = 0
+        for neighbor_id, neighbor_district_id in zip(neighbor_ids, neighbor_district_ids):
+            if neighbor_district_id == from_district_id:
+                # Neighbor now borders the school's new district
+                n_foreign_neighbors[neighbor_id] += 1
+                from_bordering_school_ids.add(neighbor_id)
+                n_school_foreign_neighbors += 1
+            elif neighbor_district_id == to_district_id:
+                # Neighbor no longer borders the school's previous district
+                n_foreign_neighbors[neighbor_id] -= 1
+                if n_foreign_neighbors[neighbor_id] == 0:
+                    to_bordering_school_ids.discard(neighbor_id)
+            else:
+                n_school_foreign_neighbors += 1
+        n_foreign_neighbors[school_id] = n_school_foreign_neighbors
+        from_bordering_school_ids.discard(school_id)
+        if n_school_foreign_neighbors > 0:
+            to_bordering_school_ids.add(school_id)
+
+        # Update edge tracker
+        for neighbor_district_id, edge_count in Counter(neighbor_district_ids).items():
+            if neighbor_district_id == from_district_id:
+                self.__add_edges(from_district_id, to_district_id, edge_count)
+            elif neighbor_district_id == to_district_id:
+                self.__add_edges(from_district_id, to_district_id, -edge_count)
+            else:
+                self.__add_edges(from_district_id, neighbor_district_id, -edge_count)
+                self.__add_edges(to_district_id, neighbor_district_id, edge_count)
+
+        # Notify immediate neighborhood of both districts
+        if self.__on_neighborhood_change is not None:
+            immediate_neighborhood = set([from_district_id, to_district_id]).union(
+                self.__edge_tracker_list[from_district_id].keys(),
+                self.__edge_tracker_list[to_district_id].keys()
+            )
+            for district_id in immediate_neighborhood:
+                self.__on_neighborhood_change(district_id)
+
+    def __to_str(self, nces_id):
+        """
+        Converts an NCES ID (either as a string or as raw bytes) into a string.
+
+        Args:
+            nces_id (numpy.str_ or numpy.bytes_): Target NCES ID.
+
+        Returns:
+            str: Converted NCES ID.
+        """
+        if isinstance(nces_id, bytes):
+            return nces_id.decode("utf-8")
+        return str(nces_id)
+
+    def __add_edges(self, district_id, other_district_id, edge_count):
+        """
+        Adds (or removes, if negative) edges between two districts. District
+        pairs left without any edges are no longer tracked.
+
+        Args:
+            district_id (int): Interned district ID.
+            other_district_id (int): Interned (other) district ID.
+            edge_count (int): Number of edges to add.
+        """
+        for id_l, id_r in ((district_id, other_district_id), (other_district_id, district_id)):
+            neighbor_edge_counts = self.__edge_tracker_list[id_l]
+            new_edge_count = neighbor_edge_counts.get(id_r, 0) + edge_count
+            if new_edge_count == 0:
+                neighbor_edge_counts.pop(id_r, None)
+            else:
+                neighbor_edge_counts[id_r] = new_edge_count
+
+    def __len__(self):
+        return len(self.__school_ids)
+
+class ViewSequence:
+    """
+    Read-only sequence of views (e.g., over all schools of an ArrayState),
+    created on demand whenever iterated over.
+
+    Attributes:
+        __get_ids (function): Function to get the (interned) IDs of all
+            viewed items.
+        __get_len (function): Function to get the number of viewed items.
+        __get_view (function): Function to get a view through an item's
+            (interned) ID.
+    """
+    __get_ids = None
+    __get_len = None
+    __get_view = None
+
+    def __init__(self, get_ids, get_len, get_view):
+        self.__get_ids = get_ids
+        self.__get_len = get_len
+        self.__get_view = get_view
+
+    def __iter__(self):
+        return map(self.__get_view, self.__get_ids())
+
+    def __len__(self):
+        return self.__get_len()
+
+class SchoolView:
+    """
+    Read-only view over a single school of an ArrayState, exposing the same
+    getters as `optimization.entity_nodes.School` (except for its neighbors).
+
+    Attributes:
+        __array_state (optimization.array_state.ArrayState): Viewed state.
+        __id (int): Interned ID.
+    """
+    __slots__ = ("__array_state", "__id")
+
+    def __init__(self, array_state, school_id):
+        self.__array_state = array_state
+        self.__id = school_id
+
+    def get_id(self):
+        """
+        Getter method for school's (interned) ID.
+
+        Returns:
+            int: Interned ID.
+        """
+        return self.__id
+
+    def get_nces_id(self):
+        """
+        Getter method for school's NCES ID.
+
+        Returns:
+            str: Standardized NCES ID.
+        """
+        return self.__array_state.get_school_nces_id(self.__id)
+
+    def get_total_students(self):
+        """
+        Getter method for school's total number of students.
+
+        Returns:
+            int: Total number of students.
+        """
+        return int(self.__array_state.get_school_arrays()[0][self.__id])
+
+    def get_total_funding(self):
+        """
+        Getter method for school's total funding.
+
+        Returns:
+            float: Total funding available.
+        """
+        return float(self.__array_state.get_school_arrays()[1][self.__id])
+
+class DistrictView:
+    """
+    Read-only view over a single district of an ArrayState, exposing the same
+    getters as `optimization.entity_nodes.District` (except for its schools).
+
+    Attributes:
+        __array_state (optimization.array_state.ArrayState): Viewed state.
+        __id (int): Interned ID.
+    """
+    __slots__ = ("__array_state", "__id")
+
+    def __init__(self, array_state, district_id):
+        self.__array_state = array_state
+        self.__id = district_id
+
+    def get_id(self):
+        """
+        Getter method for district's (interned) ID.
+
+        Returns:
+            int: Interned ID.
+        """
+        return self.__id
+
+    def get_nces_id(self):
+        """
+        Getter method for district's NCES ID.
+
+        Returns:
+            str: Standardized NCES ID.
+        """
+        return self.__array_state.get_district_nces_id(self.__id)
+
+    def get_total_students(self):
+        """
+        Getter method for district's total number of students.
+
+        Returns:
+            int: Total number of students.
+        """
+        return self.__array_state.get_district_totals_by_id(self.__id)[1]
+
+    def get_total_funding(self):
+        """
+        Getter method for district's total funding.
+
+        Returns:
+            float: Total funding available.
+        """
+        return self.__array_state.get_district_totals_by_id(self.__id)[2]
@@ -8,23 +8,36 @@ class School:
     necessary properties.
 
     Attributes:
+        __id (int): Interned ID (i.e., the school's dense index within its
+            state).
         __nces_id (str): Standardized NCES ID.
         __total_students (int): Total number of students.
         __total_funding (float): Total funding available.
         __neighbors (set): Set of all neighboring Schools.
     """
+    __id = None
     __nces_id = None
     __total_sudents = None
     __total_funding = None
     __neighbors = None
     
-    def __init__(self, nces_id, total_students, total_funding):
-        self.__nces_id = nces_id
+    def __init__(self, school_id, total_students, total_funding, nces_id=None):
+        self.__id = school_id
+        self.__nces_id = nces_id if nces_id is not None else school_id
         self.__total_students = total_students
         self.__total_funding = total_funding
         self.__neighbors = set([])
         
     def get_id(self):
+        """
+        Getter method for school's (interned) ID.
+
+        Returns:
+            int: Interned ID (should never be nullable).
+        """
+        return self.__id
+
+    def get_nces_id(self):
         """
         Getter method for school's NCES ID.
 
@@ -72,7 +85,7 @@ class School:
         
     def __str__(self):
         return "< ID: '{}' | Neigh.: {} | Students: {} | Funding: {:.02f} >".format(
-            self.get_id(),
+            self.get_nces_id(),
             len(self.get_neighbors()),
             self.get_total_students(),
             self.get_total_funding()
@@ -80,6 +93,11 @@ class School:
     
     def __repr__(self):
         return str(self)
+
+    def __hash__(self):
+        # Hash by (interned) ID, so that iterating over sets of entities is
+        # deterministic across processes (equality is still by identity)
+        return hash(self.__id)
     
     def __copy__(self):
         """
@@ -89,7 +107,7 @@ class School:
         Returns:
             School: Shallow copy of School object.
         """
-        copy = School(self._nces__id, self.__total_sudents, self.__total_funding)
+        copy = School(self.__id, self.__total_students, self.__total_funding, nces_id=self.__nces_id)
         for neighbor in self.__neighbors:
             copy.add_neighbor(neighbor)
         return copy
@@ -103,7 +121,7 @@ class School:
         Returns:
             School: Deep copy of School object.
         """
-        copy = School(self._nces__id, self.__total_sudents, self.__total_funding)
+        copy = School(self.__id, self.__total_students, self.__total_funding, nces_id=self.__nces_id)
         for neighbor in self.__neighbors:
             copy.add_neighbor(copy.copy(neighbor))
         return copy
@@ -114,23 +132,36 @@ class District:
     necessary properties.
 
     Attributes:
+        __id (int): Interned ID (i.e., the district's dense index within its
+            state).
         __nces_id (str): Standardized NCES ID.
         __total_students (int): Total number of students.
         __total_funding (float): Total funding available.
         __schools (set): Set of all assigned Schools.
     """
+    __id = None
     __nces_id = None
     __total_students = None
     __total_funding = None
     __schools = None
     
-    def __init__(self, nces_id):
-        self.__nces_id = nces_id
+    def __init__(self, district_id, nces_id=None):
+        self.__id = district_id
+        self.__nces_id = nces_id if nces_id is not None else district_id
         self.__total_students = 0
         self.__total_funding = 0
         self.__schools = set([])
         
     def get_id(self):
+        """
+        Getter method for district's (interned) ID.
+
+        Returns:
+            int: Interned ID (should never be nullable).
+        """
+        return self.__id
+
+    def get_nces_id(self):
         """
         Getter method for district's NCES ID.
 
@@ -194,7 +225,7 @@ class District:
         
     def __str__(self):
         return "< ID: '{}' | Schools: {} | Students: {} | Funding: {:.01f} >".format(
-            self.get_id(),
+            self.get_nces_id(),
             len(self.get_schools()),
             self.get_total_students(),
             self.get_total_funding()
@@ -202,6 +233,11 @@ class District:
     
     def __repr__(self):
         return str(self)
+
+    def __hash__(self):
+        # Hash by (interned) ID, so that iterating over sets of entities is
+        # deterministic across processes (equality is still by identity)
+        return hash(self.__id)
     
     def __copy__(self):
         """
@@ -211,7 +247,7 @@ class District:
         Returns:
             District: Shallow copy of District object.
         """
-        copy = District(self.__nces_id)
+        copy = District(self.__id, nces_id=self.__nces_id)
         for school in self.__schools:
             copy.add_school(school)
         return copy
@@ -225,7 +261,7 @@ class District:
         Returns:
             District: Deep copy of District object.
         """
-        copy = District(self.__nces_id)
+        copy = District(self.__id, nces_id=self.__nces_id)
         for school in self.__schools:
             copy.add_school(copy.copy(school))
         return copy
\ No newline at end of file
@@ -1,139 +1,84 @@
 """
 Implements a "holdout queue" data structure, which allows for items to be
-conditionally held out from the results upon dequeing.
+held out from the results upon dequeing, until they are explicitly notified.
 """
-from queue import Queue
+from collections import deque
 
-class _HoldoutQueueItemWrapper:
-    """
-    Wrapper class for any item to be added onto HoldoutQueue. All instances of
-    this class allow storage of both an actual item and an associated (static)
-    tag.
-
-    Attributes:
-        __item (Object): Stored item.
-        __tag (Object): Stored tag.
-    """
-    __item = None
-    __tag = None
-    
-    def __init__(self, item, tag):
-        self.__item = item
-        self.__tag = tag
-        
-    def get_data(self):
-        """
-        Getter method for the stored (unmodified) item.
-
-        Returns:
-            Object: Unmodified stored item.
-        """
-        return self.__item
-    
-    def get_tag(self):
-        """
-        Getter method for the stored item's tag.
-
-        Returns:
-            Object: Unmodified stored tag.
-        """
-        return self.__tag
-        
 class HoldoutQueue:
     """
     This class implements a holdout queue that, in addition to the functionality
-    of a standard (FIFO) queue, allows for filtering on items upon dequeue. More
-    specifically, instead of returning the first-most item in the queue, only
-    the first item that validates a specified filtering condition will be
-    dequeued. All other items will be held out as if the queue were empty,
-    preserving their initial order.
+    of a standard (FIFO) queue, holds out all enqueued items until they are
+    notified (e.g., because something they depend on has changed). Only
+    notified items can be dequeued, in the same order they were notified. All
+    other items will be held out as if the queue were empty.
 
-    Internally, this class operates on top of two independent (FIFO) queues. The
-    first (i.e., primary queue) is where all items are either enqueued to or
-    dequeued from. The second queue (i.e., leftover queue) is where all items
-    dequeued from the former queue get enqueued in case they do not validate the
-    specified condition. When the primary queue becomes empty, then instances of
-    this class can be 'recycled', swapping the primary and leftover queues.
+    Internally, held items are indexed by their ID, so that notifying an item
+    (i.e., moving it onto a ready deque) takes constant time, regardless of how
+    many items are being held. Notifications for items that are not being held
+    (or that were already notified) are ignored. Dequeuing all ready items then
+    takes time linear to their number, rather than to the number of held items.
 
     Attributes:
-        __primary_queue (Queue): Underlying primary queue.
-        __leftover_queue (Queue): Unerlying leftover queue.
-        __get_item_tag (function): Function to calculate an item's tag.
-        __is_valid (function): Function to validate an item (based on its tag).
+        __held_items (dict): Mapping between the IDs of all held items (that
+            were not notified yet) and the items themselves.
+        __ready_queue (collections.deque): Underlying (FIFO) queue of notified
+            items.
+        __item_id (function): Function to get an item's unique ID.
 
     Example:
-        >>> def is_even(n):
-        ...     return n%2 == 0
-        >>> holdout_queue = HoldoutQueue(is_valid=is_even)
+        >>> holdout_queue = HoldoutQueue()
         >>> for i in range(5):
         ...     holdout_queue.enqueue(i)
+        >>> holdout_queue.notify(4)
+        >>> holdout_queue.notify(2)
+        >>> print(holdout_queue.dequeue())
+        4
         >>> print(holdout_queue.dequeue())
         2
         >>> print(holdout_queue.dequeue())
-        4
+        None
     """
-    __primary_queue = None
-    __leftover_queue = None
-    __get_item_tag = None
-    __is_valid = None
-    
-    def __init__(self, get_item_tag=lambda x:x, is_valid=lambda x:True):
-        self.__primary_queue = Queue()
-        self.__leftover_queue = Queue()
-        self.__get_item_tag = get_item_tag
-        self.__is_valid = is_valid
-    
-    def recycle(self):
-        """
-        Recycles the holdout queue, swapping the primary and leftover queues.
-        """
-        self.__primary_queue, self.__leftover_queue = self.__leftover_queue, self.__primary_queue
-    
+    __held_items = None
+    __ready_queue = None
+    __item_id = None
+
+    def __init__(self, item_id=lambda x:x):
+        self.__held_items = {}
+        self.__ready_queue = deque()
+        self.__item_id = item_id
+
     def enqueue(self, item):
         """
-        Wraps a new item with _HoldoutQueueItemWrapper and adds it at the end of
-        the holdout queue.
+        Adds a new item to the holdout queue, where it is held out until it gets
+        notified.
 
         Args:
             item (Object): Item to be added.
         """
-        item_wrapper = _HoldoutQueueItemWrapper(
-            item,
-            self.__get_item_tag(item)
-        )
-        self.__primary_queue.put(item_wrapper)
-        
-    def get_primary_queue(self):
+        self.__held_items[self.__item_id(item)] = item
+
+    def notify(self, item_id):
         """
-        Getter method for the holdout queue's primary queue.
+        Marks a held item as ready to be dequeued (if it is being held).
 
-        Returns:
-            Queue: Primary queue.
+        Args:
+            item_id (Object): Target item's unique ID.
         """
-        return self.__primary_queue
-        
+        item = self.__held_items.pop(item_id, None)
+        if item is not None:
+            self.__ready_queue.append(item)
+
     def dequeue(self):
         """
-        Retrieves the first valid _HoldoutQueueItemWrapper from the beginning of
-        the holdout queue.
+        Retrieves the first notified item from the beginning of the holdout
+        queue.
 
         Returns:
-            Object: First valid item from the primary queue, or None if primary
-                queue is empty.
+            Object: First notified item, or None if no held item was notified.
         """
-        while True:
-            if self.__is_empty():
-                return None
-            item_wrapper = self.__primary_queue.get()
-            if self.__is_valid(item_wrapper):
-                return item_wrapper.get_data()
-            self.__leftover_queue.put(item_wrapper)
-            
-    def __is_empty(self):
-        """
-        Checks whether the primary queue is empty.
+        if len(self.__ready_queue) == 0:
+            return None
+        return self.__ready_queue.popleft()
 
-        Returns:
-            bool: 'true' if primary queue is empty, 'false' otherwise.
-        """
-        return self.__primary_queue.empty()
\ No newline at end of file
+    def __len__(self):
+        return len(self.__held_items) + len(self.__ready_queue)
@@ -0,0 +1,472 @@
+"""
+Implements an "inequality delta" evaluator, which calculates the exact change of
+the Spatial Inequality Index caused by redistricting a single school (without
+performing the move).
+
+Running this module directly (i.e., `python -m optimization.inequality_delta`)
+checks it against a fresh InequalityTracker over a small toy state.
+"""
+import math
+
+from collections import Counter
+
+def get_edge_key(district_id, other_district_id):
+    """
+    Gets the (order-independent) key of the edges between two districts.
+
+    Args:
+        district_id (int): Interned district ID.
+        other_district_id (int): Interned (other) district ID.
+
+    Returns:
+        tuple: Both IDs, in increasing order.
+    """
+    return (district_id, other_district_id) if district_id < other_district_id else (other_district_id, district_id)
+
+class InequalityDelta:
+    """
+    This class evaluates by how much redistricting a single school would change
+    the Spatial Inequality Index (see
+    `optimization.inequality_tracker.InequalityTracker`), on top of any
+    number of previously registered (i.e., 'virtual') moves. The underlying
+    state is never modified, but all registered moves are kept in a local
+    overlay until it is reset (e.g., once all moves for a district are
+    selected).
+
+    Redistricting a school from one district to another only changes (i) both
+    districts' benefits (i.e., per-student funding), and (ii) the edges between
+    both districts and the districts of the school's neighbors (which may be
+    created or destroyed). As such, only the contributions of both districts
+    and their neighbors change. Both districts' contributions are re-evaluated
+    from scratch, while every other affected district's contribution is updated
+    in constant time, by replacing its terms for both districts (and its number
+    of neighbors) in its cached contribution. Evaluating a move then takes
+    O(d + k) time, where d is the number of districts neighboring either
+    district and k the number of neighbors of the redistricted school.
+
+    NOTE: Since cached contributions are updated rather than re-evaluated,
+    changes are exact up to floating point error.
+
+    Attributes:
+        __inequality_tracker
+            (optimization.inequality_tracker.InequalityTracker): Up-to-date
+            InequalityTracker instance (i.e., over the underlying state).
+        __get_district_id (function): Function to get a school's district ID
+            through its ID.
+        __get_school_neighbor_ids (function): Function to get the IDs of a
+            school's neighboring schools through its ID.
+        __get_district_totals (function): Function to get a district's number
+            of schools, total number of students and total funding through its
+            ID.
+        __get_edge_count (function): Function to get the number of edges
+            between two districts through their IDs.
+        __get_neighbor_ids (function): Function to get the IDs of a district's
+            neighboring districts through its ID.
+        __get_n_neighbors (function): Function to get a district's number of
+            neighboring districts through its ID.
+        __district_id_by_school_id (dict): Overlay of all registered schools'
+            district IDs.
+        __totals_by_district_id (dict): Overlay of districts' number of
+            schools, total number of students and total funding.
+        __benefit_by_district_id (dict): Overlay of districts' benefits (None
+            for districts without schools).
+        __contribution_by_district_id (dict): Overlay of districts'
+            contributions to the index's numerator.
+        __edge_count_by_district_ids (dict): Overlay of edge counts between
+            pairs of districts (see `get_edge_key`).
+        __neighbor_ids_by_district_id (dict): Overlay of districts' sets of
+            neighboring districts' IDs.
+        __overall_inequality (float): Sum of all contributions (with all
+            registered moves).
+        __normalization_factor (float): Sum of all benefits (with all
+            registered moves).
+        __pending_move (tuple): Last evaluated move, along with all of its
+            changes (to be registered by `commit`), or None.
+
+    Example:
+        >>> inequality_delta.reset()
+        >>> if inequality_delta.evaluate(school_id, from_id, to_id, 150, 1.2e6) < 0:
+        ...     inequality_delta.commit()
+    """
+    __inequality_tracker = None
+    __get_district_id = None
+    __get_school_neighbor_ids = None
+    __get_district_totals = None
+    __get_edge_count = None
+    __get_neighbor_ids = None
+    __get_n_neighbors = None
+
+    __district_id_by_school_id = None
+    __totals_by_district_id = None
+    __benefit_by_district_id = None
+    __contribution_by_district_id = None
+    __edge_count_by_district_ids = None
+    __neighbor_ids_by_district_id = None
+    __overall_inequality = None
+    __normalization_factor = None
+    __pending_move = None
+
+    def __init__(self, inequality_tracker, get_district_id, get_school_neighbor_ids, get_district_totals, get_edge_count, get_neighbor_ids, get_n_neighbors):
+        self.__inequality_tracker = inequality_tracker
+        self.__get_district_id = get_district_id
+        self.__get_school_neighbor_ids = get_school_neighbor_ids
+        self.__get_district_totals = get_district_totals
+        self.__get_edge_count = get_edge_count
+        self.__get_neighbor_ids = get_neighbor_ids
+        self.__get_n_neighbors = get_n_neighbors
+        self.reset()
+
+    def reset(self):
+        """
+        Discards all registered moves (e.g., after the underlying state and
+        InequalityTracker instance were updated).
+        """
+        self.__district_id_by_school_id = {}
+        self.__totals_by_district_id = {}
+        self.__benefit_by_district_id = {}
+        self.__contribution_by_district_id = {}
+        self.__edge_count_by_district_ids = {}
+        self.__neighbor_ids_by_district_id = {}
+        self.__overall_inequality = self.__inequality_tracker.get_overall_inequality()
+        self.__normalization_factor = self.__inequality_tracker.get_normalization_factor()
+        self.__pending_move = None
+
+    def get_inequality(self):
+        """
+        Getter method for the Spatial Inequality Index (with all registered
+        moves).
+
+        Returns:
+            float: Spatial inequality across all districts.
+        """
+        return self.__overall_inequality / self.__normalization_factor
+
+    def evaluate(self, school_id, from_district_id, to_district_id, school_students, school_funding):
+        """
+        Calculates the change of the Spatial Inequality Index caused by
+        redistricting a school (on top of all registered moves). The move can
+        then be registered through `commit`.
+
+        Args:
+            school_id (int): Interned ID of the school to redistrict.
+            from_district_id (int): Interned ID of the school's district.
+            to_district_id (int): Interned ID of the school's new district.
+            school_students (int): School's total number of students.
+            school_funding (float): School's total funding.
+
+        Returns:
+            float: Change of the Spatial Inequality Index (negative if it would
+                be reduced).
+        """
+        # Calculate both districts' new totals and benefits
+        moved_ids = (from_district_id, to_district_id)
+        n_schools, total_students, total_funding = self.__get_totals(from_district_id)
+        new_totals = {from_district_id: (n_schools - 1, total_students - school_students, total_funding - school_funding)}
+        n_schools, total_students, total_funding = self.__get_totals(to_district_id)
+        new_totals[to_district_id] = (n_schools + 1, total_students + school_students, total_funding + school_funding)
+        new_benefits = {
+            district_id: total_funding / total_students if n_schools > 0 else None
+            for district_id, (n_schools, total_students, total_funding) in new_totals.items()
+        }
+        # Calculate all changed edge counts (by the districts of the school's neighbors)
+        edge_deltas = Counter()
+        for district_id, edge_count in Counter(map(self.__get_school_district_id, self.__get_school_neighbor_ids(school_id))).items():
+            if district_id != from_district_id:
+                edge_deltas[get_edge_key(from_district_id, district_id)] -= edge_count
+            if district_id != to_district_id:
+                edge_deltas[get_edge_key(to_district_id, district_id)] += edge_count
+        new_edge_counts = {
+            key: self.__get_edge_count_by_ids(*key) + edge_delta
+            for key, edge_delta in edge_deltas.items()
+        }
+        # Calculate both districts' new neighborhoods (only changed edges can create/destroy neighbors)
+        new_neighbor_ids = {}
+        for district_id in moved_ids:
+            neighbor_ids = set(self.__get_neighbor_id_set(district_id))
+            for key, edge_count in new_edge_counts.items():
+                if district_id in key:
+                    other_district_id = key[1] if key[0] == district_id else key[0]
+                    if edge_count > 0:
+                        neighbor_ids.add(other_district_id)
+                    else:
+                        neighbor_ids.discard(other_district_id)
+            new_neighbor_ids[district_id] = neighbor_ids
+        # Re-evaluate both districts' contributions
+        get_new_benefit = lambda x: new_benefits[x] if x in new_benefits else self.__get_benefit(x)
+        new_contributions = {}
+        for district_id in moved_ids:
+            benefit = new_benefits[district_id]
+            if benefit is None:
+                new_contributions[district_id] = None
+                continue
+            abs_diffs = [abs(benefit - get_new_benefit(x)) for x in new_neighbor_ids[district_id]]
+            new_contributions[district_id] = math.fsum(abs_diffs) / (len(abs_diffs) + 1)
+        # Update all other affected districts' contributions (replacing their terms for both districts)
+        old_neighbor_ids = {district_id: self.__get_neighbor_id_set(district_id) for district_id in moved_ids}
+        affected_ids = old_neighbor_ids[from_district_id].union(
+            old_neighbor_ids[to_district_id],
+            *new_neighbor_ids.values()
+        ).difference(moved_ids)
+        for district_id in affected_ids:
+            benefit = self.__get_benefit(district_id)
+            n_neighbors = self.__get_n_neighbors_by_id(district_id)
+            abs_diff_sum = self.__get_contribution(district_id) * (n_neighbors + 1)
+            for moved_id in moved_ids:
+                if district_id in old_neighbor_ids[moved_id]:
+                    abs_diff_sum -= abs(benefit - self.__get_benefit(moved_id))
+                    n_neighbors -= 1
+                if district_id in new_neighbor_ids[moved_id]:
+                    abs_diff_sum += abs(benefit - new_benefits[moved_id])
+                    n_neighbors += 1
+            new_contributions[district_id] = abs_diff_sum / (n_neighbors + 1)
+        # Calculate the index's change
+        overall_inequality = self.__overall_inequality + math.fsum(
+            (contribution or 0) - self.__get_contribution(district_id)
+            for district_id, contribution in new_contributions.items()
+        )
+        normalization_factor = self.__normalization_factor + math.fsum(
+            (new_benefits[district_id] or 0) - self.__get_benefit(district_id)
+            for district_id in moved_ids
+        )
+        self.__pending_move = (
+            school_id,
+            to_district_id,
+            new_totals,
+            new_benefits,
+            new_contributions,
+            new_edge_counts,
+            new_neighbor_ids,
+            overall_inequality,
+            normalization_factor
+        )
+        return overall_inequality / normalization_factor - self.get_inequality()
+
+    def commit(self):
+        """
+        Registers the last evaluated move (see `evaluate`), so that all
+        following moves are evaluated on top of it.
+
+        Raises:
+            ValueError: Whenever no move was evaluated since the last
+                registered one.
+        """
+        if self.__pending_move is None:
+            raise ValueError("Attempting to register a move wo/ evaluating it...")
+        (
+            school_id,
+            to_district_id,
+            new_totals,
+            new_benefits,
+            new_contributions,
+            new_edge_counts,
+            new_neighbor_ids,
+            overall_inequality,
+            normalization_factor
+        ) = self.__pending_move
+        self.__district_id_by_school_id[school_id] = to_district_id
+        self.__totals_by_district_id.update(new_totals)
+        self.__benefit_by_district_id.update(new_benefits)
+        self.__contribution_by_district_id.update(new_contributions)
+        # Update edge counts (and the neighborhoods of all districts whose edges were created/destroyed)
+        for key, edge_count in new_edge_counts.items():
+            if (self.__get_edge_count_by_ids(*key) > 0) != (edge_count > 0):
+                for district_id, other_district_id in [key, key[::-1]]:
+                    neighbor_ids = self.__get_neighbor_id_set(district_id)
+                    if edge_count > 0:
+                        neighbor_ids.add(other_district_id)
+                    else:
+                        neighbor_ids.discard(other_district_id)
+            self.__edge_count_by_district_ids[key] = edge_count
+        self.__neighbor_ids_by_district_id.update(new_neighbor_ids)
+        self.__overall_inequality = overall_inequality
+        self.__normalization_factor = normalization_factor
+        self.__pending_move = None
+
+    def __get_school_district_id(self, school_id):
+        """
+        Gets a school's district ID (with all registered moves).
+
+        Args:
+            school_id (int): Interned school ID.
+
+        Returns:
+            int: Interned district ID.
+        """
+        district_id = self.__district_id_by_school_id.get(school_id, None)
+        return district_id if district_id is not None else self.__get_district_id(school_id)
+
+    def __get_totals(self, district_id):
+        """
+        Gets a district's number of schools, total number of students and total
+        funding (with all registered moves).
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            tuple: District's number of schools, total number of students and
+                total funding.
+        """
+        totals = self.__totals_by_district_id.get(district_id, None)
+        return totals if totals is not None else self.__get_district_totals(district_id)
+
+    def __get_benefit(self, district_id):
+        """
+        Gets a district's benefit (with all registered moves).
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            float: District's benefit (or 0 for districts without schools).
+        """
+        if district_id in self.__benefit_by_district_id:
+            return self.__benefit_by_district_id[district_id] or 0
+        return self.__inequality_tracker.get_benefit(district_id) or 0
+
+    def __get_contribution(self, district_id):
+        """
+        Gets a district's contribution to the index's numerator (with all
+        registered moves).
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            float: District's contribution (or 0 for districts without
+                schools).
+        """
+        if district_id in self.__contribution_by_district_id:
+            return self.__contribution_by_district_id[district_id] or 0
+        return self.__inequality_tracker.get_contribution(district_id) or 0
+
+    def __get_edge_count_by_ids(self, district_id, other_district_id):
+        """
+        Gets the number of edges between two districts (with all registered
+        moves).
+
+        Args:
+            district_id (int): Interned district ID.
+            other_district_id (int): Interned (other) district ID.
+
+        Returns:
+            int: Number of edges between both districts.
+        """
+        edge_count = self.__edge_count_by_district_ids.get(get_edge_key(district_id, other_district_id), None)
+        return edge_count if edge_count is not None else self.__get_edge_count(district_id, other_district_id)
+
+    def __get_neighbor_id_set(self, district_id):
+        """
+        Gets the set of a district's neighboring districts' IDs (with all
+        registered moves), which is cached upon first access.
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            set of int: Interned IDs of all neighboring districts.
+        """
+        neighbor_ids = self.__neighbor_ids_by_district_id.get(district_id, None)
+        if neighbor_ids is None:
+            neighbor_ids = set(self.__get_neighbor_ids(district_id))
+            self.__neighbor_ids_by_district_id[district_id] = neighbor_ids
+        return neighbor_ids
+
+    def __get_n_neighbors_by_id(self, district_id):
+        """
+        Gets a district's number of neighboring districts (with all registered
+        moves).
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            int: Number of neighboring districts.
+        """
+        neighbor_ids = self.__neighbor_ids_by_district_id.get(district_id, None)
+        return len(neighbor_ids) if neighbor_ids is not None else self.__get_n_neighbors(district_id)
+
+if __name__ == "__main__":
+    from optimization.inequality_tracker import InequalityTracker
+
+    ###################
+    # Toy State
+    ###################
+
+    # Schools laid out in a 2x4 grid (0-1-2-3 over 4-5-6-7), one column per district
+    neighbor_ids_by_school_id = {
+        0: [1, 4], 1: [0, 2, 5], 2: [1, 3, 6], 3: [2, 7],
+        4: [0, 5], 5: [1, 4, 6], 6: [2, 5, 7], 7: [3, 6]
+    }
+    students_by_school_id = {0: 100, 1: 250, 2: 80, 3: 120, 4: 300, 5: 90, 6: 200, 7: 150}
+    funding_by_school_id = {0: 1.0e6, 1: 3.5e6, 2: 0.6e6, 3: 1.8e6, 4: 2.4e6, 5: 1.1e6, 6: 1.6e6, 7: 2.7e6}
+    initial_assignment = {0: 0, 4: 0, 1: 1, 5: 1, 2: 2, 6: 2, 3: 3, 7: 3}
+
+    ###################
+    # Utility Functions
+    ###################
+
+    # Utility functions to query a given assignment
+    def get_district_totals(assignment, district_id):
+        school_ids = [x for x, y in assignment.items() if y == district_id]
+        return (
+            len(school_ids),
+            sum(students_by_school_id[x] for x in school_ids),
+            sum(funding_by_school_id[x] for x in school_ids)
+        )
+
+    def get_edge_count(assignment, district_id, other_district_id):
+        return sum(
+            assignment[neighbor_id] == other_district_id
+            for school_id, x in assignment.items() if x == district_id
+            for neighbor_id in neighbor_ids_by_school_id[school_id]
+        )
+
+    def get_neighbor_ids(assignment, district_id):
+        return sorted(
+            x for x in set(assignment.values())
+            if x != district_id and get_edge_count(assignment, district_id, x) > 0
+        )
+
+    def build_inequality_tracker(assignment):
+        totals_by_district_id = {x: get_district_totals(assignment, x) for x in set(assignment.values())}
+        return InequalityTracker(
+            item_ids=totals_by_district_id.keys(),
+            get_benefit=lambda x: totals_by_district_id[x][2] / totals_by_district_id[x][1],
+            get_neighbor_ids=lambda x: get_neighbor_ids(assignment, x)
+        )
+
+    ###################
+    # Tests
+    ###################
+
+    # Evaluate moves on top of the (unmodified) initial state
+    inequality_delta = InequalityDelta(
+        build_inequality_tracker(initial_assignment),
+        get_district_id=initial_assignment.__getitem__,
+        get_school_neighbor_ids=neighbor_ids_by_school_id.__getitem__,
+        get_district_totals=lambda x: get_district_totals(initial_assignment, x),
+        get_edge_count=lambda x, y: get_edge_count(initial_assignment, x, y),
+        get_neighbor_ids=lambda x: get_neighbor_ids(initial_assignment, x),
+        get_n_neighbors=lambda x: len(get_neighbor_ids(initial_assignment, x))
+    )
+    # Moving schools 5 and 2 empties districts 1 and 2, respectively
+    assignment = dict(initial_assignment)
+    for school_id, to_district_id in [(1, 0), (6, 3), (5, 0), (2, 0)]:
+        from_district_id = assignment[school_id]
+        inequality_before = inequality_delta.get_inequality()
+        change = inequality_delta.evaluate(
+            school_id,
+            from_district_id,
+            to_district_id,
+            students_by_school_id[school_id],
+            funding_by_school_id[school_id]
+        )
+        inequality_delta.commit()
+        assignment[school_id] = to_district_id
+        expected_inequality = build_inequality_tracker(assignment).get_inequality()
+        assert math.isclose(inequality_delta.get_inequality(), expected_inequality), \
+            f"Wrong result. Expected '{expected_inequality}', got '{inequality_delta.get_inequality()}'."
+        assert math.isclose(change, expected_inequality - inequality_before, abs_tol=1e-12), \
+            f"Wrong result. Expected '{expected_inequality - inequality_before}', got '{change}'."
+    print("All tests passed!")
@@ -0,0 +1,186 @@
+"""
+Implements an "inequality tracker" data structure, which incrementally keeps
+the Spatial Inequality Index up to date as items change (instead of recomputing
+it from scratch).
+"""
+import math
+
+class InequalityTracker:
+    """
+    This class tracks the Spatial Inequality Index over a population whose
+    benefits and neighborhoods change over time. Instead of iterating over the
+    whole population whenever the index is queried, it caches each item's
+    contribution to the index (i.e., the average absolute difference between
+    its benefit and that of its immediate neighborhood, itself included) and the
+    index's normalization factor (i.e., the sum of all benefits).
+
+    Whenever a set of items changes, only their contributions and those of
+    their (current) immediate neighbors need to be re-evaluated. For our
+    algorithm, redistricting a school changes the per-student funding of its
+    source and destination districts, which in turn only affects the
+    contributions of both districts and their neighbors. Any neighbor that
+    loses its edges to the source district necessarily gains edges to the
+    destination district, so it is always re-evaluated.
+
+    Attributes:
+        __get_benefit (function): Function to calculate an item's benefit
+            through its ID.
+        __get_neighbor_ids (function): Function to retrieve the IDs of an
+            item's (current) neighbors through its ID.
+        __benefit_dict (dict): Mapping between an item's ID and its last
+            recorded benefit.
+        __contribution_dict (dict): Mapping between an item's ID and its last
+            recorded contribution to the index's numerator.
+        __overall_inequality (float): Sum of all recorded contributions.
+        __normalization_factor (float): Sum of all recorded benefits.
+
+    Example:
+        >>> benefits = {"A": 1.0, "B": 2.0, "C": 4.0}
+        >>> neighbors = {"A": ["B"], "B": ["A", "C"], "C": ["B"]}
+        >>> tracker = InequalityTracker(
+        ...     item_ids=benefits.keys(),
+        ...     get_benefit=lambda x: benefits[x],
+        ...     get_neighbor_ids=lambda x: neighbors[x])
+        >>> print(round(tracker.get_inequality(), 4))
+        0.3571
+        >>> # Change a single benefit and update the tracker
+        >>> benefits["C"] = 2.0
+        >>> tracker.update(["C"])
+        >>> print(round(tracker.get_inequality(), 4))
+        0.1667
+    """
+    __get_benefit = None
+    __get_neighbor_ids = None
+
+    __benefit_dict = None
+    __contribution_dict = None
+    __overall_inequality = None
+    __normalization_factor = None
+
+    def __init__(self, item_ids, get_benefit, get_neighbor_ids):
+        self.__get_benefit = get_benefit
+        self.__get_neighbor_ids = get_neighbor_ids
+        self.__benefit_dict = {}
+        self.__contribution_dict = {}
+        self.__overall_inequality = 0
+        self.__normalization_factor = 0
+        # Record all benefits before calculating any contribution
+        item_ids = list(item_ids)
+        for item_id in item_ids:
+            self.__set_benefit(item_id)
+        for item_id in item_ids:
+            self.__set_contribution(item_id)
+
+    def get_inequality(self):
+        """
+        Getter method for the current Spatial Inequality Index.
+
+        Returns:
+            float: Spatial inequality across all tracked items.
+        """
+        return self.__overall_inequality / self.__normalization_factor
+
+    def get_overall_inequality(self):
+        """
+        Getter method for the index's numerator (i.e., the sum of all recorded
+        contributions).
+
+        Returns:
+            float: Sum of all recorded contributions.
+        """
+        return self.__overall_inequality
+
+    def get_normalization_factor(self):
+        """
+        Getter method for the index's normalization factor (i.e., the sum of
+        all recorded benefits).
+
+        Returns:
+            float: Sum of all recorded benefits.
+        """
+        return self.__normalization_factor
+
+    def get_benefit(self, item_id):
+        """
+        Getter method for an item's last recorded benefit.
+
+        Args:
+            item_id (Object): Target item's ID.
+
+        Returns:
+            float: Item's benefit (or None if the item is not tracked).
+        """
+        return self.__benefit_dict.get(item_id, None)
+
+    def get_contribution(self, item_id):
+        """
+        Getter method for an item's current contribution to the index's
+        numerator.
+
+        Args:
+            item_id (Object): Target item's ID.
+
+        Returns:
+            float: Item's contribution (or None if the item is not tracked).
+        """
+        return self.__contribution_dict.get(item_id, None)
+
+    def update(self, item_ids):
+        """
+        Re-evaluates the benefit of all changed items and the contributions of
+        both them and their current immediate neighbors. Items that are no
+        longer tracked (i.e., removed) are ignored.
+
+        Args:
+            item_ids (iterable): IDs of all items whose benefit (or
+                neighborhood) has changed.
+        """
+        changed_ids = sorted(filter(lambda x: x in self.__benefit_dict, set(item_ids)))
+        for item_id in changed_ids:
+            self.__set_benefit(item_id)
+        affected_ids = set(changed_ids)
+        for item_id in changed_ids:
+            affected_ids.update(self.__get_neighbor_ids(item_id))
+        for item_id in sorted(affected_ids):
+            self.__set_contribution(item_id)
+
+    def remove(self, item_id):
+        """
+        Stops tracking an item (e.g., a district that no longer has any
+        schools). Its former neighbors should be updated afterwards.
+
+        Args:
+            item_id (Object): Target item's ID.
+        """
+        self.__normalization_factor -= self.__benefit_dict.pop(item_id, 0)
+        self.__overall_inequality -= self.__contribution_dict.pop(item_id, 0)
+
+    def __set_benefit(self, item_id):
+        """
+        Records an item's (current) benefit and updates the normalization
+        factor accordingly.
+
+        Args:
+            item_id (Object): Target item's ID.
+        """
+        new_benefit = self.__get_benefit(item_id)
+        self.__normalization_factor += new_benefit - self.__benefit_dict.get(item_id, 0)
+        self.__benefit_dict[item_id] = new_benefit
+
+    def __set_contribution(self, item_id):
+        """
+        Records an item's (current) contribution to the index's numerator, based
+        on the last recorded benefits, and updates the overall inequality
+        accordingly.
+
+        Args:
+            item_id (Object): Target item's ID.
+        """
+        if item_id not in self.__benefit_dict:
+            return
+        benefit = self.__benefit_dict[item_id]
+        neighbor_ids = self.__get_neighbor_ids(item_id)
+        abs_diffs = [abs(benefit - self.__benefit_dict[x]) for x in neighbor_ids]
+        new_contribution = math.fsum(abs_diffs) / (len(abs_diffs) + 1)
+        self.__overall_inequality += new_contribution - self.__contribution_dict.get(item_id, 0)
+        self.__contribution_dict[item_id] = new_contribution
@@ -1,6 +1,7 @@
 """
 Implements a "lazy heap" data structure, which provides a max-heap behavior but
-uses lazy evaluation for optimized node update and removal.
+uses lazy evaluation for optimized node update and removal. An addressable
+"indexed heap" alternative is also provided, which updates nodes in place.
 """
 import copy
 
@@ -100,12 +101,27 @@ class LazyHeap:
     happen without nodes being popped, there is a maximum number of nodes
     allowed before the whole tree is pruned of deleted nodes and rebuilt.
 
+    If a 'key' function is provided, items' priorities are computed once (upon
+    push or update) and cached in '(-key, -tiebreak, n_pushes, id)' tuples,
+    instead of being compared through 'gt' on every sift. Ties are broken by
+    the (greater) 'tiebreak' value of each item, if a 'tiebreak' function is
+    provided, and then in insertion order. Since cached priorities never
+    change, outdated tuples need not be frozen either, and are simply
+    discarded when popped.
+
     Attributes:
         __data (list): Heapified list of all items.
         __item_id (function): Function to extract a unique ID from an item.
         __gt (function): 'Greater than' function to compare items in the heap.
+        __key (function): Function to calculate an item's (numeric) priority,
+            or None.
+        __tiebreak (function): Function to calculate an item's (numeric)
+            tiebreak, or None.
         __lazy_eval_map (dict): Mapping from a unique ID to all (non-deleted)
-            _LazyHeapNode instances.
+            _LazyHeapNode instances (or cached priority tuples).
+        __item_map (dict): Mapping from a unique ID to its (non-deleted) item,
+            only used with a 'key' function.
+        __n_pushes (int): Number of pushes so far, used as a last tiebreak.
         __max_elems (int): Maximum number of elements allowed in the heap.
 
     Example:
@@ -120,38 +136,78 @@ class LazyHeap:
         ...     SoccerPlayer("B", 7),
         ...     SoccerPlayer("C", 5)]
         >>> # Initialize max heap with all players
-        >>> max_heap = LazyHeap(
+        >>> heap = LazyHeap(
         ...     item_id=lambda x: x.name,
         ...     gt=lambda x,y: x.goals > y.goals)
         >>> for player in players:
         ...     heap.push(player)
         >>> print(heap.pop().name)
-        'A'
+        A
         >>> # Update heap entries
         >>> players[2].goals = 9
         >>> heap.update(players[2])
         >>> print(heap.pop().name)
-        'C'
+        C
+        >>> # Alternatively, build a heap with cached priorities in bulk
+        >>> heap = LazyHeap.from_items(
+        ...     players,
+        ...     item_id=lambda x: x.name,
+        ...     key=lambda x: x.goals)
+        >>> print(heap.pop().name)
+        A
     """
     __data = None
     __item_id = None
     __gt = None
+    __key = None
+    __tiebreak = None
     __lazy_eval_map = None
+    __item_map = None
+    __n_pushes = None
     
     __max_elems = None
     
-    def __init__(self, item_id=lambda x:x, gt=lambda x,y:x>y, max_elems=None):
+    def __init__(self, item_id=lambda x:x, gt=lambda x,y:x>y, max_elems=None, key=None, tiebreak=None):
         self.__data = []
         heapify(self.__data)
         self.__item_id = item_id
         self.__gt = gt
+        self.__key = key
+        self.__tiebreak = tiebreak
         self.__lazy_eval_map = {}
+        self.__item_map = {}
+        self.__n_pushes = 0
         self.__max_elems = max_elems
-        self.__is_full = False
+
+    @classmethod
+    def from_items(cls, items, **kwargs):
+        """
+        Builds a new heap with multiple items at once, by heapifying all of
+        them (instead of pushing each one individually).
+
+        Args:
+            items (iterable): Items to be added.
+            **kwargs: Keyword arguments for the heap's initialization.
+
+        Returns:
+            LazyHeap: New heap containing all items.
+
+        Raises:
+            IndexError: Whenever there are more items than the maximum number
+                of nodes allowed in the heap.
+        """
+        heap = cls(**kwargs)
+        for item in items:
+            heap.__data.append(heap.__make_node(item))
+        if (heap.__max_elems is not None) and (len(heap.__data) > heap.__max_elems):
+            raise IndexError("No more values can be added to the heap...")
+        heapify(heap.__data)
+        return heap
             
     def push(self, item):
         """
-        Wraps a new item with _LazyHeapNode and adds it to the max heap.
+        Wraps a new item with _LazyHeapNode (or a cached priority tuple) and
+        adds it to the max heap.
 
         Args:
             item (Object): Item to be added.
@@ -160,7 +216,6 @@ class LazyHeap:
             IndexError: Whenever the maximum number of nodes allowed in the heap
                 has been reached.
         """
-        new_node = _LazyHeapNode(item, self.__gt)
         # Check if heap size has not exceeded its maximum
         is_full = lambda: (self.__max_elems is not None) and (len(self.__data) >= self.__max_elems)
         if is_full():
@@ -168,25 +223,30 @@ class LazyHeap:
             self.__prune_heap()
             if is_full(): raise IndexError("No more values can be added to the heap...")
         # Push item onto heap and update lazy evaluation map
-        heappush(self.__data, new_node)
-        self.__lazy_eval_map[self.__item_id(item)] = new_node
+        heappush(self.__data, self.__make_node(item))
 
     def pop(self):
         """
-        Retrieves the first non-deleted _LazyHeapNode from the max heap.
+        Retrieves the first non-deleted item from the max heap.
 
         Returns:
-            _LazyHeapNode: First non-deleted item in the max heap, or None if
-                heap is empty.
+            Object: First non-deleted item in the max heap.
+
+        Raises:
+            IndexError: Whenever the heap is empty (or only holds deleted
+                nodes).
         """
         # Lazy evaluation of max heap
         while True:
             node = heappop(self.__data)
-            if node.is_deleted():
+            if self.__is_deleted(node):
                 continue
-            item = node.get_data()
-            self.__lazy_eval_map.pop(self.__item_id(item), None)
-            return item
+            if self.__key is None:
+                item = node.get_data()
+                self.__lazy_eval_map.pop(self.__item_id(item), None)
+                return item
+            self.__lazy_eval_map.pop(node[-1])
+            return self.__item_map.pop(node[-1])
     
     def update(self, item):
         """
@@ -199,16 +259,353 @@ class LazyHeap:
 
         Args:
             item (Object): Item to update.
+
+        Raises:
+            KeyError: Whenever the item does not exist in the heap.
         """
-        # Lazy delete of pre-existing item
-        self.__lazy_eval_map[self.__item_id(item)].delete()
+        # Lazy delete of pre-existing item (cached priorities are simply replaced)
+        node = self.__lazy_eval_map[self.__item_id(item)]
+        if self.__key is None:
+            node.delete()
         # Re-push item into heap
         self.push(item)
+
+    def __make_node(self, item):
+        """
+        Wraps an item with _LazyHeapNode (or a cached priority tuple) and
+        registers it as the item's newest instance.
+
+        Args:
+            item (Object): Item to be wrapped.
+
+        Returns:
+            _LazyHeapNode or tuple: Wrapped item.
+        """
+        item_id = self.__item_id(item)
+        if self.__key is None:
+            node = _LazyHeapNode(item, self.__gt)
+        else:
+            node = (-self.__key(item), -self.__get_tiebreak(item), self.__n_pushes, item_id)
+            self.__item_map[item_id] = item
+        self.__n_pushes += 1
+        self.__lazy_eval_map[item_id] = node
+        return node
+
+    def __get_tiebreak(self, item):
+        """
+        Calculates an item's tiebreak (if a 'tiebreak' function was provided).
+
+        Args:
+            item (Object): Target item.
+
+        Returns:
+            float: Item's tiebreak (0 if no 'tiebreak' function was provided).
+        """
+        if self.__tiebreak is None:
+            return 0
+        return self.__tiebreak(item)
+
+    def __is_deleted(self, node):
+        """
+        Checks if a node is marked for (lazy) deletion.
+
+        Args:
+            node (_LazyHeapNode or tuple): Target node.
+
+        Returns:
+            bool: 'true' if node is marked for deletion, 'false' otherwise.
+        """
+        if self.__key is None:
+            return node.is_deleted()
+        return self.__lazy_eval_map.get(node[-1], None) is not node
     
     def __prune_heap(self):
         """
         Removes all lazily deleted nodes from the heap and heapifies the
         remaining ones.
         """
-        self.__data = list(filter(lambda x: not x.is_deleted(), self.__data))
-        heapify(self.__data)
\ No newline at end of file
+        self.__data = list(filter(lambda x: not self.__is_deleted(x), self.__data))
+        heapify(self.__data)
+
+
+class IndexedHeap:
+    """
+    This class implements an addressable (i.e., position-indexed) max heap. As
+    opposed to LazyHeap, items are never marked as deleted. Instead, the heap
+    keeps track of every item's position in its underlying binary tree, so an
+    updated item can be sifted up or down in place (i.e., increase/decrease
+    key).
+
+    Since no stale nodes are ever kept, items need not be copied (or frozen)
+    upon update and the heap never needs to be pruned. It does, however, assume
+    that whenever an item changes, it is updated before any other operation
+    takes place. Much like LazyHeap, if a 'key' function is provided, items'
+    priorities are computed once (upon push or update) and cached, instead of
+    being compared through 'gt' on every sift. Ties are broken by the (greater)
+    'tiebreak' value of each item, if a 'tiebreak' function is provided, and
+    then in insertion order.
+
+    Attributes:
+        __data (list): Binary tree of all items (as a list).
+        __priorities (list): Cached '(key, tiebreak, -n_pushes)' priority of
+            every item in __data, only used with a 'key' function.
+        __item_id (function): Function to extract a unique ID from an item.
+        __gt (function): 'Greater than' function to compare items in the heap.
+        __key (function): Function to calculate an item's (numeric) priority,
+            or None.
+        __tiebreak (function): Function to calculate an item's (numeric)
+            tiebreak, or None.
+        __position_map (dict): Mapping from a unique ID to the position of its
+            item in __data.
+        __n_pushes (int): Number of pushes so far, used as a last tiebreak.
+        __max_elems (int): Maximum number of elements allowed in the heap.
+
+    Example:
+        >>> class SoccerPlayer:
+        ...     def __init__(self, name, goals):
+        ...         self.name = name
+        ...         self.goals = goals
+        ...
+        >>> # Create three distinct players
+        >>> players = [
+        ...     SoccerPlayer("A", 10),
+        ...     SoccerPlayer("B", 7),
+        ...     SoccerPlayer("C", 5)]
+        >>> # Initialize max heap with all players
+        >>> heap = IndexedHeap.from_items(
+        ...     players,
+        ...     item_id=lambda x: x.name,
+        ...     key=lambda x: x.goals)
+        >>> print(heap.pop().name)
+        A
+        >>> # Update heap entries
+        >>> players[2].goals = 9
+        >>> heap.update(players[2])
+        >>> print(heap.pop().name)
+        C
+    """
+    __data = None
+    __priorities = None
+    __item_id = None
+    __gt = None
+    __key = None
+    __tiebreak = None
+    __position_map = None
+    __n_pushes = None
+
+    __max_elems = None
+
+    def __init__(self, item_id=lambda x:x, gt=lambda x,y:x>y, max_elems=None, key=None, tiebreak=None):
+        self.__data = []
+        self.__priorities = []
+        self.__item_id = item_id
+        self.__gt = gt
+        self.__key = key
+        self.__tiebreak = tiebreak
+        self.__position_map = {}
+        self.__n_pushes = 0
+        self.__max_elems = max_elems
+
+    @classmethod
+    def from_items(cls, items, **kwargs):
+        """
+        Builds a new heap with multiple items at once, by heapifying all of
+        them bottom-up (instead of pushing each one individually).
+
+        Args:
+            items (iterable): Items to be added.
+            **kwargs: Keyword arguments for the heap's initialization.
+
+        Returns:
+            IndexedHeap: New heap containing all items.
+
+        Raises:
+            IndexError: Whenever there are more items than the maximum number
+                of nodes allowed in the heap.
+        """
+        heap = cls(**kwargs)
+        for item in items:
+            if heap.__item_id(item) in heap.__position_map:
+                heap.__data[heap.__position_map[heap.__item_id(item)]] = item
+                continue
+            heap.__position_map[heap.__item_id(item)] = len(heap.__data)
+            heap.__data.append(item)
+            heap.__priorities.append(None)
+        if (heap.__max_elems is not None) and (len(heap.__data) > heap.__max_elems):
+            raise IndexError("No more values can be added to the heap...")
+        for position in range(len(heap.__data)):
+            heap.__set_priority(position)
+        for position in reversed(range(len(heap.__data) // 2)):
+            heap.__sift_down(position)
+        return heap
+
+    def push(self, item):
+        """
+        Adds a new item to the max heap. If an item with the same ID already
+        exists in the heap, it is updated instead.
+
+        Args:
+            item (Object): Item to be added.
+
+        Raises:
+            IndexError: Whenever the maximum number of nodes allowed in the heap
+                has been reached.
+        """
+        if self.__item_id(item) in self.__position_map:
+            self.update(item)
+            return
+        if (self.__max_elems is not None) and (len(self.__data) >= self.__max_elems):
+            raise IndexError("No more values can be added to the heap...")
+        self.__data.append(item)
+        self.__priorities.append(None)
+        self.__position_map[self.__item_id(item)] = len(self.__data) - 1
+        self.__set_priority(len(self.__data) - 1)
+        self.__sift_up(len(self.__data) - 1)
+
+    def pop(self):
+        """
+        Removes and retrieves the top-most item from the max heap.
+
+        Returns:
+            Object: Top-most item in the max heap.
+
+        Raises:
+            IndexError: Whenever the heap is empty.
+        """
+        if len(self.__data) == 0:
+            raise IndexError("pop from empty heap")
+        top_item = self.__data[0]
+        last_item = self.__data.pop()
+        last_priority = self.__priorities.pop()
+        del self.__position_map[self.__item_id(top_item)]
+        if len(self.__data) > 0:
+            self.__data[0] = last_item
+            self.__priorities[0] = last_priority
+            self.__position_map[self.__item_id(last_item)] = 0
+            self.__sift_down(0)
+        return top_item
+
+    def update(self, item):
+        """
+        Updates an item that already exists in the heap, by replacing its
+        previous instance and restoring the heap property in place.
+
+        NOTE: For this method to work as intended, __item_id has to equally
+        identify both the updated instance of the item and its previously
+        existing one.
+
+        Args:
+            item (Object): Item to update.
+
+        Raises:
+            KeyError: Whenever the item does not exist in the heap.
+        """
+        position = self.__position_map[self.__item_id(item)]
+        self.__data[position] = item
+        self.__set_priority(position)
+        position = self.__sift_up(position)
+        self.__sift_down(position)
+
+    def __len__(self):
+        return len(self.__data)
+
+    def __contains__(self, item):
+        return self.__item_id(item) in self.__position_map
+
+    def __set_priority(self, position):
+        """
+        Caches the priority of an item (if a 'key' function was provided).
+
+        Args:
+            position (int): Item's current position.
+        """
+        if self.__key is not None:
+            item = self.__data[position]
+            self.__priorities[position] = (self.__key(item), self.__get_tiebreak(item), -self.__n_pushes)
+        self.__n_pushes += 1
+
+    def __get_tiebreak(self, item):
+        """
+        Calculates an item's tiebreak (if a 'tiebreak' function was provided).
+
+        Args:
+            item (Object): Target item.
+
+        Returns:
+            float: Item's tiebreak (0 if no 'tiebreak' function was provided).
+        """
+        if self.__tiebreak is None:
+            return 0
+        return self.__tiebreak(item)
+
+    def __is_greater(self, position_l, position_r):
+        """
+        Checks whether an item is 'greater than' another item in the heap.
+
+        Args:
+            position_l (int): Position of the first item.
+            position_r (int): Position of the second item.
+
+        Returns:
+            bool: 'true' if the first item is greater than the second one,
+                'false' otherwise.
+        """
+        if self.__key is None:
+            return self.__gt(self.__data[position_l], self.__data[position_r])
+        return self.__priorities[position_l] > self.__priorities[position_r]
+
+    def __swap(self, position_l, position_r):
+        """
+        Swaps two items in the underlying binary tree and updates their
+        positions.
+
+        Args:
+            position_l (int): Position of the first item.
+            position_r (int): Position of the second item.
+        """
+        data = self.__data
+        priorities = self.__priorities
+        data[position_l], data[position_r] = data[position_r], data[position_l]
+        priorities[position_l], priorities[position_r] = priorities[position_r], priorities[position_l]
+        self.__position_map[self.__item_id(data[position_l])] = position_l
+        self.__position_map[self.__item_id(data[position_r])] = position_r
+
+    def __sift_up(self, position):
+        """
+        Moves an item up the binary tree until its parent is not lesser than it.
+
+        Args:
+            position (int): Item's current position.
+
+        Returns:
+            int: Item's final position.
+        """
+        while position > 0:
+            parent_position = (position - 1) // 2
+            if not self.__is_greater(position, parent_position):
+                break
+            self.__swap(position, parent_position)
+            position = parent_position
+        return position
+
+    def __sift_down(self, position):
+        """
+        Moves an item down the binary tree until none of its children is greater
+        than it.
+
+        Args:
+            position (int): Item's current position.
+
+        Returns:
+            int: Item's final position.
+        """
+        n_elems = len(self.__data)
+        while True:
+            largest_position = position
+            for child_position in (2*position + 1, 2*position + 2):
+                if child_position < n_elems and self.__is_greater(child_position, largest_position):
+                    largest_position = child_position
+            if largest_position == position:
+                return position
+            self.__swap(position, largest_position)
+            position = largest_position
@@ -14,108 +14,110 @@ class Lookup:
     minimize computational complexity of certain operations (e.g., extracting
     districts' neighborhoods from schools' neighborhoods).
 
+    All schools and districts are expected to have interned IDs (i.e., dense
+    integer indices, as assigned by `optimization.state_graph.StateGraph`), so
+    that every underlying structure is a plain list indexed by ID.
+
     Attributes:
-        __school_dict (dict): Mapping between standardized school NCES IDs and
-            their respective School instances.
-        __district_dict (dict): Mapping between standardized district NCES IDs
-            and their respective District instances.
-        __assignment_dict (dict): Mapping between standardized school NCES IDs
-            and the District instance they are assigned to.
-        __bordering_dict (dict): Mapping between standardized district NCES IDs
-            and School instances at their border (i.e., schools that neighbor
-            other districts).
-        __edge_tracker_matrix (numpy.ndarray): Square matrix (2-dimensional
-            array), of 'districts x districts' dimensions, that contains the
-            amount of existing edges between any pair of districts.
-        __district_id_to_edge_tracker_idx_dict (dict): Mapping between
-            standardized district NCES IDs and their corresponding index in the
-            __edge_tracker_matrix.
-        __edge_tracker_idx_to_district_id_dict (dict): Mapping between a
-            district's index in the __edge_tracker_matrix and their respective
-            standardized NCES ID.
-        __neighborhood_change_counter_dict (dict): Mapping between standardized
-            district NCES IDs and the number of cumulative changes made in their
-            neihborhood (i.e., number of schools redistricted).
+        __school_list (list): School instances, by (interned) school ID.
+        __district_list (list): District instances, by (interned) district ID.
+        __assignment_list (list): District instance each school is assigned to,
+            by (interned) school ID.
+        __n_schools_assigned (int): Number of schools with an assigned
+            district.
+        __bordering_list (list of set): School instances at each district's
+            border (i.e., schools that neighbor other districts), by (interned)
+            district ID.
+        __edge_tracker_list (list of dict): Sparse (symmetric) mapping between
+            each district's neighboring districts' (interned) IDs and the amount
+            of existing edges to them (i.e., only non-zero edge counts are
+            stored), by (interned) district ID.
+        __neighborhood_change_counter_list (list of int): Number of cumulative
+            changes made in each district's neihborhood (i.e., number of
+            schools redistricted), by (interned) district ID.
         __all_schools_assigned (bool): Initialization flag to signal whether all
             schools have an assigned district
+        __on_neighborhood_change (function): Function called with a district's
+            (interned) ID whenever its neighborhood change counter is
+            incremented, or None.
     """
-    __school_dict = None
-    __district_dict = None
-    __assignment_dict = None
-    __bordering_dict = None
-    __edge_tracker_matrix = None
-    __district_id_to_edge_tracker_idx_dict = None
-    __edge_tracker_idx_to_district_id_dict = None
-    __neighborhood_change_counter_dict = None
+    __school_list = None
+    __district_list = None
+    __assignment_list = None
+    __n_schools_assigned = None
+    __bordering_list = None
+    __edge_tracker_list = None
+    __neighborhood_change_counter_list = None
     __all_schools_assigned = False
+    __on_neighborhood_change = None
     
     def __init__(self, all_schools, all_districts):
         # Schools by ID
-        self.__school_dict = {
-            school.get_id(): school for school in all_schools
-        }
+        self.__school_list = [None] * len(all_schools)
+        for school in all_schools:
+            self.__school_list[school.get_id()] = school
         # Districts by ID
-        self.__district_dict = {
-            district.get_id(): district for district in all_districts
-        }
+        self.__district_list = [None] * len(all_districts)
+        for district in all_districts:
+            self.__district_list[district.get_id()] = district
         # District by School ID
-        self.__assignment_dict = {}
+        self.__assignment_list = [None] * len(self.__school_list)
+        self.__n_schools_assigned = 0
         # Bordering Schools by District ID
-        self.__bordering_dict = {}
-        # Number of edges between Districts by District idxs
-        self.__edge_tracker_matrix = None
-        self.__district_id_to_edge_tracker_idx_dict = {}
-        self.__edge_tracker_idx_to_district_id_dict = {}
+        self.__bordering_list = [set([]) for _ in self.__district_list]
+        # Number of edges between Districts by District IDs
+        self.__edge_tracker_list = [{} for _ in self.__district_list]
         # Number of changes made to districts or their neighborhoods
-        self.__neighborhood_change_counter_dict = {}
+        self.__neighborhood_change_counter_list = [0] * len(self.__district_list)
         
     def get_school_by_id(self, school_id):
         """
         Gets a optimization.entity_nodes.School instance through its
-        standardized NCES ID.
+        (interned) ID.
 
         Args:
-            school_id (str): Standardized school NCES ID.
+            school_id (int): Interned school ID.
 
         Returns:
             optimization.entity_nodes.School: School object instance.
         """
-        return self.__school_dict.get(school_id, None)
+        return self.__school_list[school_id]
     
     def get_district_by_id(self, district_id):
         """
         Gets a optimization.entity_nodes.District instance through its
-        standardized NCES ID.
+        (interned) ID.
 
         Args:
-            district_id (str): Standardized district NCES ID.
+            district_id (int): Interned district ID.
 
         Returns:
             optimization.entity_nodes.District: District object instance.
         """
-        return self.__district_dict.get(district_id, None)
+        return self.__district_list[district_id]
     
     def get_district_by_school_id(self, school_id):
         """
         Gets a optimization.entity_nodes.District instance to which a given
-        school's standardized NCES ID is assigned to.
+        school's (interned) ID is assigned to.
 
         Args:
-            school_id (str): Standardized school NCES ID.
+            school_id (int): Interned school ID.
 
         Returns:
-            optimization.entity_nodes.District: District object instance.
+            optimization.entity_nodes.District: District object instance (or
+                None, if the school is not assigned yet).
         """
-        return self.__assignment_dict.get(school_id, None)
+        return self.__assignment_list[school_id]
     
     def get_bordering_schools_by_district_id(self, district_id):
         """
         Gets the set of optimization.entity_nodes.School instances that belong
         to a district's border (i.e., that neighbor other districts) through its
-        standardized NCES ID.
+        (interned) ID.
 
         Args:
-            district_id (str): Standardized district NCES ID.
+            district_id (int): Interned district ID.
 
         Returns:
             set of optimization.entity_nodes.School: Set of School instances at
@@ -127,38 +129,127 @@ class Lookup:
         """
         if not self.__all_schools_assigned:
             raise ValueError("Attempting to retrieve bordering schools wo/ complete district assignment...")
-        return self.__bordering_dict.get(district_id, set([]))
+        return self.__bordering_list[district_id]
     
     def get_neighboor_districts_by_district_id(self, district_id):
         """
         Gets the set of optimization.entity_nodes.District instances that
-        neighbor a specified district, through its standardized NCES ID.
+        neighbor a specified district, through its (interned) ID.
 
         Args:
-            district_id (str): Standardized district NCES ID.
+            district_id (int): Interned district ID.
 
         Returns:
             set of optimization.entity_nodes.District: Set of neighboring
                 District instances.
 
+        Raises:
+            ValueError: Whenever this method is called prior to finalizing
+                school to district assignment.
+        """
+        return set(map(
+            lambda x: self.get_district_by_id(x),
+            self.get_neighboor_district_ids_by_district_id(district_id)
+        ))
+
+    def get_neighboor_district_ids_by_district_id(self, district_id):
+        """
+        Gets the (interned) IDs of all districts that neighbor a specified
+        district, through its (interned) ID.
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            list of int: Interned IDs of all neighboring districts.
+
         Raises:
             ValueError: Whenever this method is called prior to finalizing
                 school to district assignment.
         """
         if not self.__all_schools_assigned:
             raise ValueError("Attempting to retrieve neighbor districts wo/ complete district assignment...")
-        district_idx = self.__district_id_to_edge_tracker_idx_dict[district_id]
-        neighbor_idxs = np.nonzero(self.__edge_tracker_matrix[district_idx])[0].tolist()
-        neighbor_ids = set(map(lambda x: self.__edge_tracker_idx_to_district_id_dict[x], neighbor_idxs))
-        return set(map(lambda x: self.get_district_by_id(x), neighbor_ids))
+        return list(self.__edge_tracker_list[district_id].keys())
+
+    def get_n_neighboor_districts_by_district_id(self, district_id):
+        """
+        Gets the number of districts that neighbor a specified district,
+        through its (interned) ID.
+
+        Args:
+            district_id (int): Interned district ID.
+
+        Returns:
+            int: Number of neighboring districts.
+
+        Raises:
+            ValueError: Whenever this method is called prior to finalizing
+                school to district assignment.
+        """
+        if not self.__all_schools_assigned:
+            raise ValueError("Attempting to retrieve neighbor districts wo/ complete district assignment...")
+        return len(self.__edge_tracker_list[district_id])
+
+    def get_edge_count_by_district_ids(self, district_id, other_district_id):
+        """
+        Gets the number of existing edges (i.e., pairs of neighboring schools)
+        between two districts, through their (interned) IDs.
+
+        Args:
+            district_id (int): Interned district ID.
+            other_district_id (int): Interned (other) district ID.
+
+        Returns:
+            int: Number of edges between both districts.
+
+        Raises:
+            ValueError: Whenever this method is called prior to finalizing
+                school to district assignment.
+        """
+        if not self.__all_schools_assigned:
+            raise ValueError("Attempting to retrieve edge counts wo/ complete district assignment...")
+        return self.__edge_tracker_list[district_id].get(other_district_id, 0)
+
+    def get_district_adjacency_csr(self):
+        """
+        Exports the current district adjacency (and edge counts) in compressed
+        sparse row (CSR) format.
+
+        Returns:
+            tuple: Quadruplet containing (i) the list of all standardized
+                district NCES IDs (i.e., row/column labels, by interned ID),
+                (ii) an array of row offsets, (iii) an array of column indices
+                (i.e., interned IDs), and (iv) an array of edge counts
+                (`numpy.ndarray` of int).
+
+        Raises:
+            ValueError: Whenever this method is called prior to finalizing
+                school to district assignment.
+        """
+        if not self.__all_schools_assigned:
+            raise ValueError("Attempting to export district adjacency wo/ complete district assignment...")
+        offsets = np.zeros(len(self.__district_list) + 1, dtype=np.int64)
+        indices = []
+        edge_counts = []
+        for district_id, neighbor_edge_counts in enumerate(self.__edge_tracker_list):
+            neighbor_edge_counts = sorted(neighbor_edge_counts.items())
+            indices.extend(map(lambda x: x[0], neighbor_edge_counts))
+            edge_counts.extend(map(lambda x: x[1], neighbor_edge_counts))
+            offsets[district_id+1] = len(indices)
+        return (
+            [district.get_nces_id() for district in self.__district_list],
+            offsets,
+            np.array(indices, dtype=np.int32),
+            np.array(edge_counts, dtype=np.int32)
+        )
     
     def get_neighboorhood_changes_by_district_id(self, district_id):
         """
         Gets the number of cumulative changes made to a district's neighborhood
-        (i.e., number of schools redistricted) through its standardized NCES ID.
+        (i.e., number of schools redistricted) through its (interned) ID.
 
         Args:
-            district_id (str): Standardized district NCES ID.
+            district_id (int): Interned district ID.
 
         Returns:
             int: Number of schools redistricted in District's neighborhood.
@@ -169,12 +260,24 @@ class Lookup:
         """
         if not self.__all_schools_assigned:
             raise ValueError("Attempting to retrieve neighborhood changes wo/ complete district assignment...")
-        return self.__neighborhood_change_counter_dict.get(district_id, 0)
+        return self.__neighborhood_change_counter_list[district_id]
     
+    def set_neighborhood_change_callback(self, on_neighborhood_change):
+        """
+        Registers a function to be called whenever a district's neighborhood
+        changes (i.e., whenever its neighborhood change counter is incremented),
+        so that interested parties need not poll the counters themselves.
+
+        Args:
+            on_neighborhood_change (function): Function receiving the
+                (interned) ID of the affected district, or None.
+        """
+        self.__on_neighborhood_change = on_neighborhood_change
+
     def assign_school_to_district_by_id(self, school_id, new_district_id):
         """
-        Assigns a school to a district, through their respective standardized
-        NCES IDs. If there exists a previous district assignment, the school is
+        Assigns a school to a district, through their respective (interned)
+        IDs. If there exists a previous district assignment, the school is
         reassigned to the new district.
 
         Upon a school's reassignment to a new district, intermediate results are
@@ -186,8 +289,8 @@ class Lookup:
         algorithm.
 
         Args:
-            school_id (str): Standardized target school NCES ID.
-            new_district_id (str): Standardized assignment district NCES ID.
+            school_id (int): Interned target school ID.
+            new_district_id (int): Interned assignment district ID.
 
         Raises:
             AssertionError: Whenever a school is reassigned to a different
@@ -199,7 +302,7 @@ class Lookup:
         if self.__all_schools_assigned:
             # Change district assignment
             assert(self.__is_school_in_district_border(school_id, new_district_id))
-            self.__assignment_dict[school_id] = new_district
+            self.__assignment_list[school_id] = new_district
             # Update both district's bordering schools
             self.__update_bordering_schools_by_district_id(
                 school_id,
@@ -219,7 +322,9 @@ class Lookup:
             )
         else:
             # Make new district assignment
-            self.__assignment_dict[school_id] = new_district
+            if old_district is None:
+                self.__n_schools_assigned += 1
+            self.__assignment_list[school_id] = new_district
             self.__handle_incomplete_district_assignment()
     
     def __handle_incomplete_district_assignment(self):
@@ -228,34 +333,19 @@ class Lookup:
         __all_schools_assigned accordingly. The first time this flag is set to
         'true', this method iterates over all schools and districts to
         initialize all necessary attributes for lookup speedup (i.e.,
-        __edge_tracker_matrix, __district_id_to_edge_tracker_idx_dict,
-        __edge_tracker_idx_to_district_id_dict, and
-        __neighborhood_change_counter_dict).
+        __bordering_list and __edge_tracker_list).
         """
-        self.__all_schools_assigned = len(self.__school_dict) == len(self.__assignment_dict)
+        self.__all_schools_assigned = len(self.__school_list) == self.__n_schools_assigned
         if self.__all_schools_assigned:
-            # Initialize edge tracking array (& mapping function)
-            self.__district_id_to_edge_tracker_idx_dict = dict(map(
-                lambda x:(x[1],x[0]),
-                enumerate(self.__district_dict.keys())
-            ))
-            reverse_dict = lambda x: {v:k for k,v in x.items()}
-            self.__edge_tracker_idx_to_district_id_dict = reverse_dict(
-                self.__district_id_to_edge_tracker_idx_dict
-            )
-            n_districts = len(self.__district_dict)
-            self.__edge_tracker_matrix = np.zeros((n_districts,n_districts))
-            # Initialize bordering dict & district neighborhoods
-            for district_id, district in self.__district_dict.items():
+            # Initialize bordering list & district neighborhoods
+            for district_id, district in enumerate(self.__district_list):
                 for school in district.get_schools():
                     if self.__is_school_in_district_border(school.get_id()):
-                        # Initialize bordering dict
-                        cur_district_bordering = self.__bordering_dict.get(district_id, set([]))
-                        cur_district_bordering.add(school)
-                        self.__bordering_dict[district_id] = cur_district_bordering
+                        # Initialize bordering list
+                        self.__bordering_list[district_id].add(school)
             # Initialize district neighborhoods
             flatten = lambda l: [item for sublist in l for item in sublist]
-            for district_id, district in self.__district_dict.items():
+            for district_id, district in enumerate(self.__district_list):
                 all_school_neighbors = flatten(list(map(
                     lambda x: list(x.get_neighbors()),
                     district.get_schools()
@@ -264,13 +354,8 @@ class Lookup:
                     lambda x: self.get_district_by_school_id(x.get_id()).get_id(),
                     all_school_neighbors
                 ))
-                district_idx = self.__district_id_to_edge_tracker_idx_dict[district_id]
-                for neighbor_district_id, edge_count in edge_count_by_district_id.items():
-                    if district_id == neighbor_district_id:
-                        continue
-                    neighbor_district_idx = self.__district_id_to_edge_tracker_idx_dict[neighbor_district_id]
-                    self.__edge_tracker_matrix[district_idx,neighbor_district_idx] = edge_count
-                    self.__edge_tracker_matrix[neighbor_district_idx,district_idx] = edge_count
+                edge_count_by_district_id.pop(district_id, None)
+                self.__edge_tracker_list[district_id] = dict(edge_count_by_district_id)
     
     def __is_school_in_district_border(self, school_id, with_district_id=None):
         """
@@ -279,9 +364,8 @@ class Lookup:
         bordering a specific (neighboring) district.
 
         Args:
-            school_id (str): Standardized target school NCES ID.
-            with_district_id (str): Standardized neighboring district NCES ID,
-                or None.
+            school_id (int): Interned target school ID.
+            with_district_id (int): Interned neighboring district ID, or None.
 
         Returns:
             bool: 'true' if the school is at its assigned district's border
@@ -307,18 +391,16 @@ class Lookup:
         school's district reassignment.
 
         Args:
-            moved_school_id (str): Standardized target school NCES ID.
-            from_district_id (str): Standardized source district NCES ID.
-            to_district_id (str): Standardized destination district NCES ID.
+            moved_school_id (int): Interned target school ID.
+            from_district_id (int): Interned source district ID.
+            to_district_id (int): Interned destination district ID.
         """
         moved_school = self.get_school_by_id(moved_school_id)
         from_district = self.get_district_by_id(from_district_id)
         to_district = self.get_district_by_id(to_district_id)
         
         # Remove moved school from the "bordering schools set" of its previous district
-        from_district_brodering_schools = self.__bordering_dict.get(from_district_id, set([]))
-        from_district_brodering_schools.discard(moved_school)
-        self.__bordering_dict[from_district_id] = from_district_brodering_schools
+        self.__bordering_list[from_district_id].discard(moved_school)
         # Update all moved schools' neighbors (includig itself)
         for neighbor in [*moved_school.get_neighbors(), moved_school]:
             neighbor_district_id = self.get_district_by_school_id(neighbor.get_id()).get_id()
@@ -327,12 +409,11 @@ class Lookup:
                 (neighbor_district_id == to_district_id)
             )
             if neighbor_is_from_relevant_district:
-                current_bordering_schools = self.__bordering_dict.get(neighbor_district_id, set([]))
+                current_bordering_schools = self.__bordering_list[neighbor_district_id]
                 if self.__is_school_in_district_border(neighbor.get_id()):
                     current_bordering_schools.add(neighbor)
                 else:
                     current_bordering_schools.discard(neighbor)
-                self.__bordering_dict[neighbor_district_id] = current_bordering_schools
                 
     def __update_district_neighborhoods_by_district_id(self, moved_school_id, from_district_id, to_district_id):
         """
@@ -341,9 +422,9 @@ class Lookup:
         edges between involved pairs of neighbors.
 
         Args:
-            moved_school_id (str): Standardized target school NCES ID.
-            from_district_id (str): Standardized source district NCES ID.
-            to_district_id (str): Standardized destination district NCES ID.
+            moved_school_id (int): Interned target school ID.
+            from_district_id (int): Interned source district ID.
+            to_district_id (int): Interned destination district ID.
         """
         # Get number of edges between moved school and its neighbors' districts
         moved_school = self.get_school_by_id(moved_school_id)
@@ -351,27 +432,37 @@ class Lookup:
             lambda x: self.get_district_by_school_id(x.get_id()).get_id(),
             moved_school.get_neighbors()
         ))
-        # Get matrix idxs for all district ids
-        from_district_idx = self.__district_id_to_edge_tracker_idx_dict[from_district_id]
-        to_district_idx = self.__district_id_to_edge_tracker_idx_dict[to_district_id]
-        # Update edge tracker matrix
+        # Update edge tracker
         for neighbor_district_id, edge_count in Counter(neighbor_district_ids).items():
-            neighbor_district_idx = self.__district_id_to_edge_tracker_idx_dict[neighbor_district_id]
             # Update edges existing between "from" and "to"
             if neighbor_district_id == from_district_id:
-                self.__edge_tracker_matrix[from_district_idx,to_district_idx] += edge_count
-                self.__edge_tracker_matrix[to_district_idx,from_district_idx] += edge_count
+                self.__add_edges(from_district_id, to_district_id, edge_count)
             elif neighbor_district_id == to_district_id:
-                self.__edge_tracker_matrix[from_district_idx,to_district_idx] -= edge_count
-                self.__edge_tracker_matrix[to_district_idx,from_district_idx] -= edge_count
+                self.__add_edges(from_district_id, to_district_id, -edge_count)
             # Update edges existing between "to" and other districts
             else:
                 # Remove edges that existed between "from" and neighbor
-                self.__edge_tracker_matrix[from_district_idx,neighbor_district_idx] -= edge_count
-                self.__edge_tracker_matrix[neighbor_district_idx,from_district_idx] -= edge_count
+                self.__add_edges(from_district_id, neighbor_district_id, -edge_count)
                 # Add new edges created between "to" and neighbor
-                self.__edge_tracker_matrix[to_district_idx,neighbor_district_idx] += edge_count
-                self.__edge_tracker_matrix[neighbor_district_idx,to_district_idx] += edge_count
+                self.__add_edges(to_district_id, neighbor_district_id, edge_count)
+
+    def __add_edges(self, district_id, other_district_id, edge_count):
+        """
+        Adds (or removes, if negative) edges between two districts. District
+        pairs left without any edges are no longer tracked.
+
+        Args:
+            district_id (int): Interned district ID.
+            other_district_id (int): Interned (other) district ID.
+            edge_count (int): Number of edges to add.
+        """
+        for id_l, id_r in ((district_id, other_district_id), (other_district_id, district_id)):
+            neighbor_edge_counts = self.__edge_tracker_list[id_l]
+            new_edge_count = neighbor_edge_counts.get(id_r, 0) + edge_count
+            if new_edge_count == 0:
+                neighbor_edge_counts.pop(id_r, None)
+            else:
+                neighbor_edge_counts[id_r] = new_edge_count
                 
     def __update_neighboorhood_change_counter(self, from_district_id, to_district_id):
         """
@@ -380,16 +471,17 @@ class Lookup:
         respective neighborhoods.
 
         Args:
-            from_district_id (str): Standardized source district NCES ID.
-            to_district_id (str): Standardized destination district NCES ID.
+            from_district_id (int): Interned source district ID.
+            to_district_id (int): Interned destination district ID.
         """
         # Auxiliary method for single counter increments
         def inc_counter(district_id):
-            cur_counter = self.__neighborhood_change_counter_dict.get(district_id, 0)
-            self.__neighborhood_change_counter_dict[district_id] = cur_counter + 1
+            self.__neighborhood_change_counter_list[district_id] += 1
+            if self.__on_neighborhood_change is not None:
+                self.__on_neighborhood_change(district_id)
         # Get immediate neighbor districts for "from" and "to" districts
-        from_district_neighborhood = self.get_neighboor_districts_by_district_id(from_district_id)
-        to_district_neighborhood = self.get_neighboor_districts_by_district_id(to_district_id)
+        from_district_neighborhood = self.get_neighboor_district_ids_by_district_id(from_district_id)
+        to_district_neighborhood = self.get_neighboor_district_ids_by_district_id(to_district_id)
         immediate_neighborhood = set([from_district_id, to_district_id]).union(
             from_district_neighborhood,
             to_district_neighborhood
@@ -25,17 +25,38 @@ class RunMetrics:
             district at each iteration.
         __move_history (list of tuple): List of all redistricting moves
             performed throughout the algorithm's run, containing a school's
-            standardized NCES ID, a source district's standardized NCES ID, and
-            a destination district's standardized NCES ID.
-        __district_assignment_by_school_id (dict of str: dict): Mapping between
+            (interned) ID, a source district's (interned) ID, and a destination
+            district's (interned) ID.
+        __district_assignment_by_school_id (dict of str: list): Mapping between
             a checkpoint label (i.e., 'before' or 'after') and the corresponding
-            school/district assignment.
+            school/district assignment (i.e., each school's district ID, by
+            school ID).
         __per_student_funding_by_district_id (dict of str: dict): Mapping
             between a checkpoint label (i.e., 'before' or 'after') and the
             corresponding per-student funding.
+        __current_assignment_by_school_id (list of int): Current district's
+            (interned) ID, by (interned) school ID (kept up to date through
+            registered moves).
+        __n_schools_redistricted (int): Number of schools currently assigned
+            to a district other than their initial one.
+        __school_nces_ids (list of str): Standardized NCES IDs of all schools,
+            by (interned) school ID.
+        __district_nces_ids (list of str): Standardized NCES IDs of all
+            districts, by (interned) district ID.
+        __seed (int): Seed of the run's random number generator (i.e., the
+            run can be replayed by passing it to
+            `core.greedy_algorithm.greedy_algo`), or None. Seeds are mapped
+            to runs through `core.greedy_algorithm.draw_run_order`, so seeds
+            recorded before it was introduced (i.e., by the earlier
+            `random.Random`-based shuffles) do not replay the same runs.
+
+    Note:
+        Metrics are tracked through interned (integer) IDs, and only translated
+        into standardized NCES IDs by `as_dict`.
     """
     # One time measurements
     __per_student_funding_whole_state = None
+    __seed = None
     
     # Lists of overtime measurements
     __spatial_inequality_values = None
@@ -46,12 +67,23 @@ class RunMetrics:
     # Before/after comparison measurements
     __district_assignment_by_school_id = None
     __per_student_funding_by_district_id = None
+
+    # Incremental measurements
+    __current_assignment_by_school_id = None
+    __n_schools_redistricted = None
+
+    # Interned ID translation
+    __school_nces_ids = None
+    __district_nces_ids = None
     
     # One time metrics
     __start_timestamp = None
     __end_timestamp = None
     
-    def __init__(self):
+    def __init__(self, seed=None):
+        # One time measurement initialization
+        self.__seed = seed
+
         # Overtime measurement initialization
         self.__spatial_inequality_values = []
         self.__percentage_of_schools_redistricted = []
@@ -61,8 +93,12 @@ class RunMetrics:
         # Before/after measurement initialization
         self.__district_assignment_by_school_id = {}
         self.__per_student_funding_by_district_id = {}
+
+        # Incremental measurement initialization
+        self.__current_assignment_by_school_id = []
+        self.__n_schools_redistricted = 0
         
-    def on_init(self, schools, districts, lookup):
+    def on_init(self, schools, districts, lookup, inequality_tracker=None):
         """
         Initializes necessary class' attributes and stores initial metrics'
         values (prior to the algorithm's iterations).
@@ -76,16 +112,28 @@ class RunMetrics:
             districts (list of optimization.entity_nodes.District): List of all
                 initialized District instances.
             lookup (optimization.lookup.Lookup): Lookup instance.
+            inequality_tracker
+                (optimization.inequality_tracker.InequalityTracker): Unused,
+                kept for callback compatibility.
         """
         # Calculate average funding per student
         total_funding_in_state = sum(map(lambda x: x.get_total_funding(), districts))
         total_students_in_state = sum(map(lambda x: x.get_total_students(), districts))
+        # Keep track of standardized NCES IDs (by interned ID)
+        self.__school_nces_ids = [None] * len(schools)
+        for school in schools:
+            self.__school_nces_ids[school.get_id()] = school.get_nces_id()
+        self.__district_nces_ids = [None] * len(districts)
+        for district in districts:
+            self.__district_nces_ids[district.get_id()] = district.get_nces_id()
         # Update variables
         self.__per_student_funding_whole_state = total_funding_in_state / total_students_in_state
         self.__checkpoint_before_and_after_measurements(schools, districts, lookup, "before")
+        self.__current_assignment_by_school_id = copy.copy(self.__district_assignment_by_school_id["before"])
+        self.__n_schools_redistricted = 0
         self.__start_timestamp = time()
     
-    def on_end(self, schools, districts, lookup):
+    def on_end(self, schools, districts, lookup, inequality_tracker=None):
         """
         Initializes necessary class' attributes and stores final metrics'
         values (after the algorithm concludes its run).
@@ -99,18 +147,22 @@ class RunMetrics:
             districts (list of optimization.entity_nodes.District): List of all
                 initialized District instances.
             lookup (optimization.lookup.Lookup): Lookup instance.
+            inequality_tracker
+                (optimization.inequality_tracker.InequalityTracker): Updated
+                InequalityTracker instance, or None.
         """
         self.__checkpoint_before_and_after_measurements(schools, districts, lookup, "after")
-        self.on_update(schools, districts, lookup)
+        self.on_update(schools, districts, lookup, inequality_tracker)
         self.__end_timestamp = time()
     
-    def on_update(self, schools, districts, lookup):
+    def on_update(self, schools, districts, lookup, inequality_tracker=None):
         """
         Updates necessary class' attributes and calculates runtime metrics'
         values (during the algorithm's run).
 
         This method should be called at the end of each of the algorithm's
-        iterations.
+        iterations. If an InequalityTracker is provided, spatial inequality is
+        read from it instead of being recalculated over all districts.
 
         Args:
             schools (list of optimization.entity_nodes.School): List of all
@@ -118,12 +170,18 @@ class RunMetrics:
             districts (list of optimization.entity_nodes.District): List of all
                 initialized District instances.
             lookup (optimization.lookup.Lookup): Lookup instance.
+            inequality_tracker
+                (optimization.inequality_tracker.InequalityTracker): Updated
+                InequalityTracker instance, or None.
         """
         # Calculate inequality
-        cur_inequality = self.__calculate_inequality(districts, lookup)
+        if inequality_tracker is None:
+            cur_inequality = self.__calculate_inequality(districts, lookup)
+        else:
+            cur_inequality = inequality_tracker.get_inequality()
         self.__spatial_inequality_values.append(cur_inequality)
-        # Calculate percentage of redistricted schools
-        cur_percentage = self.__calculate_percentage_of_schools_redistricted(schools, lookup)
+        # Calculate percentage of redistricted schools (kept up to date by 'on_move')
+        cur_percentage = 100 * self.__n_schools_redistricted / len(schools)
         self.__percentage_of_schools_redistricted.append(cur_percentage)
         # Calculate number of districts
         self.__number_of_districts.append(len(districts))
@@ -142,9 +200,8 @@ class RunMetrics:
                 continuous variable).
             moves (list of tuple): List of all moves performed during the
                 current iteration of the algorithm (i.e., tuples comprised of a
-                redistricted school standardized NCES ID, its source district
-                standardized NCES ID and its destination district standardized
-                NCES ID).
+                redistricted school's interned ID, its source district's
+                interned ID and its destination district's interned ID).
         """
         for move in moves:
             # Get configuration
@@ -158,26 +215,60 @@ class RunMetrics:
                 from_district_id,
                 to_district_id
             ))
-        
+            # Update number of redistricted schools
+            initial_district_id = self.__district_assignment_by_school_id["before"][school_id]
+            was_redistricted = self.__current_assignment_by_school_id[school_id] != initial_district_id
+            is_redistricted = to_district_id != initial_district_id
+            self.__n_schools_redistricted += int(is_redistricted) - int(was_redistricted)
+            self.__current_assignment_by_school_id[school_id] = to_district_id
+
+    def get_seed(self):
+        """
+        Getter method for the seed of the run's random number generator.
+
+        Returns:
+            int: Run's seed (or None, if unknown).
+        """
+        return self.__seed
+
     def as_dict(self):
         """
-        Creates a dictionary containing all metrics tracked.
+        Creates a dictionary containing all metrics tracked, where all
+        (interned) IDs are translated into standardized NCES IDs.
 
         Returns:
             dict: Resulting dictionary with tracked metrics.
         """
+        school_nces_ids = self.__school_nces_ids
+        district_nces_ids = self.__district_nces_ids
         return {
             # Overtime measurements
             "spatial_inequality": copy.copy(self.__spatial_inequality_values),
             "percentage_of_schools_redistricted": copy.copy(self.__percentage_of_schools_redistricted),
             "number_of_districts": copy.copy(self.__number_of_districts),
-            "move_history": copy.copy(self.__move_history),
+            "move_history": [(
+                iteration_idx,
+                school_nces_ids[school_id],
+                district_nces_ids[from_district_id],
+                district_nces_ids[to_district_id]
+            ) for iteration_idx, school_id, from_district_id, to_district_id in self.__move_history],
             # Before/after measurements
-            "district_assignment_by_school_id": copy.copy(self.__district_assignment_by_school_id),
-            "per_student_funding_by_district_id": copy.copy(self.__per_student_funding_by_district_id),
+            "district_assignment_by_school_id": {
+                label: {
+                    school_nces_ids[school_id]: district_nces_ids[district_id]
+                    for school_id, district_id in enumerate(assignment)
+                } for label, assignment in self.__district_assignment_by_school_id.items()
+            },
+            "per_student_funding_by_district_id": {
+                label: {
+                    district_nces_ids[district_id]: per_student_funding
+                    for district_id, per_student_funding in per_student_funding_by_district_id.items()
+                } for label, per_student_funding_by_district_id in self.__per_student_funding_by_district_id.items()
+            },
             # One time measurements
             "time_elapsed": self.__end_timestamp - self.__start_timestamp,
-            "per_student_funding_whole_state": self.__per_student_funding_whole_state
+            "per_student_funding_whole_state": self.__per_student_funding_whole_state,
+            "seed": self.__seed
         }
     
     def to_file(self, filepath):
@@ -216,12 +307,11 @@ class RunMetrics:
         assert(self.__per_student_funding_by_district_id is not None)
         assert(label == "before" or label == "after")
         
-        # Initialize school assignment
-        get_district_id = lambda school: lookup.get_district_by_school_id(school.get_id()).get_id()
-        self.__district_assignment_by_school_id[label] = dict(map(
-            lambda school: (school.get_id(), get_district_id(school)),
-            schools
-        ))
+        # Initialize school assignment (by interned school ID)
+        assignment = [None] * len(schools)
+        for school in schools:
+            assignment[school.get_id()] = lookup.get_district_by_school_id(school.get_id()).get_id()
+        self.__district_assignment_by_school_id[label] = assignment
         # Initialize district funding
         get_per_student_funding = lambda district: district.get_total_funding() / district.get_total_students()
         self.__per_student_funding_by_district_id[label] = dict(map(
@@ -256,33 +346,3 @@ class RunMetrics:
             overall_inequality += ineq_contribution / len(full_neighborhood)
             normalization_factor += get_per_student_funding(district)
         return overall_inequality / normalization_factor
-    
-    def __calculate_percentage_of_schools_redistricted(self, schools, lookup):
-        """
-        Auxiliary method to calculate the percentage of schools that are
-        currently redistricted (compared to their initial assignment).
-
-        Args:
-            districts (list of optimization.entity_nodes.School): List of all
-                initialized School instances.
-            lookup (optimization.lookup.Lookup): Lookup instance.
-
-        Returns:
-            float: Percentage of currently redistricted schools.
-        """
-        # Get initial assignment
-        initial_district_assignment = self.__district_assignment_by_school_id["before"]
-        # Extract current assignment
-        get_district_id = lambda school: lookup.get_district_by_school_id(school.get_id()).get_id()
-        cur_district_assignment = dict(map(
-            lambda school: (school.get_id(), get_district_id(school)),
-            schools
-        ))
-        # Filter schools that were redistricted
-        is_redistricted = lambda school: initial_district_assignment[school.get_id()] != cur_district_assignment[school.get_id()]
-        schools_redistricted = list(filter(
-            is_redistricted,
-            schools
-        ))
-        # Return final percentage
-        return 100 * len(schools_redistricted) / len(schools)
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Implements a "sequential stopping" termination criterion for repeated runs of
+our algorithm, preventing unnecesary runs when their mean outcome is already
+estimated precisely enough.
+"""
+import math
+import numpy as np
+
+from statistics import NormalDist
+
+def t_cdf(t, df):
+    """
+    Calculates the (exact) cumulative distribution function of Student's
+    t-distribution, for an integer number of degrees of freedom, through its
+    closed form (see Abramowitz and Stegun, 26.7.3 and 26.7.4).
+
+    Args:
+        t (float): Target value.
+        df (int): Degrees of freedom (at least 1).
+
+    Returns:
+        float: Cumulative probability of `t`.
+    """
+    theta = math.atan(abs(t) / math.sqrt(df))
+    cos_sq = math.cos(theta) ** 2
+    # Probability of |T| < |t| (as a finite sum of powers of cos(theta))
+    if df % 2 == 1:
+        term, total = math.cos(theta), 0
+        for k in range(3, df + 1, 2):
+            total += term
+            term *= cos_sq * (k - 1) / k
+        prob = 2 / math.pi * (theta + math.sin(theta) * total)
+    else:
+        term, total = 1, 0
+        for k in range(2, df + 1, 2):
+            total += term
+            term *= cos_sq * (k - 1) / k
+        prob = math.sin(theta) * total
+    return 0.5 + math.copysign(prob / 2, t)
+
+def t_quantile(p, df):
+    """
+    Calculates a quantile of Student's t-distribution, for an integer number of
+    degrees of freedom. Its Cornish-Fisher expansion around the standard normal
+    distribution (see Abramowitz and Stegun, 26.7.5) is used as a first guess,
+    which underestimates the quantile for few degrees of freedom (e.g., by
+    0.8% for p=0.995 and df=3), and is then refined through Newton's method
+    over the exact cumulative distribution function (see `t_cdf`).
+
+    Args:
+        p (float): Target cumulative probability (e.g., 0.975).
+        df (int): Degrees of freedom (at least 1).
+
+    Returns:
+        float: Quantile (within 1e-12 of the exact value).
+    """
+    z = NormalDist().inv_cdf(p)
+    t = (
+        z
+        + (z**3 + z) / (4 * df)
+        + (5*z**5 + 16*z**3 + 3*z) / (96 * df**2)
+        + (3*z**7 + 19*z**5 + 17*z**3 - 15*z) / (384 * df**3)
+        + (79*z**9 + 776*z**7 + 1482*z**5 - 1920*z**3 - 945*z) / (92160 * df**4)
+    )
+    # Refine guess (the density is evaluated in log-space, to avoid overflows)
+    log_norm = math.lgamma((df + 1) / 2) - math.lgamma(df / 2) - 0.5 * math.log(df * math.pi)
+    for _ in range(50):
+        density = math.exp(log_norm - (df + 1) / 2 * math.log1p(t * t / df))
+        step = (t_cdf(t, df) - p) / density
+        t -= step
+        if abs(step) <= 1e-12 * max(1, abs(t)):
+            break
+    return t
+
+class SequentialStopper:
+    """
+    Class to handle preemptive stopping of repeated (independent) runs of an
+    algorithm, once the confidence interval on their mean outcome is narrow
+    enough. After each run, the half-width of a (two-sided) Student's t
+    confidence interval is calculated over all recorded outcomes, and no more
+    runs are needed once it falls within the requested tolerance. A minimum and
+    maximum number of runs are always respected.
+
+    Attributes:
+        __tolerance (float): Maximum allowed half-width of the confidence
+            interval.
+        __min_runs (int): Minimum number of runs (should be at least 4).
+        __max_runs (int): Maximum number of runs.
+        __confidence (float): Confidence level of the interval (e.g., 0.95).
+        __relative (bool): Whether tolerance is relative to the (absolute)
+            mean outcome, rather than absolute.
+        __values (list of float): Outcomes of all recorded runs.
+
+    Example:
+        >>> sequential_stopper = SequentialStopper(0.01, min_runs=4, max_runs=20)
+        >>> try:
+        ...     for value in [0.051, 0.052, 0.050, 0.051, 0.052]:
+        ...         sequential_stopper.update(value)
+        ... except StopIteration:
+        ...     print(len(sequential_stopper))
+        4
+    """
+    __tolerance = None
+    __min_runs = None
+    __max_runs = None
+    __confidence = None
+    __relative = None
+
+    __values = None
+
+    def __init__(self, tolerance, min_runs=5, max_runs=20, confidence=0.95, relative=False):
+        assert(4 <= min_runs <= max_runs)
+        assert(0 < confidence < 1)
+        self.__tolerance = tolerance
+        self.__min_runs = min_runs
+        self.__max_runs = max_runs
+        self.__confidence = confidence
+        self.__relative = relative
+
+        self.__values = []
+
+    def update(self, value):
+        """
+        Records the outcome of a new run and checks whether more runs are
+        needed.
+
+        Args:
+            value (float): Outcome of the latest run.
+
+        Raises:
+            StopIteration: Whenever the maximum number of runs was reached, or
+                the minimum number of runs was reached and the confidence
+                interval is within tolerance.
+        """
+        self.__values.append(value)
+        if self.is_done():
+            raise StopIteration
+
+    def is_done(self):
+        """
+        Checks whether enough runs were recorded (see `update`).
+
+        Returns:
+            bool: 'true' if no more runs are needed, 'false' otherwise.
+        """
+        if len(self.__values) >= self.__max_runs:
+            return True
+        if len(self.__values) < self.__min_runs:
+            return False
+        tolerance = self.__tolerance
+        if self.__relative is True:
+            tolerance *= abs(np.mean(self.__values))
+        return self.get_half_width() <= tolerance
+
+    def get_half_width(self):
+        """
+        Calculates the half-width of the confidence interval on the mean
+        outcome of all recorded runs.
+
+        Returns:
+            float: Half-width of the confidence interval (infinite if fewer
+                than two runs were recorded).
+        """
+        n = len(self.__values)
+        if n < 2:
+            return float("inf")
+        t = t_quantile(0.5 + self.__confidence / 2, n - 1)
+        return t * np.std(self.__values, ddof=1) / np.sqrt(n)
+
+    def get_max_runs(self):
+        """
+        Getter method for the maximum number of runs.
+
+        Returns:
+            int: Maximum number of runs.
+        """
+        return self.__max_runs
+
+    def get_min_runs(self):
+        """
+        Getter method for the minimum number of runs.
+
+        Returns:
+            int: Minimum number of runs.
+        """
+        return self.__min_runs
+
+    def __len__(self):
+        return len(self.__values)
@@ -0,0 +1,311 @@
+"""
+Provides a prebuilt (and reusable) representation of a state's school graph,
+from which fresh School, District and Lookup instances can be cheaply created
+for every run of our algorithm. Graphs can also be stored as flat binary files
+and memory-mapped back, so that multiple processes share a single copy.
+"""
+import json
+import os
+
+import numpy as np
+
+from optimization.array_state import ArrayState
+from optimization.entity_nodes import District, School
+from optimization.lookup import Lookup
+
+class StateGraph:
+    """
+    This class holds all the static information needed to initialize a run of
+    the redistricting algorithm over a single state (i.e., schools' students,
+    funding and neighbors, alongside the initial school/district assignment).
+    Everything is stored in flat arrays, indexed by each school's (or
+    district's) position, so that building it from raw data only needs to
+    happen once per state. Both the school adjacency and the district
+    membership are kept in compressed sparse row format (i.e., the entries of
+    the i-th row are given by `indices[offsets[i]:offsets[i+1]]`), where every
+    row of the school adjacency is expected to be sorted, without any
+    duplicate (or self-referencing) neighbors (see
+    `auxiliary.functions.get_state_graph_arrays`). Each run
+    then calls `instantiate` to get its own (mutable) School, District and
+    Lookup instances, whose IDs are interned as each school's (or district's)
+    position (NCES IDs are only kept for reference). Alternatively,
+    `instantiate_arrays` gets a single (mutable) ArrayState instance instead,
+    which shares all static arrays with the graph.
+
+    A graph can be written to disk with `save` and re-opened with `open`. The
+    resulting file contains a small JSON header followed by all (aligned) raw
+    arrays, which are memory-mapped (as they are) when opened. Every process opening the
+    same file then shares the OS' page cache, instead of holding its own copy.
+
+    Attributes:
+        __school_ids (numpy.ndarray): Standardized NCES IDs of all schools.
+        __total_students (numpy.ndarray): Total number of students of each
+            school.
+        __total_funding (numpy.ndarray): Total funding of each school.
+        __neighbor_offsets (numpy.ndarray): Row offsets of the school
+            adjacency.
+        __neighbor_idxs (numpy.ndarray): Positions of all schools' neighboring
+            schools (row by row).
+        __district_ids (numpy.ndarray): Standardized NCES IDs of all districts.
+        __district_offsets (numpy.ndarray): Row offsets of the district
+            membership.
+        __district_school_idxs (numpy.ndarray): Positions of all schools
+            initially assigned to each district (row by row).
+
+    Example:
+        >>> state_graph = StateGraph(
+        ...     school_ids=["010000500889", "010000500890"],
+        ...     total_students=[100, 200],
+        ...     total_funding=[1000.0, 3000.0],
+        ...     neighbor_offsets=[0, 1, 2],
+        ...     neighbor_idxs=[1, 0],
+        ...     district_ids=["0100005", "0100006"],
+        ...     district_offsets=[0, 1, 2],
+        ...     district_school_idxs=[0, 1])
+        >>> state_graph.save("/tmp/state_graph.bin")
+        >>> state_graph = StateGraph.open("/tmp/state_graph.bin")
+        >>> schools, districts, lookup = state_graph.instantiate()
+        >>> print(lookup.get_district_by_school_id(1).get_nces_id())
+        0100006
+    """
+    __school_ids = None
+    __total_students = None
+    __total_funding = None
+    __neighbor_offsets = None
+    __neighbor_idxs = None
+    __district_ids = None
+    __district_offsets = None
+    __district_school_idxs = None
+
+    # File format
+    __magic = b"SIGRAPH2"
+    __alignment = 64
+    __dtypes = {
+        "school_ids": "S",
+        "total_students": "<i8",
+        "total_funding": "<f8",
+        "neighbor_offsets": "<i8",
+        "neighbor_idxs": "<i4",
+        "district_ids": "S",
+        "district_offsets": "<i8",
+        "district_school_idxs": "<i4"
+    }
+
+    def __init__(self, school_ids, total_students, total_funding, neighbor_offsets, neighbor_idxs, district_ids, district_offsets, district_school_idxs):
+        # Arrays (including memory-mapped ones) are kept as they are
+        self.__school_ids = np.asarray(school_ids)
+        self.__total_students = np.asarray(total_students)
+        self.__total_funding = np.asarray(total_funding)
+        self.__neighbor_offsets = np.asarray(neighbor_offsets)
+        self.__neighbor_idxs = np.asarray(neighbor_idxs)
+        self.__district_ids = np.asarray(district_ids)
+        self.__district_offsets = np.asarray(district_offsets)
+        self.__district_school_idxs = np.asarray(district_school_idxs)
+
+    @classmethod
+    def open(cls, filepath):
+        """
+        Opens a graph previously written with `save`. All arrays are
+        memory-mapped (read-only) rather than read into memory.
+
+        Args:
+            filepath (str): Path of the target file.
+
+        Returns:
+            optimization.state_graph.StateGraph: Memory-mapped graph.
+
+        Raises:
+            ValueError: If the file is not a valid state graph (including
+                files written in an older format, which must be rewritten).
+        """
+        with open(filepath, "rb") as f:
+            magic = f.read(len(cls.__magic))
+            if magic != cls.__magic:
+                raise ValueError(f"'{filepath}' is not a valid state graph file.")
+            header_size = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_size).decode("utf-8"))
+        arrays = {}
+        for name, array_info in header.items():
+            shape = tuple(array_info["shape"])
+            if np.prod(shape) == 0:
+                # Empty arrays cannot be memory-mapped
+                arrays[name] = np.empty(shape, dtype=array_info["dtype"])
+                continue
+            arrays[name] = np.memmap(
+                filepath,
+                dtype=array_info["dtype"],
+                mode="r",
+                offset=array_info["offset"],
+                shape=shape
+            )
+        return cls(**arrays)
+
+    def save(self, filepath):
+        """
+        Writes the graph into a single flat binary file (see `open`). The file
+        is written atomically, so that no process ever opens a partially
+        written graph.
+
+        Args:
+            filepath (str): Path of the target file.
+        """
+        arrays = {
+            "school_ids": self.__school_ids,
+            "total_students": self.__total_students,
+            "total_funding": self.__total_funding,
+            "neighbor_offsets": self.__neighbor_offsets,
+            "neighbor_idxs": self.__neighbor_idxs,
+            "district_ids": self.__district_ids,
+            "district_offsets": self.__district_offsets,
+            "district_school_idxs": self.__district_school_idxs
+        }
+        arrays = {
+            name: np.ascontiguousarray(array.astype(self.__dtypes[name]))
+            for name, array in arrays.items()
+        }
+        # Header with each array's dtype, shape and (aligned) offset
+        header = {}
+        header_size = 4096
+        while True:
+            offset = len(self.__magic) + 8 + header_size
+            for name, array in arrays.items():
+                offset += -offset % self.__alignment
+                header[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+                offset += array.nbytes
+            header_bytes = json.dumps(header).encode("utf-8")
+            if len(header_bytes) <= header_size:
+                break
+            header_size *= 2
+        # Write magic number, header and arrays
+        tmp_filepath = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmp_filepath, "wb") as f:
+            f.write(self.__magic)
+            f.write(header_size.to_bytes(8, "little"))
+            f.write(header_bytes.ljust(header_size, b" "))
+            for name, array in arrays.items():
+                f.write(b"\0" * (header[name]["offset"] - f.tell()))
+                f.write(array.tobytes())
+        os.replace(tmp_filepath, filepath)
+
+    def get_school_ids(self):
+        """
+        Getter method for all schools' standardized NCES IDs.
+
+        Returns:
+            list of str: Standardized NCES IDs (by school position).
+        """
+        return self.__to_str_list(self.__school_ids)
+
+    def get_district_ids(self):
+        """
+        Getter method for all districts' standardized NCES IDs.
+
+        Returns:
+            list of str: Standardized NCES IDs (by district position).
+        """
+        return self.__to_str_list(self.__district_ids)
+
+    def get_neighbor_csr(self):
+        """
+        Getter method for the school adjacency in compressed sparse row
+        format, as it is stored (i.e., without copying memory-mapped arrays).
+
+        Returns:
+            tuple: Pair containing (i) the row offsets, and (ii) the positions
+                of all schools' neighboring schools (row by row).
+        """
+        return self.__neighbor_offsets, self.__neighbor_idxs
+
+    def instantiate_arrays(self):
+        """
+        Creates a new ArrayState instance, reflecting the state's initial
+        school/district assignment.
+
+        Returns:
+            optimization.array_state.ArrayState: Fully initialized ArrayState
+                instance.
+        """
+        neighbor_offsets, neighbor_idxs = self.get_neighbor_csr()
+        return ArrayState(
+            school_ids=self.__school_ids,
+            total_students=self.__total_students,
+            total_funding=self.__total_funding,
+            neighbor_offsets=neighbor_offsets,
+            neighbor_idxs=neighbor_idxs,
+            district_ids=self.__district_ids,
+            district_offsets=self.__district_offsets,
+            district_school_idxs=self.__district_school_idxs
+        )
+
+    def instantiate(self):
+        """
+        Creates new School, District and Lookup instances, reflecting the
+        state's initial school/district assignment.
+
+        Returns:
+            tuple: Triplet containing (i) the list of all
+                `optimization.entity_nodes.School` instances, (ii) the list of
+                all `optimization.entity_nodes.District` instances, and (iii) a
+                fully initialized `optimization.lookup.Lookup` instance.
+        """
+        # Work with native python types (numpy scalars are slower to work with)
+        neighbor_offsets, neighbor_idxs = self.get_neighbor_csr()
+        neighbor_offsets = neighbor_offsets.tolist()
+        neighbor_idxs = neighbor_idxs.tolist()
+        district_offsets = self.__district_offsets.tolist()
+        district_school_idxs = self.__district_school_idxs.tolist()
+
+        # Instantiate all schools (interned by position)
+        schools = [School(
+            school_idx,
+            total_students,
+            total_funding,
+            nces_id=nces_id
+        ) for school_idx, (nces_id, total_students, total_funding) in enumerate(zip(
+            self.get_school_ids(),
+            self.__total_students.tolist(),
+            self.__total_funding.tolist()
+        ))]
+
+        # Instantiate all districts (interned by position)
+        districts = [District(
+            district_idx,
+            nces_id=nces_id
+        ) for district_idx, nces_id in enumerate(self.get_district_ids())]
+
+        # Instantiate lookup
+        lookup = Lookup(schools, districts)
+
+        # Populate schools' neighbors
+        for school_idx, school in enumerate(schools):
+            start, end = neighbor_offsets[school_idx], neighbor_offsets[school_idx+1]
+            for neighbor_idx in neighbor_idxs[start:end]:
+                school.add_neighbor(schools[neighbor_idx])
+
+        # Populate school districts
+        for district_idx, district in enumerate(districts):
+            start, end = district_offsets[district_idx], district_offsets[district_idx+1]
+            for school_idx in district_school_idxs[start:end]:
+                school = schools[school_idx]
+                district.add_school(school)
+                lookup.assign_school_to_district_by_id(school.get_id(), district.get_id())
+
+        return schools, districts, lookup
+
+    def __to_str_list(self, ids):
+        """
+        Converts an array of IDs (either as strings or as raw bytes) into a
+        list of strings.
+
+        Args:
+            ids (numpy.ndarray): Target IDs.
+
+        Returns:
+            list of str: Converted IDs.
+        """
+        if ids.dtype.kind == "S":
+            return [x.decode("utf-8") for x in ids.tolist()]
+        return [str(x) for x in ids.tolist()]
+
+    def __len__(self):
+        return len(self.__school_ids)